@@ -1,139 +1,308 @@
 """
 Automatic database migration system
 Runs on app startup to ensure database schema is up-to-date
+
+Each step in MIGRATIONS runs once, in order; the schema_version table
+records the steps applied. When the database is already current, startup
+costs one read of schema_version's primary key.
 """
-from sqlalchemy import inspect, text
-from database import engine, SessionLocal
-from models import Base
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import OperationalError
+from database import engine, ReadSessionLocal
+from models import Base, DERIVED_SOURCES, derived_columns
+from ledger import rebuild_ledger
 import logging
 
 logger = logging.getLogger(__name__)
 
-def get_table_columns(table_name: str) -> set:
+# Columns added to existing tables since the first release (migration 1)
+ADDED_COLUMNS = {
+    'seller_mapping': {
+        'id': 'INTEGER',
+        'supplier_id': 'INTEGER',
+        'gstin': 'VARCHAR',
+        'supplier_name': 'VARCHAR',
+        'last_updated': 'DATETIME',
+    },
+    'meesho_invoices': {
+        'gstin': 'VARCHAR',
+    },
+    'meesho_sales': {
+        'row_hash': 'VARCHAR',
+    },
+    'meesho_returns': {
+        'row_hash': 'VARCHAR',
+    },
+    'flipkart_orders': {
+        'seller_gstin': 'VARCHAR',
+        'row_hash': 'VARCHAR',
+    },
+    'flipkart_returns': {
+        'seller_gstin': 'VARCHAR',
+        'row_hash': 'VARCHAR',
+    },
+    'amazon_orders': {
+        'seller_gstin': 'VARCHAR',
+        'row_hash': 'VARCHAR',
+    },
+    'amazon_returns': {
+        'seller_gstin': 'VARCHAR',
+        'row_hash': 'VARCHAR',
+    },
+    'import_manifest': {
+        'sha256': 'VARCHAR',
+        'file_name': 'VARCHAR',
+        'file_size': 'INTEGER',
+        'report_type': 'VARCHAR',
+        'marketplace': 'VARCHAR',
+        'gstin': 'VARCHAR',
+        'financial_year': 'INTEGER',
+        'month_number': 'INTEGER',
+        'rows_imported': 'INTEGER',
+        'duration_seconds': 'FLOAT',
+        'imported_at': 'DATETIME',
+    },
+}
+
+
+def get_table_columns(conn, table_name: str) -> set:
     """Get list of column names for a table"""
-    inspector = inspect(engine)
+    inspector = inspect(conn)
     if not inspector.has_table(table_name):
         return set()
-    columns = inspector.get_columns(table_name)
-    return {col['name'] for col in columns}
+    return {col['name'] for col in inspector.get_columns(table_name)}
+
+
+def get_index_names(conn, table_name: str) -> set:
+    return {idx['name'] for idx in inspect(conn).get_indexes(table_name)}
+
+
+def get_schema_version(conn) -> int:
+    """Highest applied migration; 0 for a database without schema_version"""
+    try:
+        return conn.execute(text('SELECT MAX(version) FROM schema_version')).scalar() or 0
+    except OperationalError:
+        conn.rollback()
+        return 0
+
+
+def _add_missing_columns(conn, messages):
+    for table_name, columns in ADDED_COLUMNS.items():
+        existing_cols = get_table_columns(conn, table_name)
+        for col_name, col_type in columns.items():
+            if col_name not in existing_cols:
+                conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type}'))
+                messages.append(f"✅ Added column: {table_name}.{col_name}")
+
+
+def _index_seller_gstin(conn, messages):
+    for table_name in ('flipkart_orders', 'flipkart_returns', 'amazon_orders', 'amazon_returns'):
+        index_name = f'ix_{table_name}_seller_gstin'
+        if index_name not in get_index_names(conn, table_name):
+            conn.execute(text(f'CREATE INDEX {index_name} ON {table_name} (seller_gstin)'))
+            messages.append(f"✅ Created index: {index_name}")
+
+
+# Unique natural-key indexes as migration 3 created them
+_UNIQUE_INDEXES_V3 = [
+    ("uq_amazon_orders_order_shipment_item", "amazon_orders", ("order_id", "shipment_item_id")),
+    ("uq_amazon_returns_order_shipment_item", "amazon_returns", ("order_id", "shipment_item_id")),
+]
+
+
+def _add_unique_indexes(conn, messages):
+    """Create the missing ones of _UNIQUE_INDEXES_V3; duplicate rows are removed first."""
+    for index_name, table_name, columns in _UNIQUE_INDEXES_V3:
+        if index_name in get_index_names(conn, table_name):
+            continue
+
+        key_cols = ", ".join(columns)
+        # Keep the earliest imported copy of each key
+        removed = conn.execute(text(
+            f'DELETE FROM {table_name} WHERE id NOT IN '
+            f'(SELECT MIN(id) FROM {table_name} GROUP BY {key_cols})'
+        )).rowcount
+        if removed:
+            messages.append(f"🧹 Removed {removed} duplicate rows from {table_name}")
+        conn.execute(text(f'CREATE UNIQUE INDEX {index_name} ON {table_name} ({key_cols})'))
+        messages.append(f"✅ Created index: {index_name}")
+
+
+def _create_indexes(conn, messages, indexes):
+    """Create the missing ones of ``indexes``: (name, table, columns)."""
+    for index_name, table_name, columns in indexes:
+        if index_name not in get_index_names(conn, table_name):
+            conn.execute(text(f'CREATE INDEX {index_name} ON {table_name} ({", ".join(columns)})'))
+            messages.append(f"✅ Created index: {index_name}")
+
+
+# Composite GSTR-1 report indexes as migration 4 created them; migration 5
+# replaces the order_date ones. Steps list their own indexes instead of
+# reading the models, whose definitions move on.
+_REPORT_INDEXES_V4 = [
+    ("ix_meesho_sales_period_supplier", "meesho_sales", ("financial_year", "month_number", "supplier_id")),
+    ("ix_meesho_sales_gstin_period", "meesho_sales", ("gstin", "financial_year", "month_number", "sub_order_num")),
+    ("ix_meesho_returns_period_supplier", "meesho_returns", ("financial_year", "month_number", "supplier_id")),
+    ("ix_meesho_returns_gstin_period", "meesho_returns", ("gstin", "financial_year", "month_number")),
+    ("ix_flipkart_orders_gstin_event_date", "flipkart_orders", ("seller_gstin", "event_type", "order_date")),
+    ("ix_flipkart_returns_gstin_date", "flipkart_returns", ("seller_gstin", "order_date")),
+    ("ix_amazon_orders_gstin_type_date", "amazon_orders",
+     ("seller_gstin", "transaction_type", "order_date", "customer_bill_to_gstid")),
+    ("ix_amazon_returns_gstin_date_type", "amazon_returns",
+     ("seller_gstin", "order_date", "transaction_type", "customer_bill_to_gstid")),
+]
+
+
+def _add_report_indexes(conn, messages):
+    _create_indexes(conn, messages, _REPORT_INDEXES_V4)
+
+
+DERIVED_COLUMNS = {
+    'financial_year': 'INTEGER',
+    'month_number': 'INTEGER',
+    'is_b2b': 'BOOLEAN',
+    'effective_gst_rate': 'FLOAT',
+    'pos_state_code': 'VARCHAR',
+}
+
+_PERIOD_INDEXES = [
+    ("ix_flipkart_orders_gstin_event_period", "flipkart_orders",
+     ("seller_gstin", "event_type", "financial_year", "month_number")),
+    ("ix_flipkart_returns_gstin_period", "flipkart_returns", ("seller_gstin", "financial_year", "month_number")),
+    ("ix_amazon_orders_gstin_type_period", "amazon_orders",
+     ("seller_gstin", "transaction_type", "financial_year", "month_number", "is_b2b")),
+    ("ix_amazon_returns_gstin_period_type", "amazon_returns",
+     ("seller_gstin", "financial_year", "month_number", "is_b2b", "transaction_type")),
+]
+
+BACKFILL_BATCH_SIZE = 50000  # rows read, derived and updated at a time
+
+
+def _backfill_derived_columns(conn, table_name: str) -> int:
+    """Compute models.derived_columns for every stored row of ``table_name``; returns the rows updated."""
+    table = Base.metadata.tables[table_name]
+    sources = [table.c.order_date, table.c.igst_rate, table.c.cgst_rate, table.c.sgst_rate]
+    sources += [table.c[name] for name in DERIVED_SOURCES[table_name] if name]
+    update = text(
+        f'UPDATE {table_name} SET '
+        + ", ".join(f'{name} = :{name}' for name in DERIVED_COLUMNS)
+        + ' WHERE id = :id'
+    )
+    updated, last_id = 0, 0
+    while True:
+        rows = conn.execute(
+            select(table.c.id, *sources).where(table.c.id > last_id).order_by(table.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return updated
+        columns = {column.name: [row[i + 1] for row in rows] for i, column in enumerate(sources)}
+        derived = derived_columns(table_name, columns)
+        conn.execute(update, [
+            {"id": row[0], **{name: values[i] for name, values in derived.items()}} for i, row in enumerate(rows)
+        ])
+        updated += len(rows)
+        last_id = rows[-1][0]
+
+
+def _add_derived_columns(conn, messages):
+    for table_name in DERIVED_SOURCES:
+        existing_cols = get_table_columns(conn, table_name)
+        for col_name, col_type in DERIVED_COLUMNS.items():
+            if col_name not in existing_cols:
+                conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type}'))
+                messages.append(f"✅ Added column: {table_name}.{col_name}")
+        backfilled = _backfill_derived_columns(conn, table_name)
+        if backfilled:
+            messages.append(f"✅ Derived columns filled in for {backfilled} {table_name} rows")
+    for index_name, _, columns in _REPORT_INDEXES_V4:
+        if 'order_date' in columns:  # superseded by the period indexes
+            conn.execute(text(f'DROP INDEX IF EXISTS {index_name}'))
+    _create_indexes(conn, messages, _PERIOD_INDEXES)
+
+
+def _fill_sales_ledger(conn, messages):
+    # create_all has made the (empty) table; rebuild_ledger starts from scratch, so a retry is safe
+    written = rebuild_ledger(conn)
+    if written:
+        messages.append(f"✅ Sales ledger filled in with {written} rows")
+
+
+def _null_b2c_ledger_buyer_gstins(conn, messages):
+    # Ledgers filled before the fix copied Amazon's '' / 'nan' placeholders as buyer GSTINs
+    cleared = conn.execute(text(
+        "UPDATE sales_ledger SET buyer_gstin = NULL WHERE buyer_gstin IN ('', 'nan')"
+    )).rowcount
+    if cleared:
+        messages.append(f"✅ Cleared the buyer GSTIN of {cleared} B2C sales ledger rows")
+
+
+# (version, description, step) - append only. Steps must be idempotent:
+# SQLite runs DDL outside a transaction unless a DML statement opened one,
+# and databases from before schema_version may already have the change.
+MIGRATIONS = [
+    (1, "Multi-seller and import manifest columns", _add_missing_columns),
+    (2, "seller_gstin indexes on Flipkart and Amazon tables", _index_seller_gstin),
+    (3, "Unique natural-key indexes (amazon_orders/returns order_id, shipment_item_id)", _add_unique_indexes),
+    (4, "Composite GSTR-1 report indexes", _add_report_indexes),
+    (5, "Derived period, B2B, rate and place-of-supply columns", _add_derived_columns),
+    (6, "Cross-marketplace sales ledger", _fill_sales_ledger),
+    (7, "NULL buyer GSTIN on B2C sales ledger rows", _null_b2c_ledger_buyer_gstins),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _record_version(conn, version: int, description: str):
+    conn.execute(
+        text('INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, CURRENT_TIMESTAMP)'),
+        {"v": version, "d": description},
+    )
 
-def get_table_names() -> set:
-    """Get list of all table names in database"""
-    inspector = inspect(engine)
-    return set(inspector.get_table_names())
 
 def auto_migrate():
     """
-    Automatically migrate database schema to match models.
-    - Creates missing tables
-    - Adds missing columns to existing tables
-    - Safe to run multiple times (idempotent)
+    Bring the database schema up to :data:`SCHEMA_VERSION`.
+    - A new database gets all tables from the models, stamped as current
+    - Otherwise missing tables are created and the pending MIGRATIONS run in order
+    - A failed step is rolled back and retried on the next start
     """
     messages = []
-    
+
     try:
-        # Get current database state
-        existing_tables = get_table_names()
-        
-        # Define expected schema with columns and types
-        expected_schema = {
-            'seller_mapping': {
-                'id': 'INTEGER',
-                'supplier_id': 'INTEGER',
-                'gstin': 'VARCHAR',
-                'supplier_name': 'VARCHAR',
-                'last_updated': 'DATETIME',
-            },
-            'flipkart_orders': {
-                'seller_gstin': 'VARCHAR',
-            },
-            'flipkart_returns': {
-                'seller_gstin': 'VARCHAR',
-            },
-            'amazon_orders': {
-                'seller_gstin': 'VARCHAR',
-            },
-            'amazon_returns': {
-                'seller_gstin': 'VARCHAR',
-            },
-        }
-        
-        # Step 1: Create all missing tables
-        if not existing_tables:
-            messages.append("📋 Creating all database tables...")
-            Base.metadata.create_all(engine)
-            messages.append("✅ All tables created")
-            return messages
-        
-        # Check if seller_mapping table exists, if not create all tables
-        if 'seller_mapping' not in existing_tables:
-            messages.append("📋 seller_mapping table missing - creating all tables...")
-            Base.metadata.create_all(engine)
-            messages.append("✅ All tables created")
-            return messages
-        
-        # Step 2: Add missing columns to existing tables
         with engine.connect() as conn:
-            for table_name, columns in expected_schema.items():
-                if table_name not in existing_tables:
-                    # Table doesn't exist, create it
-                    messages.append(f"📋 Creating missing table: {table_name}")
-                    # Use Base.metadata to create just this table
-                    table = Base.metadata.tables.get(table_name)
-                    if table is not None:
-                        table.create(engine, checkfirst=True)
-                        messages.append(f"✅ Created table: {table_name}")
+            version = get_schema_version(conn)
+            if version == SCHEMA_VERSION:
+                return ["✅ Database schema is up-to-date"]
+
+            existing_tables = set(inspect(conn).get_table_names())
+            Base.metadata.create_all(conn)
+            if not existing_tables:
+                messages.append("✅ All tables created")
+                for step_version, description, _ in MIGRATIONS:
+                    _record_version(conn, step_version, description)
+                conn.commit()
+                return messages
+
+            for table_name in sorted(set(Base.metadata.tables) - existing_tables):
+                messages.append(f"✅ Created table: {table_name}")
+            conn.commit()
+
+            for step_version, description, step in MIGRATIONS:
+                if step_version <= version:
                     continue
-                
-                # Check for missing columns
-                existing_cols = get_table_columns(table_name)
-                
-                for col_name, col_type in columns.items():
-                    if col_name not in existing_cols:
-                        messages.append(f"📋 Adding column {col_name} to {table_name}")
-                        try:
-                            # Add the column
-                            conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type}'))
-                            conn.commit()
-                            messages.append(f"✅ Added column: {table_name}.{col_name}")
-                        except Exception as e:
-                            messages.append(f"⚠️  Column {table_name}.{col_name} may already exist: {str(e)[:50]}")
-            
-            # Step 3: Create indexes for seller_gstin columns
-            try:
-                # Check if indexes exist, create if missing
-                inspector = inspect(engine)
-                
-                tables_needing_index = [
-                    'flipkart_orders', 'flipkart_returns',
-                    'amazon_orders', 'amazon_returns'
-                ]
-                
-                for table_name in tables_needing_index:
-                    if table_name not in existing_tables:
-                        continue
-                    
-                    indexes = inspector.get_indexes(table_name)
-                    index_names = {idx['name'] for idx in indexes}
-                    index_name = f'ix_{table_name}_seller_gstin'
-                    
-                    if index_name not in index_names:
-                        messages.append(f"📋 Creating index on {table_name}.seller_gstin")
-                        try:
-                            conn.execute(text(f'CREATE INDEX {index_name} ON {table_name} (seller_gstin)'))
-                            conn.commit()
-                            messages.append(f"✅ Created index: {index_name}")
-                        except Exception:
-                            messages.append(f"Index {index_name} may already exist")
-            
-            except Exception as e:
-                messages.append(f"⚠️  Index creation: {str(e)[:50]}")
-        
-        if not messages:
-            messages.append("✅ Database schema is up-to-date")
-        
+                messages.append(f"📋 Migration {step_version}: {description}")
+                try:
+                    step(conn, messages)
+                    _record_version(conn, step_version, description)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    messages.append(f"⚠️  Migration {step_version} failed (retried on next start): {str(e)[:80]}")
+                    logger.error(f"Migration {step_version} failed: {e}", exc_info=True)
+                    break
+
         return messages
-        
+
     except Exception as e:
         messages.append(f"❌ Migration error: {str(e)}")
         logger.error(f"Auto-migration failed: {e}", exc_info=True)
@@ -145,8 +314,8 @@ def verify_multi_seller_setup() -> list:
     Returns list of status messages.
     """
     messages = []
-    
-    db = SessionLocal()
+
+    db = ReadSessionLocal()
     try:
         # Check if seller_mapping table exists and has data
         from models import SellerMapping
@@ -160,20 +329,20 @@ def verify_multi_seller_setup() -> list:
         messages.append(f"Verification error: {str(e)[:50]}")
     finally:
         db.close()
-    
+
     return messages
 
 if __name__ == "__main__":
     print("=== RUNNING DATABASE AUTO-MIGRATION ===\n")
-    
+
     migration_msgs = auto_migrate()
     for msg in migration_msgs:
         print(msg)
-    
+
     print("\n=== VERIFYING MULTI-SELLER SETUP ===\n")
-    
+
     verify_msgs = verify_multi_seller_setup()
     for msg in verify_msgs:
         print(msg)
-    
+
     print("\n=== MIGRATION COMPLETE ===")
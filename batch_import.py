@@ -0,0 +1,298 @@
+"""
+Batch import of a whole month folder.
+
+Every marketplace file under a directory is identified with the existing
+``validate_*`` functions, parsed in parallel in a process pool, and written
+by a single writer - the caller's session - in a fixed order:
+
+1. Meesho GST Reports (invoices look up their seller GSTIN in meesho_sales)
+2. Meesho Tax Invoices
+3. Flipkart GST Report, then the Flipkart Sales Report from the same folder
+4. Amazon MTR (B2B/B2C) and GSTR-1 reports
+
+Worker processes only parse; they never open the database, so SQLite sees
+one writer. Amazon MTR CSVs are not parsed in the pool: the writer streams
+them chunk by chunk, so an annual MTR dump is never held in memory. Files are handed to the pool a few at a time so parsed frames
+do not pile up in memory while the writer catches up. Files already in the
+import manifest are not parsed at all (unless ``force`` is set).
+"""
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy.orm import Session
+
+from excel_reader import close_workbook
+from import_manifest import file_sha256, find_import
+from import_progress import ProgressReporter
+from import_logic import (
+    validate_meesho_tax_invoice_zip, validate_invoices_zip,
+    validate_flipkart_sales_excel, validate_flipkart_gst_excel, validate_amazon_zip,
+    read_meesho_zip, read_invoice_zip, read_flipkart_sales,
+    import_from_zip, import_invoice_data, import_flipkart_sales, import_flipkart_b2c,
+    import_amazon_mtr, import_amazon_gstr1,
+)
+
+BATCH_EXTENSIONS = ('.zip', '.xlsx', '.xls')
+
+
+def _zip_has(filepath: str, predicate) -> bool:
+    with zipfile.ZipFile(filepath, 'r') as zip_ref:
+        return any(predicate(name.lower()) for name in zip_ref.namelist())
+
+
+def _is_meesho_invoices(filepath: str) -> bool:
+    return (validate_invoices_zip(filepath)[0]
+            and _zip_has(filepath, lambda f: 'tax_invoice_details' in f and f.endswith('.xlsx')))
+
+
+def _is_amazon_mtr(filepath: str) -> bool:
+    return _zip_has(filepath, lambda f: f.endswith('.csv')) and validate_amazon_zip(filepath, "MTR")[0]
+
+
+def _is_amazon_gstr1(filepath: str) -> bool:
+    return validate_amazon_zip(filepath, "GSTR1")[0] and _zip_has(filepath, lambda f: f.endswith('.xlsx'))
+
+
+# (kind, label, recogniser) - tried in order, first match wins. The validators
+# are lenient (validate_invoices_zip accepts any non-empty ZIP), so the ZIP
+# kinds also check for the member their importer reads.
+FILE_KINDS = [
+    ("meesho_gst", "Meesho GST Report", lambda f: validate_meesho_tax_invoice_zip(f)[0]),
+    ("meesho_invoices", "Meesho Tax Invoice", _is_meesho_invoices),
+    ("amazon_mtr", "Amazon MTR", _is_amazon_mtr),
+    ("amazon_gstr1", "Amazon GSTR-1", _is_amazon_gstr1),
+    ("flipkart_sales", "Flipkart Sales", lambda f: validate_flipkart_sales_excel(f)[0]),
+    ("flipkart_gst", "Flipkart GST", lambda f: validate_flipkart_gst_excel(f)[0]),
+]
+_KIND_LABELS = {kind: label for kind, label, _ in FILE_KINDS}
+
+# Parse step run in the pool; kinds without one are cheap, or (Amazon MTR)
+# streamed from the file, and run in the writer
+_READERS = {
+    "meesho_gst": read_meesho_zip,
+    "meesho_invoices": read_invoice_zip,
+    "flipkart_sales": read_flipkart_sales,
+}
+
+# Write step: (filepath, db, parsed or None, force, progress) -> messages
+_WRITERS = {
+    "meesho_gst": lambda f, db, parsed, force, progress: import_from_zip(
+        f, db, parsed=parsed, force=force, progress=progress),
+    "meesho_invoices": lambda f, db, parsed, force, progress: import_invoice_data(
+        f, db, df=parsed, force=force, progress=progress),
+    "flipkart_gst": lambda f, db, parsed, force, progress: import_flipkart_b2c(
+        f, db, force=force, progress=progress),
+    "flipkart_sales": lambda f, db, parsed, force, progress: import_flipkart_sales(
+        f, db, df=parsed, force=force, progress=progress),
+    "amazon_mtr": lambda f, db, parsed, force, progress: import_amazon_mtr(
+        f, db, force=force, progress=progress),
+    "amazon_gstr1": lambda f, db, parsed, force, progress: import_amazon_gstr1(
+        f, db, force=force, progress=progress),
+}
+
+_WRITE_ORDER = ["meesho_gst", "meesho_invoices", "flipkart_gst", "flipkart_sales", "amazon_mtr", "amazon_gstr1"]
+
+
+def find_import_files(directory: str) -> list:
+    """Marketplace files (.zip/.xlsx/.xls) under ``directory``, recursively, sorted."""
+    found = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(BATCH_EXTENSIONS) and not name.startswith('~$'):  # skip Excel lock files
+                found.append(os.path.join(root, name))
+    return sorted(found)
+
+
+def classify_file(filepath: str) -> str | None:
+    """The first :data:`FILE_KINDS` kind whose check accepts ``filepath``, or None."""
+    try:
+        for kind, _, accepts in FILE_KINDS:
+            if accepts(filepath):
+                return kind
+        return None
+    finally:
+        close_workbook(filepath)  # the workers parse the file themselves
+
+
+def _classify_job(filepath: str) -> tuple:
+    """Worker process: ``(kind, sha256)``, both None for an unrecognised file."""
+    kind = classify_file(filepath)
+    return kind, file_sha256(filepath) if kind else None
+
+
+def _parse_job(kind: str, filepath: str) -> tuple:
+    """Worker process: run the kind's parse step; returns (parsed, seconds)."""
+    started = time.perf_counter()
+    parsed = _READERS[kind](filepath)
+    return parsed, time.perf_counter() - started
+
+
+def _write_order(entry) -> tuple:
+    """Sort key: kind order; Flipkart GST and Sales reports grouped by folder."""
+    filepath, kind = entry
+    if kind in ("flipkart_gst", "flipkart_sales"):
+        return (_WRITE_ORDER.index("flipkart_gst"), os.path.dirname(filepath), _WRITE_ORDER.index(kind), filepath)
+    return (_WRITE_ORDER.index(kind), "", 0, filepath)
+
+
+def _flipkart_sales_blocked(filepath: str, gst_reports: dict, gstin_folders: set) -> str | None:
+    """
+    Why a Flipkart Sales Report must not be imported in this batch, or None.
+
+    The Sales Report has no GSTIN; import_flipkart_sales takes it from the
+    last imported GST Report. In a batch that is only safe when the same
+    folder holds exactly one Flipkart GST Report and it yielded a GSTIN.
+    """
+    folder = os.path.dirname(filepath)
+    count = gst_reports.get(folder, 0)
+    if count == 0:
+        return "❌ IMPORT BLOCKED: no Flipkart GST Report in the same folder (needed for the seller GSTIN)"
+    if count > 1:
+        return "❌ IMPORT BLOCKED: several Flipkart GST Reports in the same folder - seller GSTIN is ambiguous"
+    if folder not in gstin_folders:
+        return "❌ IMPORT BLOCKED: the Flipkart GST Report in this folder has no seller GSTIN"
+    return None
+
+
+def run_batch(paths: list, db: Session, workers: int = None, force: bool = False,
+              progress: ProgressReporter = None) -> list:
+    """
+    Classify, parse (in parallel) and import ``paths``.
+
+    Args:
+        paths: Files to import
+        db: Session used for every write (the single writer)
+        workers: Worker processes; defaults to the CPU count
+        force: Re-import files that are already in the import manifest
+        progress: Passed to every importer; once its token is cancelled the
+            current file is rolled back and the remaining files are skipped
+
+    Returns:
+        One summary dict per file, in write order (unrecognised files last):
+        ``{"path", "kind", "status", "parse_seconds", "write_seconds", "messages"}``
+        with status ``"imported"``, ``"failed"`` or ``"skipped"``.
+    """
+    workers = workers or os.cpu_count() or 1
+    summaries = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        classified = list(pool.map(_classify_job, paths))
+        plan = sorted(((path, kind) for path, (kind, _) in zip(paths, classified) if kind), key=_write_order)
+        already_imported = set()
+        for path, (kind, sha256) in zip(paths, classified):
+            if kind is None:
+                summaries.append(_summary(path, None, "skipped", messages=["⏭️ Not a recognised marketplace file"]))
+            elif not force and find_import(db, sha256, kind) is not None:
+                already_imported.add(path)  # the importer returns at once; nothing to parse
+
+        gst_reports = {}
+        for path, kind in plan:
+            if kind == "flipkart_gst":
+                folder = os.path.dirname(path)
+                gst_reports[folder] = gst_reports.get(folder, 0) + 1
+        gstin_folders = set()
+
+        # Keep at most 2x workers parsed files in flight ahead of the writer
+        pending = {}
+        ahead = 0
+
+        def submit_until(limit):
+            nonlocal ahead
+            while ahead < len(plan) and ahead < limit:
+                path, kind = plan[ahead]
+                if kind in _READERS and path not in already_imported:
+                    pending[ahead] = pool.submit(_parse_job, kind, path)
+                ahead += 1
+
+        written = []
+        for index, (path, kind) in enumerate(plan):
+            submit_until(index + 2 * workers)
+            parsed, parse_seconds = None, 0.0
+            future = pending.pop(index, None)
+
+            if progress is not None and progress.cancelled:
+                if future is not None:
+                    future.cancel()
+                written.append(_summary(path, kind, "skipped", messages=["⏹️ Batch cancelled before this file"]))
+                continue
+
+            if kind == "flipkart_sales":
+                blocked = _flipkart_sales_blocked(path, gst_reports, gstin_folders)
+                if blocked:
+                    if future is not None:
+                        future.cancel()
+                    written.append(_summary(path, kind, "failed", messages=[blocked]))
+                    continue
+
+            if future is not None:
+                try:
+                    parsed, parse_seconds = future.result()
+                except Exception as e:
+                    written.append(_summary(path, kind, "failed", messages=[f"❌ Error reading file: {e}"]))
+                    continue
+
+            started = time.perf_counter()
+            try:
+                messages = _WRITERS[kind](path, db, parsed, force, progress)
+            except Exception as e:
+                db.rollback()
+                messages = [f"❌ Import failed: {e}"]
+            write_seconds = time.perf_counter() - started
+            parsed = None  # release the frames before the next file
+
+            if kind == "flipkart_gst" and any(m.startswith("✅ Seller GSTIN extracted") for m in messages):
+                gstin_folders.add(os.path.dirname(path))
+            if any(m.lstrip().startswith("❌") for m in messages):
+                status = "failed"
+            elif messages and messages[0].startswith("⏭️"):
+                status = "skipped"  # already in the import manifest
+            else:
+                status = "imported"
+            written.append(_summary(path, kind, status, parse_seconds, write_seconds, messages))
+
+    return written + summaries
+
+
+def _summary(path, kind, status, parse_seconds=0.0, write_seconds=0.0, messages=None) -> dict:
+    return {
+        "path": path,
+        "kind": kind,
+        "status": status,
+        "parse_seconds": parse_seconds,
+        "write_seconds": write_seconds,
+        "messages": messages or [],
+    }
+
+
+def import_directory(directory: str, db: Session, workers: int = None, force: bool = False,
+                     progress: ProgressReporter = None) -> list:
+    """
+    Import every marketplace file under ``directory`` (see module docstring).
+    ``force`` re-imports files that are already in the import manifest;
+    ``progress`` reports rows and can cancel the batch (see :func:`run_batch`).
+    Returns a list of status messages: one summary block per file, then totals.
+    """
+    started = time.perf_counter()
+    paths = find_import_files(directory)
+    if not paths:
+        return [f"⚠️ No .zip or Excel files found in {directory}"]
+
+    summaries = run_batch(paths, db, workers, force, progress)
+    messages = []
+    for summary in summaries:
+        icon = {"imported": "✅", "failed": "❌", "skipped": "⏭️"}[summary["status"]]
+        label = _KIND_LABELS.get(summary["kind"], "Unknown")
+        name = os.path.relpath(summary["path"], directory)
+        messages.append(
+            f"{icon} {name} [{label}] parse {summary['parse_seconds']:.2f}s, write {summary['write_seconds']:.2f}s"
+        )
+        messages.extend(f"    {line}" if line else "" for line in "\n".join(summary["messages"]).splitlines())
+
+    counts = {status: sum(s["status"] == status for s in summaries) for status in ("imported", "failed", "skipped")}
+    messages.append(
+        f"\n📊 {len(summaries)} files: {counts['imported']} imported, {counts['failed']} failed, "
+        f"{counts['skipped']} skipped in {time.perf_counter() - started:.2f}s"
+    )
+    return messages
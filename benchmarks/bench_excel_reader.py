@@ -0,0 +1,95 @@
+"""
+Benchmark: pd.read_excel vs excel_reader.read_sheet on the workbooks in sample/.
+
+Usage:
+    python benchmarks/bench_excel_reader.py [--repeat N]
+
+For each data sheet the importers read, times the current pandas path, the
+streaming reader over the whole sheet, and the streaming reader limited to the
+columns the importer uses. Peak Python memory is measured with tracemalloc.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd  # noqa: E402
+
+from excel_reader import default_engine, read_sheet  # noqa: E402
+from import_logic import (  # noqa: E402
+    _FLIPKART_SALES_COLUMNS, _MEESHO_SOURCE_COLUMNS, _clean_flipkart_header,
+)
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', 'sample')
+
+
+def _cases():
+    """(label, source factory, sheet, usecols) for every importable sheet in sample/."""
+    for name in sorted(os.listdir(SAMPLE_DIR)):
+        path = os.path.join(SAMPLE_DIR, name)
+        if name.endswith('.zip'):
+            with zipfile.ZipFile(path) as zf:
+                for member in zf.namelist():
+                    if member.lower().endswith(('tcs_sales.xlsx', 'tcs_sales_return.xlsx')):
+                        data = zf.read(member)  # read once; each run parses a fresh buffer
+                        yield (f"{name}:{member}", lambda data=data, member=member: _buffer(data, member),
+                               0, _MEESHO_SOURCE_COLUMNS)
+        elif name.endswith('.xlsx'):
+            sheets = pd.ExcelFile(path).sheet_names
+            if 'Sales Report' in sheets:
+                yield (f"{name}:Sales Report", lambda path=path: path, 'Sales Report',
+                       lambda header: _clean_flipkart_header(header) in _FLIPKART_SALES_COLUMNS)
+
+
+def _buffer(data, member):
+    """Fresh named in-memory copy of a ZIP member, as read_member returns."""
+    buffer = io.BytesIO(data)
+    buffer.name = os.path.basename(member)
+    return buffer
+
+
+def _measure(fn, repeat):
+    """Rows, best wall time over ``repeat`` runs, and peak traced memory of one extra run."""
+    best = float('inf')
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = len(fn())
+        best = min(best, time.perf_counter() - started)
+
+    # tracemalloc slows allocation-heavy code, so memory gets its own run
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case (best time is reported)')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore', module='openpyxl')
+
+    print(f"streaming engine: {default_engine()}")
+    print(f"{'sheet':<70} {'method':<22} {'rows':>7} {'seconds':>8} {'rows/sec':>10} {'peak MB':>8}")
+    for label, source, sheet, usecols in _cases():
+        methods = [
+            ("pd.read_excel", lambda: pd.read_excel(source(), sheet_name=sheet)),
+            ("read_sheet (all)", lambda: read_sheet(source(), sheet_name=sheet)),
+            ("read_sheet (usecols)", lambda: read_sheet(source(), sheet_name=sheet, usecols=usecols)),
+        ]
+        for method, fn in methods:
+            rows, seconds, peak = _measure(fn, args.repeat)
+            rate = rows / seconds if seconds else 0.0
+            print(f"{label[-70:]:<70} {method:<22} {rows:>7,} {seconds:>8.3f} {rate:>10,.0f} {peak / 2**20:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: every import_logic entry point on synthetic reports of growing size.
+
+Usage:
+    python benchmarks/bench_imports.py [--rows 1000 10000 100000 ...] [--kinds KIND ...]
+                                       [--repeat N] [--no-memory] [--json FILE] [--keep DIR]
+
+For each size, benchmarks/synthetic_data.py writes one month of reports into a
+scratch folder; each is then imported into a fresh SQLite file (as the app's
+database is) and timed end to end: read, transform and write. Peak Python
+memory is measured with tracemalloc in a separate run. ``--json`` appends the
+results so runs before and after a change can be compared.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import import_logic  # noqa: E402
+import models  # noqa: E402,F401 - register tables
+from database import Base, enable_savepoints  # noqa: E402
+from scratch import scratch_dir  # noqa: E402
+from synthetic_data import GENERATORS, generate_month  # noqa: E402
+
+# kind -> the entry point the GUI's import button calls
+ENTRY_POINTS = {
+    "meesho_gst": import_logic.import_from_zip,
+    "flipkart_gst": import_logic.import_flipkart_b2c,
+    "flipkart_sales": import_logic.import_flipkart_sales,
+    "amazon_mtr": import_logic.import_amazon_mtr,
+}
+
+
+def _fresh_session(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    enable_savepoints(engine)
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine)()
+
+
+def _import_once(kind: str, files: dict, folder: str, traced: bool = False) -> tuple:
+    """Import ``files[kind]`` into a new database; returns (seconds, peak traced bytes)."""
+    engine, db = _fresh_session(os.path.join(folder, "bench.db"))
+    # The GST Report import saves its GSTIN to a file; keep the app's own one untouched
+    gstin_file = import_logic._TEMP_GSTIN_FILE
+    import_logic._TEMP_GSTIN_FILE = os.path.join(folder, "temp_flipkart_gstin.json")
+    try:
+        if kind == "flipkart_sales":
+            # The Sales Report import takes the seller GSTIN from the GST Report import
+            import_logic.import_flipkart_b2c(files["flipkart_gst"][0], db)
+        if traced:
+            tracemalloc.start()
+        started = time.perf_counter()
+        messages = ENTRY_POINTS[kind](files[kind][0], db)
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if traced else 0
+        failed = [m for m in messages if m.startswith("❌")]
+        if failed:
+            raise RuntimeError(f"{kind} import failed: {failed[0]}")
+        return seconds, peak
+    finally:
+        if traced:
+            tracemalloc.stop()
+        import_logic._TEMP_GSTIN_FILE = gstin_file
+        db.close()
+        engine.dispose()
+
+
+def run_benchmarks(sizes: list, kinds: list = None, repeat: int = 1, memory: bool = True, keep: str = None):
+    """
+    Yield one result dict per size x kind: ``{"kind", "rows", "file_mb",
+    "seconds", "rows_per_sec", "peak_mb"}`` (best time of ``repeat`` runs;
+    ``peak_mb`` is None without ``memory``).
+    """
+    kinds = kinds or list(GENERATORS)
+    needed = set(kinds) | ({"flipkart_gst"} if "flipkart_sales" in kinds else set())
+    for rows in sizes:
+        with scratch_dir("bench_imports_") as scratch:
+            folder = os.path.join(keep, f"rows_{rows}") if keep else scratch
+            files = generate_month(folder, rows, [kind for kind in GENERATORS if kind in needed])
+            for kind in kinds:
+                seconds = min(_import_once(kind, files, scratch)[0] for _ in range(repeat))
+                peak = _import_once(kind, files, scratch, traced=True)[1] if memory else None
+                path, data_rows = files[kind]
+                yield {
+                    "kind": kind,
+                    "rows": data_rows,
+                    "file_mb": os.path.getsize(path) / 2**20,
+                    "seconds": seconds,
+                    "rows_per_sec": data_rows / seconds if seconds else 0.0,
+                    "peak_mb": peak / 2**20 if memory else None,
+                }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help='report sizes in data rows (default: 1,000 10,000 100,000; up to 1,000,000)')
+    parser.add_argument('--kinds', nargs='+', choices=list(ENTRY_POINTS), help='reports to import (default: all)')
+    parser.add_argument('--repeat', type=int, default=1, help='timed runs per case (best time is reported)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run (halves the run time)')
+    parser.add_argument('--json', help='append the results to this JSON-lines file')
+    parser.add_argument('--keep', help='write the generated reports here instead of a scratch folder')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore', module='openpyxl')
+
+    print(f"{'report':<16} {'rows':>10} {'file MB':>8} {'seconds':>8} {'rows/sec':>10} {'peak MB':>8}")
+    for result in run_benchmarks(args.rows, args.kinds, args.repeat, not args.no_memory, args.keep):
+        peak = f"{result['peak_mb']:>8.1f}" if result['peak_mb'] is not None else f"{'-':>8}"
+        print(f"{result['kind']:<16} {result['rows']:>10,} {result['file_mb']:>8.1f} {result['seconds']:>8.3f} "
+              f"{result['rows_per_sec']:>10,.0f} {peak}", flush=True)
+        if args.json:
+            with open(args.json, 'a') as f:
+                f.write(json.dumps({**result, "recorded": time.strftime("%Y-%m-%dT%H:%M:%S")}) + "\n")
+
+
+if __name__ == '__main__':
+    main()
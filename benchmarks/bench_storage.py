@@ -0,0 +1,140 @@
+"""
+Benchmark: SQLite storage profile (WAL + pragmas + read-only pool) vs a bare engine.
+
+Usage:
+    python benchmarks/bench_storage.py [--rows 100000 ...] [--kinds KIND ...] [--read-interval MS]
+
+Imports synthetic reports (benchmarks/synthetic_data.py) into a fresh SQLite
+file twice: with a bare ``create_engine`` (rollback journal, synchronous=FULL,
+default cache) as database.py used to build it, and with
+:func:`database.make_engine`. While each import runs, a second thread keeps
+querying the table being written - as a report export started during an
+import would - and records how long each read took and how many failed
+with "database is locked".
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import import_logic  # noqa: E402
+import models  # noqa: E402,F401 - register tables
+from database import Base, enable_savepoints, make_engine  # noqa: E402
+from scratch import scratch_dir  # noqa: E402
+from synthetic_data import generate_month  # noqa: E402
+
+# kind -> (entry point, table the concurrent reader queries)
+IMPORTS = {
+    "meesho_gst": (import_logic.import_from_zip, "meesho_sales"),
+    "flipkart_sales": (import_logic.import_flipkart_sales, "flipkart_orders"),
+    "amazon_mtr": (import_logic.import_amazon_mtr, "amazon_orders"),
+}
+
+
+def _bare_engines(url: str) -> tuple:
+    """Writer and reader as before the storage profile: one bare engine for both."""
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    enable_savepoints(engine)
+    return engine, engine
+
+
+def _profile_engines(url: str) -> tuple:
+    return make_engine(url), make_engine(url, read_only=True)
+
+
+PROFILES = {"bare": _bare_engines, "storage profile": _profile_engines}
+
+
+class _Reader(threading.Thread):
+    """Query ``table`` on ``engine`` every ``interval`` seconds until stopped."""
+
+    def __init__(self, engine, table: str, interval: float):
+        super().__init__(daemon=True)
+        self.engine, self.table, self.interval = engine, table, interval
+        self.stopped = threading.Event()
+        self.latencies, self.locked = [], 0
+
+    def run(self):
+        query = text(f"SELECT COUNT(*), SUM(quantity) FROM {self.table}")
+        while not self.stopped.wait(self.interval):
+            started = time.perf_counter()
+            try:
+                with self.engine.connect() as conn:
+                    conn.execute(query).fetchall()
+            except OperationalError:
+                self.locked += 1
+            else:
+                self.latencies.append(time.perf_counter() - started)
+
+
+def _run(kind: str, files: dict, folder: str, make_engines, interval: float) -> dict:
+    path = os.path.join(folder, "bench.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    writer, reader_engine = make_engines(f"sqlite:///{path}")
+    Base.metadata.create_all(writer)
+    db = sessionmaker(bind=writer)()
+    gstin_file = import_logic._TEMP_GSTIN_FILE
+    import_logic._TEMP_GSTIN_FILE = os.path.join(folder, "temp_flipkart_gstin.json")
+    entry_point, table = IMPORTS[kind]
+    reader = _Reader(reader_engine, table, interval)
+    try:
+        if kind == "flipkart_sales":
+            import_logic.import_flipkart_b2c(files["flipkart_gst"][0], db)
+        reader.start()
+        started = time.perf_counter()
+        entry_point(files[kind][0], db)
+        seconds = time.perf_counter() - started
+    finally:
+        reader.stopped.set()
+        reader.join()
+        import_logic._TEMP_GSTIN_FILE = gstin_file
+        db.close()
+        writer.dispose()
+        reader_engine.dispose()
+    latencies = sorted(reader.latencies) or [0.0]
+    return {
+        "seconds": seconds,
+        "reads": len(reader.latencies),
+        "locked": reader.locked,
+        "max_read_ms": latencies[-1] * 1000,
+        "p95_read_ms": latencies[int(len(latencies) * 0.95)] * 1000 if reader.latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000], help='report sizes in data rows')
+    parser.add_argument('--kinds', nargs='+', choices=list(IMPORTS), default=list(IMPORTS),
+                        help='imports to run (default: all that write rows)')
+    parser.add_argument('--read-interval', type=float, default=50, help='ms between concurrent reads (default: 50)')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore', module='openpyxl')
+
+    print(f"{'report':<16} {'profile':<16} {'rows':>9} {'seconds':>8} {'rows/sec':>9} "
+          f"{'reads':>6} {'locked':>6} {'p95 ms':>8} {'max ms':>8}")
+    for rows in args.rows:
+        with scratch_dir("bench_storage_") as folder:
+            kinds = sorted(set(args.kinds) | ({"flipkart_gst"} if "flipkart_sales" in args.kinds else set()))
+            files = generate_month(folder, rows, kinds)
+            for kind in args.kinds:
+                data_rows = files[kind][1]
+                for profile, make_engines in PROFILES.items():
+                    r = _run(kind, files, folder, make_engines, args.read_interval / 1000)
+                    print(f"{kind:<16} {profile:<16} {data_rows:>9,} {r['seconds']:>8.2f} "
+                          f"{data_rows / r['seconds']:>9,.0f} {r['reads']:>6} {r['locked']:>6} "
+                          f"{r['p95_read_ms']:>8.1f} {r['max_read_ms']:>8.1f}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,584 @@
+"""
+Synthetic marketplace reports for import benchmarks.
+
+Usage:
+    python benchmarks/synthetic_data.py OUTPUT_DIR [--rows N] [--kinds KIND ...]
+                                        [--fy 2026] [--month 1] [--seed 0]
+
+Writes one month of each report the importers accept, laid out like the real
+downloads in sample/ (same file names, sheets, headers and cell formats):
+
+    meesho_gst       gst_<supplier>_<month>_<year>.zip  (tcs_sales.xlsx + tcs_sales_return.xlsx)
+    flipkart_gst     Flipkart GSTR-1 workbook (Section ... in GSTR-1 sheets)
+    flipkart_sales   Flipkart Sales Report workbook (Sales Report + Cash Back Report)
+    amazon_mtr       b2cReport_<Month>_<year>.zip  (MTR B2C CSV)
+
+``--rows`` is the number of data rows per report (1,000 to 1,000,000; an
+Excel sheet holds at most 1,048,575). Rows are built with numpy a chunk at a
+time and streamed to disk; only the Flipkart workbooks' shared-strings table
+grows with the size. The same seed always produces the same files.
+"""
+import argparse
+import calendar
+import io
+import os
+import sys
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from constants import STATE_CODE_MAPPING, fy_month_to_date_range  # noqa: E402
+
+CHUNK_ROWS = 50_000
+MAX_SHEET_ROWS = 1_048_575
+
+MEESHO_GSTIN = "29ABCDE1234F1Z5"
+FLIPKART_GSTIN = "06ABCDE1234F1Z6"
+AMAZON_GSTIN = "06AAICA1234B1Z5"
+
+# ISO 3166-2:IN suffixes, as Flipkart prints them ("IN-HR"), by GST state code
+_ISO_CODES = {
+    "01": "JK", "02": "HP", "03": "PB", "04": "CH", "05": "UT", "06": "HR", "07": "DL", "08": "RJ",
+    "09": "UP", "10": "BR", "11": "SK", "12": "AR", "13": "NL", "14": "MN", "15": "MZ", "16": "TR",
+    "17": "ML", "18": "AS", "19": "WB", "20": "JH", "21": "OR", "22": "CT", "23": "MP", "24": "GJ",
+    "26": "DH", "27": "MH", "29": "KA", "30": "GA", "31": "LD", "32": "KL", "33": "TN", "34": "PY",
+    "35": "AN", "36": "TG", "37": "AP", "38": "LA",
+}
+
+# (upper-case name, title-case name, GST code) for every state, first spelling only
+_STATES = []
+for _upper, _label in STATE_CODE_MAPPING.items():
+    _code, _title = _label.split("-", 1)
+    if _code in _ISO_CODES and all(code != _code for _, _, code in _STATES):
+        _STATES.append((_upper, _title, _code))
+
+# Orders are concentrated in the big states, as in real reports
+_STATE_WEIGHTS = 1.0 / np.arange(1, len(_STATES) + 1)
+_STATE_WEIGHTS /= _STATE_WEIGHTS.sum()
+
+# (HSN code, GST rate %) of a small catalogue; a few products sell most
+_PRODUCTS = [
+    (61161000, 5.0), (64069090, 5.0), (39239090, 18.0), (39199090, 18.0), (9020, 5.0),
+    (401490, 18.0), (42022290, 18.0), (63079090, 5.0), (61091000, 5.0), (73239990, 12.0),
+    (85176290, 18.0), (96032100, 18.0), (33049990, 18.0), (48201090, 12.0), (62114290, 5.0),
+]
+_PRODUCT_WEIGHTS = 1.0 / np.arange(1, len(_PRODUCTS) + 1) ** 0.7
+_PRODUCT_WEIGHTS /= _PRODUCT_WEIGHTS.sum()
+
+
+def _chunks(rows: int):
+    """(start, size) of each chunk of ``rows``."""
+    for start in range(0, rows, CHUNK_ROWS):
+        yield start, min(CHUNK_ROWS, rows - start)
+
+
+def _month_start(financial_year: int, month_number: int) -> pd.Timestamp:
+    return pd.Timestamp(fy_month_to_date_range(financial_year, month_number)[0])
+
+
+def _lines(rng, size: int, financial_year: int, month_number: int, seller_state: str) -> dict:
+    """
+    The values every report shares, one entry per row: timestamp in the month,
+    state, HSN, rate, quantity and amounts (invoice = taxable + tax, whole rupees).
+    """
+    start = _month_start(financial_year, month_number)
+    seconds = calendar.monthrange(start.year, start.month)[1] * 86400
+    states = rng.choice(len(_STATES), size=size, p=_STATE_WEIGHTS)
+    products = rng.choice(len(_PRODUCTS), size=size, p=_PRODUCT_WEIGHTS)
+    quantity = rng.choice([1, 1, 1, 1, 2, 2, 3], size=size)
+    rate = np.array([r for _, r in _PRODUCTS])[products]
+    invoice = np.round(np.exp(rng.normal(5.6, 0.6, size)) * quantity)
+    taxable = np.round(invoice / (1 + rate / 100), 2)
+    state_code = np.array([code for _, _, code in _STATES])[states]
+    return {
+        "when": start + pd.to_timedelta(rng.integers(0, seconds, size), unit="s"),
+        "state_upper": np.array([name for name, _, _ in _STATES], dtype=object)[states],
+        "state_title": np.array([title for _, title, _ in _STATES], dtype=object)[states],
+        "state_iso": np.array(["IN-" + _ISO_CODES[code] for code in state_code], dtype=object),
+        "intra_state": state_code == seller_state,
+        "hsn": np.array([hsn for hsn, _ in _PRODUCTS])[products],
+        "rate": rate,
+        "quantity": quantity,
+        "invoice": invoice,
+        "taxable": taxable,
+        "tax": np.round(invoice - taxable, 2),
+    }
+
+
+def _text(values) -> np.ndarray:
+    """Numbers as the text the marketplaces write into their cells ('1.0', '195.24')."""
+    return pd.Series(values, dtype="float64").astype(str).to_numpy(dtype=object)
+
+
+def _column_letter(index: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA."""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_CONTENT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+_SHEET_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+
+
+def _write_xlsx(target, sheets: list, shared_strings: bool = True, dimension: bool = True):
+    """
+    Stream ``[(sheet name, header, frames, data rows)]`` into an .xlsx file or
+    buffer, every value as a text cell (None leaves the cell out).
+
+    openpyxl's write-only mode cannot produce the layouts the marketplaces
+    use, and the layout decides how fast a sheet reads: Flipkart's workbooks
+    (saved from Excel) keep text in a shared-strings table and declare the
+    sheet's dimension; Meesho's exporter writes inline strings and a
+    dimension of "A1". ``shared_strings`` and ``dimension`` pick between them.
+    """
+    strings = {}
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zf:
+        for number, (name, header, frames, rows) in enumerate(sheets, 1):
+            with zf.open(f"xl/worksheets/sheet{number}.xml", "w") as raw, \
+                    io.TextIOWrapper(raw, encoding="utf-8") as out:
+                columns = [_column_letter(i) for i in range(len(header or [None]))]
+                ref = f"A1:{columns[-1]}{rows + 1}" if dimension and header else "A1"
+                out.write(f'{_XML}<worksheet xmlns="{_MAIN_NS}"><dimension ref="{ref}"/><sheetData>')
+                row_number = 0
+                for values in _rows(header, frames):
+                    row_number += 1
+                    cells = []
+                    for column, value in zip(columns, values):
+                        if value is None:
+                            continue
+                        value = str(value)
+                        if shared_strings:
+                            index = strings.setdefault(value, len(strings))
+                            cells.append(f'<c r="{column}{row_number}" t="s"><v>{index}</v></c>')
+                        else:
+                            cells.append(f'<c r="{column}{row_number}" t="inlineStr"><is><t>{escape(value)}</t></is></c>')
+                    out.write(f'<row r="{row_number}">{"".join(cells)}</row>\n')
+                out.write("</sheetData></worksheet>")
+
+        if shared_strings:
+            with zf.open("xl/sharedStrings.xml", "w") as raw, io.TextIOWrapper(raw, encoding="utf-8") as out:
+                out.write(f'{_XML}<sst xmlns="{_MAIN_NS}" uniqueCount="{len(strings)}">')
+                for value in strings:
+                    out.write(f"<si><t>{escape(value)}</t></si>")
+                out.write("</sst>")
+
+        sheet_list = "".join(f'<sheet name="{escape(name)}" sheetId="{n}" r:id="rId{n}"/>'
+                             for n, (name, *_) in enumerate(sheets, 1))
+        zf.writestr("xl/workbook.xml", f'{_XML}<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+                                       f'<sheets>{sheet_list}</sheets></workbook>')
+        relations = [(f"rId{n}", "worksheet", f"worksheets/sheet{n}.xml") for n in range(1, len(sheets) + 1)]
+        relations.append((f"rId{len(sheets) + 1}", "styles", "styles.xml"))
+        if shared_strings:
+            relations.append((f"rId{len(sheets) + 2}", "sharedStrings", "sharedStrings.xml"))
+        zf.writestr("xl/_rels/workbook.xml.rels", f'{_XML}<Relationships xmlns="{_PKG_REL_NS}">' + "".join(
+            f'<Relationship Id="{rid}" Type="{_REL_NS}/{kind}" Target="{part}"/>' for rid, kind, part in relations
+        ) + "</Relationships>")
+        zf.writestr("xl/styles.xml", f'{_XML}<styleSheet xmlns="{_MAIN_NS}">'
+                                     '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+                                     '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+                                     '<borders count="1"><border/></borders>'
+                                     '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+                                     '<cellXfs count="1"><xf xfId="0"/></cellXfs>'
+                                     '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/>'
+                                     '</cellStyles></styleSheet>')
+        zf.writestr("_rels/.rels", f'{_XML}<Relationships xmlns="{_PKG_REL_NS}"><Relationship Id="rId1" '
+                                   f'Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/></Relationships>')
+        overrides = [("/xl/workbook.xml", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"),
+                     ("/xl/styles.xml", "application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml")]
+        overrides += [(f"/xl/worksheets/sheet{n}.xml", _SHEET_TYPE) for n in range(1, len(sheets) + 1)]
+        if shared_strings:
+            overrides.append(("/xl/sharedStrings.xml",
+                              "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"))
+        zf.writestr("[Content_Types].xml", f'{_XML}<Types xmlns="{_CONTENT_NS}">'
+                    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                    '<Default Extension="xml" ContentType="application/xml"/>' + "".join(
+                        f'<Override PartName="{part}" ContentType="{kind}"/>' for part, kind in overrides
+                    ) + "</Types>")
+
+
+def _rows(header, frames):
+    """The header, then the rows of every frame as tuples of text or None."""
+    if header:
+        yield header
+    for frame in frames:
+        frame = frame.astype(object)
+        yield from frame.where(frame.notna(), None).itertuples(index=False, name=None)
+
+
+# --- Meesho GST Report -----------------------------------------------------
+
+MEESHO_SALES_HEADER = [
+    "identifier", "sup_name", "gstin", "sub_order_num", "order_date", "hsn_code", "quantity", "gst_rate",
+    "total_taxable_sale_value", "tax_amount", "total_invoice_value", "taxable_shipping",
+    "end_customer_state_new", "enrollment_no", "financial_year", "month_number", "supplier_id",
+]
+MEESHO_RETURNS_HEADER = MEESHO_SALES_HEADER[:14] + ["cancel_return_date"] + MEESHO_SALES_HEADER[14:]
+
+
+def _meesho_frame(rng, start: int, size: int, financial_year: int, month_number: int, supplier_id: int,
+                  returns: bool) -> pd.DataFrame:
+    """Meesho writes every cell as text, amounts unrounded ('94.28571428571428')."""
+    lines = _lines(rng, size, financial_year, month_number, MEESHO_GSTIN[:2])
+    ordered = lines["when"] - pd.to_timedelta(rng.integers(0, 20, size) if returns else 0, unit="D")
+    taxable = lines["invoice"] / (1 + lines["rate"] / 100)
+    frame = {
+        "identifier": "89bya",
+        "sup_name": "Synthetic Traders",
+        "gstin": MEESHO_GSTIN,
+        "sub_order_num": [f"{239_000_000_000_000_000 + (start + i) * 7919}_1" for i in range(size)],
+        "order_date": ordered.strftime("%Y-%m-%d"),
+        "hsn_code": lines["hsn"].astype(str),
+        "quantity": lines["quantity"].astype(str),
+        "gst_rate": [f"{rate:.2f}" for rate in lines["rate"]],
+        "total_taxable_sale_value": _text(taxable),
+        "tax_amount": _text(lines["invoice"] - taxable),
+        "total_invoice_value": _text(lines["invoice"]),
+        "taxable_shipping": _text(rng.uniform(0, 70, size) / (1 + lines["rate"] / 100)),
+        "end_customer_state_new": lines["state_upper"],
+        "enrollment_no": "",
+    }
+    if returns:
+        frame["cancel_return_date"] = lines["when"].strftime("%Y-%m-%d")
+    frame.update(financial_year=str(financial_year), month_number=str(month_number), supplier_id=str(supplier_id))
+    return pd.DataFrame(frame, index=range(size))
+
+
+def write_meesho_gst_zip(folder: str, rows: int, financial_year: int = 2026, month_number: int = 1,
+                         supplier_id: int = 1_000_001, return_ratio: float = 0.2, seed: int = 0) -> tuple:
+    """
+    Meesho GST Report ZIP: ``rows`` sales in tcs_sales.xlsx and
+    ``rows * return_ratio`` returns in tcs_sales_return.xlsx.
+    Returns ``(path, data rows)``.
+    """
+    rng = np.random.default_rng(seed)
+    year = _month_start(financial_year, month_number).year
+    path = os.path.join(folder, f"gst_{supplier_id}_{month_number}_{year}.zip")
+    return_rows = int(rows * return_ratio)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for member, header, count, returns in (("tcs_sales.xlsx", MEESHO_SALES_HEADER, rows, False),
+                                               ("tcs_sales_return.xlsx", MEESHO_RETURNS_HEADER, return_rows, True)):
+            frames = (_meesho_frame(rng, start, size, financial_year, month_number, supplier_id, returns)
+                      for start, size in _chunks(count))
+            buffer = io.BytesIO()
+            _write_xlsx(buffer, [("Sheet1", header, frames, count)], shared_strings=False, dimension=False)
+            zf.writestr(member, buffer.getvalue())
+    return path, rows + return_rows
+
+
+# --- Flipkart Sales Report -------------------------------------------------
+
+FLIPKART_SALES_HEADER = [
+    "Seller GSTIN", "Order ID", "Order Item ID", "Product Title/Description", "FSN", "SKU", "HSN Code",
+    "Event Type", "Event Sub Type", "Order Type", "Fulfilment Type", "Order Date", "Order Approval Date",
+    "Item Quantity", "Order Shipped From (State)", "Warehouse ID", "Price before discount", "Total Discount",
+    "Seller Share", "Bank Offer Share", "Price after discount (Price before discount-Total discount)",
+    "Shipping Charges", "Final Invoice Amount (Price after discount+Shipping Charges)", "Type of tax",
+    "Taxable Value (Final Invoice Amount -Taxes)", "CST Rate", "CST Amount", "VAT Rate", "VAT Amount",
+    "Luxury Cess Rate", "Luxury Cess Amount", "IGST Rate", "IGST Amount", "CGST Rate", "CGST Amount",
+    "SGST Rate (or UTGST as applicable)", "SGST Amount (Or UTGST as applicable)", "TCS IGST Rate",
+    "TCS IGST Amount", "TCS CGST Rate", "TCS CGST Amount", "TCS SGST Rate", "TCS SGST Amount",
+    "Total TCS Deducted", "Buyer Invoice ID", "Buyer Invoice Date", "Buyer Invoice Amount",
+    "Customer's Billing Pincode", "Customer's Billing State", "Customer's Delivery Pincode",
+    "Customer's Delivery State", "Usual Price", "Is Shopsy Order?", "TDS Rate", "TDS Amount", "IRN",
+    "Business Name", "Business GST Number", "Beneficiary Name", "IMEI",
+]
+
+FLIPKART_CASHBACK_HEADER = [
+    "Seller GSTIN", "Order ID", "Order Item ID", "Document Type", "Document Sub Type",
+    "Credit Note ID/ Debit Note ID", "Invoice Amount", "Invoice Date", "Taxable Value", "Luxury Cess Rate",
+    "Luxury Cess Amount", "IGST Rate", "IGST Amount", "CGST Rate", "CGST Amount",
+    "SGST Rate (or UTGST as applicable)", "SGST Amount (Or UTGST as applicable)", "TCS IGST Rate",
+    "TCS IGST Amount", "TCS CGST Rate", "TCS CGST Amount", "TCS SGST Rate", "TCS SGST Amount",
+    "Total TCS Deducted", "Customer's Delivery State", "Is Shopsy Order?", "TDS Rate", "TDS Amount", "IRN",
+    "Business Name", "Business GST Number",
+]
+
+
+def _flipkart_sales_frame(rng, start: int, size: int, financial_year: int, month_number: int,
+                          seller_gstin: str) -> pd.DataFrame:
+    lines = _lines(rng, size, financial_year, month_number, seller_gstin[:2])
+    item_ids = 336_500_000_000_000_000 + (np.arange(start, start + size, dtype=np.int64) * 104_729)
+    event = rng.choice(["Sale", "Return", "Cancellation"], size=size, p=[0.8, 0.12, 0.08])
+    intra, rate, tax = lines["intra_state"], lines["rate"], lines["tax"]
+    discount = -np.round(lines["invoice"] * rng.choice([0, 0, 0.05, 0.1], size=size))
+    zero = _text(np.zeros(size))
+    frame = pd.DataFrame({name: None for name in FLIPKART_SALES_HEADER}, index=range(size))
+    frame["Seller GSTIN"] = seller_gstin
+    frame["Order ID"] = ["OD" + str(i) for i in item_ids]
+    frame["Order Item ID"] = item_ids.astype(str)
+    frame["Product Title/Description"] = [f'"""Synthetic product {hsn}"""' for hsn in lines["hsn"]]
+    frame["FSN"] = [f'"""FSN{hsn:08d}"""' for hsn in lines["hsn"]]
+    frame["SKU"] = [f'"""SKU:{hsn}"""' for hsn in lines["hsn"]]
+    frame["HSN Code"] = lines["hsn"].astype(str)
+    frame["Event Type"] = event
+    frame["Event Sub Type"] = event
+    frame["Order Type"] = rng.choice(["Postpaid", "Prepaid"], size=size)
+    frame["Fulfilment Type"] = "NON_FBF"
+    frame["Order Date"] = frame["Order Approval Date"] = lines["when"].strftime("%Y-%m-%d 00:00:00")
+    frame["Item Quantity"] = _text(lines["quantity"])
+    frame["Order Shipped From (State)"] = "IN-HR"
+    frame["Price before discount"] = _text(lines["invoice"] - discount)
+    frame["Total Discount"] = frame["Bank Offer Share"] = _text(discount)
+    frame["Seller Share"] = zero
+    for name in ("Price after discount (Price before discount-Total discount)",
+                 "Final Invoice Amount (Price after discount+Shipping Charges)", "Buyer Invoice Amount"):
+        frame[name] = _text(lines["invoice"])
+    frame["Shipping Charges"] = zero
+    frame["Type of tax"] = np.where(intra, "1", "0")
+    frame["Taxable Value (Final Invoice Amount -Taxes)"] = _text(lines["taxable"])
+    for name in ("CST Rate", "CST Amount", "VAT Rate", "VAT Amount", "Luxury Cess Rate", "Luxury Cess Amount",
+                 "TCS CGST Amount", "TCS SGST Amount"):
+        frame[name] = zero
+    frame["IGST Rate"] = _text(np.where(intra, 0, rate))
+    frame["IGST Amount"] = _text(np.where(intra, 0, tax))
+    frame["CGST Rate"] = frame["SGST Rate (or UTGST as applicable)"] = _text(np.where(intra, rate / 2, 0))
+    half_tax = np.round(tax / 2, 2)
+    frame["CGST Amount"] = frame["SGST Amount (Or UTGST as applicable)"] = _text(np.where(intra, half_tax, 0))
+    tcs = np.round(lines["taxable"] * 0.005, 3)
+    frame["TCS IGST Rate"] = _text(np.where(intra, 0, 0.5))
+    frame["TCS IGST Amount"] = _text(np.where(intra, 0, tcs))
+    frame["TCS CGST Rate"] = frame["TCS SGST Rate"] = _text(np.where(intra, 0.25, 0))
+    frame["Total TCS Deducted"] = _text(np.round(tcs, 2))
+    frame["Buyer Invoice ID"] = [f"FAMS98{start + i:010d}" for i in range(size)]
+    frame["Buyer Invoice Date"] = (lines["when"] + pd.Timedelta(days=1)).strftime("%Y-%m-%d 00:00:00.0")
+    pincodes = rng.integers(110001, 855118, size).astype(str)
+    frame["Customer's Billing Pincode"] = frame["Customer's Delivery Pincode"] = pincodes
+    frame["Customer's Billing State"] = frame["Customer's Delivery State"] = lines["state_title"]
+    frame["Is Shopsy Order?"] = np.where(rng.random(size) < 0.1, "true", "false")
+    frame["TDS Rate"] = "0.1"
+    frame["TDS Amount"] = _text(np.round(lines["taxable"] * 0.001, 3))
+    frame["Beneficiary Name"] = "Synthetic Customer"
+    return frame
+
+
+def write_flipkart_sales_report(folder: str, rows: int, financial_year: int = 2026, month_number: int = 1,
+                                seller_gstin: str = FLIPKART_GSTIN, seed: int = 0) -> tuple:
+    """Flipkart Sales Report workbook with ``rows`` Sales Report lines. Returns ``(path, data rows)``."""
+    rng = np.random.default_rng(seed)
+    path = os.path.join(folder, f"flipkart_sales_{month_number:02d}_{financial_year}.xlsx")
+    frames = (_flipkart_sales_frame(rng, start, size, financial_year, month_number, seller_gstin)
+              for start, size in _chunks(rows))
+    _write_xlsx(path, [
+        ("Help", None, [], 0),
+        ("Sales Report", FLIPKART_SALES_HEADER, frames, rows),
+        ("Cash Back Report", FLIPKART_CASHBACK_HEADER, [], 0),
+    ])
+    return path, rows
+
+
+# --- Flipkart GSTR-1 (GST) Report ------------------------------------------
+
+# Sheet -> header of the section sheets in Flipkart's GSTR-1 workbook
+FLIPKART_GST_SECTIONS = {
+    "Section 5B in GSTR-1": ["GSTIN", "Delivered State (PoS)", "Invoice Number", "Invoice Date",
+                             "Invoice Amount Rs.", "IGST %", "Taxable Value Rs.", "IGST Amount Rs.", "Cess %",
+                             "CESS\nAmount Rs."],
+    "Section 7(A)(2) in GSTR-1": ["GSTIN", "Gross Taxable Value Rs.", "Taxable Sales Return Value Rs.",
+                                  "Aggregate Taxable Value Rs.", "CGST %", "CGST Amount Rs.", "SGST/UT %",
+                                  "SGST /UT Amount Rs.", "Cess %", "CESS Amount Rs."],
+    "Section 7(B)(2) in GSTR-1": ["GSTIN", "Gross Taxable Value Rs.", "Taxable Sales Return Value Rs.",
+                                  "Aggregate Taxable Value Rs.", "IGST %", "IGST Amount Rs.", "Cess %",
+                                  "CESS Amount Rs.", "Delivered State (PoS)", "Delivered State Code"],
+    "Section 13 in GSTR-1": ["GSTIN", "Invoice Series From", "Invoice Series \nTo", "Total Number of Invoices",
+                             "Cancelled if any", "Net invoices Issued"],
+    "Section 12 in GSTR-1": ["GSTIN", "HSN Number", "Total Quantity in Nos.", "Total\n Value Rs.",
+                             "Total Taxable Value Rs.", "IGST Amount Rs.", "CGST Amount Rs.", "SGST Amount Rs.",
+                             "Cess Rs."],
+    "Section 10A(1) in GSTR-1": ["GSTIN", "Taxable Value Rs.", "CGST %", "CGST Amount Rs.", "SGST/UT %",
+                                 "SGST /UT Amount Rs.", "CESS Amount Rs.", "Amended Period"],
+    "Section 10B(1) in GSTR-1": ["GSTIN", "Aggregate Taxable Value Rs.", "IGST %", "IGST Amount Rs.",
+                                 "CESS Amount Rs.", "Delivered State (PoS)", "Delivered State Code",
+                                 "Amended Period"],
+}
+
+
+def _flipkart_b2cs_frame(rng, size: int, financial_year: int, month_number: int, seller_gstin: str):
+    lines = _lines(rng, size, financial_year, month_number, seller_gstin[:2])
+    returned = np.round(lines["taxable"] * rng.choice([0, 0, 0, 0.5], size=size), 2)
+    aggregate = lines["taxable"] - returned
+    return pd.DataFrame({
+        "GSTIN": seller_gstin,
+        "Gross Taxable Value Rs.": _text(lines["taxable"]),
+        "Taxable Sales Return Value Rs.": _text(returned),
+        "Aggregate Taxable Value Rs.": _text(aggregate),
+        "IGST %": _text(lines["rate"]),
+        "IGST Amount Rs.": _text(np.round(aggregate * lines["rate"] / 100, 2)),
+        "Cess %": "0.0",
+        "CESS Amount Rs.": "0.0",
+        "Delivered State (PoS)": lines["state_title"],
+        "Delivered State Code": lines["state_iso"],
+    })
+
+
+def write_flipkart_gst_report(folder: str, rows: int, financial_year: int = 2026, month_number: int = 1,
+                              seller_gstin: str = FLIPKART_GSTIN, seed: int = 0) -> tuple:
+    """
+    Flipkart GSTR-1 workbook with ``rows`` B2CS lines in Section 7(B)(2), an
+    HSN summary and a document series. Returns ``(path, data rows)``.
+    """
+    rng = np.random.default_rng(seed)
+    path = os.path.join(folder, f"flipkart_gstr1_{month_number:02d}_{financial_year}.xlsx")
+    hsn = pd.DataFrame({
+        "GSTIN": seller_gstin,
+        "HSN Number": [str(code) for code, _ in _PRODUCTS],
+        "Total Quantity in Nos.": _text(rng.integers(1, 500, len(_PRODUCTS))),
+        "Total\n Value Rs.": _text(rng.integers(1000, 100000, len(_PRODUCTS))),
+        "Total Taxable Value Rs.": "0.0", "IGST Amount Rs.": "0.0", "CGST Amount Rs.": "0.0",
+        "SGST Amount Rs.": "0.0", "Cess Rs.": "0.0",
+    })
+    docs = pd.DataFrame([[seller_gstin, "FAMS980000000001", f"FAMS98{rows:010d}", str(rows), "0", str(rows)]])
+    data = {
+        "Section 7(B)(2) in GSTR-1": ((_flipkart_b2cs_frame(rng, size, financial_year, month_number, seller_gstin)
+                                       for _, size in _chunks(rows)), rows),
+        "Section 12 in GSTR-1": ([hsn], len(hsn)),
+        "Section 13 in GSTR-1": ([docs], len(docs)),
+    }
+    _write_xlsx(path, [("Help", None, [], 0)] + [
+        (sheet, header, *data.get(sheet, ([], 0))) for sheet, header in FLIPKART_GST_SECTIONS.items()
+    ])
+    return path, rows + len(hsn) + len(docs)
+
+
+# --- Amazon MTR (B2C) ------------------------------------------------------
+
+AMAZON_MTR_HEADER = [
+    "Seller Gstin", "Invoice Number", "Invoice Date", "Transaction Type", "Order Id", "Shipment Id",
+    "Shipment Date", "Order Date", "Shipment Item Id", "Quantity", "Item Description", "Asin", "Hsn/sac", "Sku",
+    "Product Tax Code", "Bill From City", "Bill From State", "Bill From Country", "Bill From Postal Code",
+    "Ship From City", "Ship From State", "Ship From Country", "Ship From Postal Code", "Ship To City",
+    "Ship To State", "Ship To Country", "Ship To Postal Code", "Invoice Amount", "Tax Exclusive Gross",
+    "Total Tax Amount", "Cgst Rate", "Sgst Rate", "Utgst Rate", "Igst Rate", "Compensatory Cess Rate",
+    "Principal Amount", "Principal Amount Basis", "Cgst Tax", "Sgst Tax", "Igst Tax", "Utgst Tax",
+    "Compensatory Cess Tax", "Shipping Amount", "Shipping Amount Basis", "Shipping Cgst Tax", "Shipping Sgst Tax",
+    "Shipping Utgst Tax", "Shipping Igst Tax", "Shipping Cess Tax Amount", "Gift Wrap Amount",
+    "Gift Wrap Amount Basis", "Gift Wrap Cgst Tax", "Gift Wrap Sgst Tax", "Gift Wrap Utgst Tax",
+    "Gift Wrap Igst Tax", "Gift Wrap Compensatory Cess Tax", "Item Promo Discount", "Item Promo Discount Basis",
+    "Item Promo Tax", "Shipping Promo Discount", "Shipping Promo Discount Basis", "Shipping Promo Tax",
+    "Gift Wrap Promo Discount", "Gift Wrap Promo Discount Basis", "Gift Wrap Promo Tax", "Tcs Cgst Rate",
+    "Tcs Cgst Amount", "Tcs Sgst Rate", "Tcs Sgst Amount", "Tcs Utgst Rate", "Tcs Utgst Amount", "Tcs Igst Rate",
+    "Tcs Igst Amount", "Warehouse Id", "Fulfillment Channel", "Payment Method Code", "Credit Note No",
+    "Credit Note Date",
+]
+
+
+def _amazon_mtr_frame(rng, start: int, size: int, financial_year: int, month_number: int,
+                      seller_gstin: str) -> pd.DataFrame:
+    lines = _lines(rng, size, financial_year, month_number, seller_gstin[:2])
+    kind = rng.choice(["Shipment", "Refund", "Cancel"], size=size, p=[0.85, 0.08, 0.07])
+    cancel, refund = kind == "Cancel", kind == "Refund"
+    sign = np.where(refund, -1, np.where(cancel, 0, 1))
+    intra, rate = lines["intra_state"], np.where(cancel, 0, lines["rate"] / 100)
+    invoice, taxable, tax = (lines[name] * sign for name in ("invoice", "taxable", "tax"))
+    index = np.arange(start, start + size)
+    frame = pd.DataFrame(0, index=range(size), columns=AMAZON_MTR_HEADER)
+    frame["Seller Gstin"] = seller_gstin
+    frame["Invoice Number"] = np.where(cancel, None, [f"IN-{i + 1}" for i in index])
+    frame["Invoice Date"] = lines["when"].strftime("%Y-%m-%d %H:%M:%S")
+    frame["Transaction Type"] = kind
+    frame["Order Id"] = [f"40{i % 8 + 1}-{1_000_000 + i * 37 % 9_000_000:07d}-{2_000_000 + i:07d}" for i in index]
+    frame["Shipment Id"] = [f"A0{i:017d}" for i in index]
+    shipped = (lines["when"] + pd.Timedelta(hours=12)).strftime("%Y-%m-%d %H:%M:%S")
+    frame["Shipment Date"] = frame["Order Date"] = np.where(cancel, None, shipped)
+    frame["Shipment Item Id"] = 546_100_000_000 + index
+    frame["Quantity"] = lines["quantity"]
+    frame["Item Description"] = np.where(cancel, None, [f"Synthetic product {hsn}" for hsn in lines["hsn"]])
+    frame["Asin"] = [f"B0{hsn:08d}" for hsn in lines["hsn"]]
+    frame["Hsn/sac"] = np.where(cancel, None, lines["hsn"].astype(str))
+    frame["Sku"] = [f"SKU-{hsn}" for hsn in lines["hsn"]]
+    frame["Product Tax Code"] = "A_GEN_STANDARD"
+    frame["Bill From City"] = frame["Ship From City"] = "GURUGRAM"
+    frame["Bill From State"] = frame["Ship From State"] = "HARYANA"
+    frame["Bill From Country"] = frame["Ship From Country"] = frame["Ship To Country"] = "IN"
+    frame["Bill From Postal Code"] = frame["Ship From Postal Code"] = 122002
+    frame["Ship To City"] = "CITY"
+    frame["Ship To State"] = lines["state_upper"]
+    frame["Ship To Postal Code"] = rng.integers(110001, 855118, size)
+    frame["Invoice Amount"] = frame["Principal Amount"] = invoice
+    frame["Tax Exclusive Gross"] = frame["Principal Amount Basis"] = taxable
+    frame["Total Tax Amount"] = tax
+    frame["Cgst Rate"] = frame["Sgst Rate"] = np.where(intra, rate / 2, 0)
+    frame["Igst Rate"] = np.where(intra, 0, rate)
+    frame["Cgst Tax"] = frame["Sgst Tax"] = np.where(intra, np.round(tax / 2, 2), 0)
+    frame["Igst Tax"] = np.where(intra, 0, tax)
+    frame["Tcs Cgst Rate"] = frame["Tcs Sgst Rate"] = np.where(intra & ~cancel, 0.0025, 0)
+    frame["Tcs Igst Rate"] = np.where(intra | cancel, 0, 0.005)
+    frame["Tcs Igst Amount"] = np.where(intra, 0, np.round(taxable * 0.005, 2))
+    frame["Tcs Cgst Amount"] = frame["Tcs Sgst Amount"] = np.where(intra, np.round(taxable * 0.0025, 2), 0)
+    frame["Warehouse Id"] = None
+    frame["Fulfillment Channel"] = np.where(cancel, None, "MFN")
+    frame["Payment Method Code"] = np.where(cancel, None, "PayStation")
+    frame["Credit Note No"] = np.where(refund, [f"CN-{i + 1}" for i in index], None)
+    frame["Credit Note Date"] = np.where(refund, frame["Invoice Date"], None)
+    return frame
+
+
+def write_amazon_mtr_zip(folder: str, rows: int, financial_year: int = 2026, month_number: int = 1,
+                         seller_gstin: str = AMAZON_GSTIN, seed: int = 0) -> tuple:
+    """Amazon MTR B2C ZIP with ``rows`` CSV lines. Returns ``(path, data rows)``."""
+    rng = np.random.default_rng(seed)
+    start = _month_start(financial_year, month_number)
+    month = calendar.month_name[start.month]
+    path = os.path.join(folder, f"b2cReport_{month}_{start.year}.zip")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        with zf.open(f"MTR_B2C-{month.upper()}-{start.year}-SYNTHETIC.csv", "w") as raw, \
+                io.TextIOWrapper(raw, encoding="utf-8", newline="") as out:
+            out.write(",".join(AMAZON_MTR_HEADER) + "\n")
+            for chunk_start, size in _chunks(rows):
+                _amazon_mtr_frame(rng, chunk_start, size, financial_year, month_number, seller_gstin).to_csv(
+                    out, header=False, index=False)
+    return path, rows
+
+
+# kind -> writer(folder, rows, financial_year, month_number, seed=...) -> (path, data rows).
+# The kinds are batch_import's; the Flipkart GST Report comes before the Sales
+# Report because the Sales Report import takes its GSTIN from it.
+GENERATORS = {
+    "meesho_gst": write_meesho_gst_zip,
+    "flipkart_gst": write_flipkart_gst_report,
+    "flipkart_sales": write_flipkart_sales_report,
+    "amazon_mtr": write_amazon_mtr_zip,
+}
+
+
+def generate_month(folder: str, rows: int, kinds: list = None, financial_year: int = 2026,
+                   month_number: int = 1, seed: int = 0) -> dict:
+    """Write the ``kinds`` (default: all) into ``folder``; returns ``{kind: (path, data rows)}``."""
+    if not 0 < rows <= MAX_SHEET_ROWS:
+        raise ValueError(f"rows must be between 1 and {MAX_SHEET_ROWS:,} (one Excel sheet)")
+    os.makedirs(folder, exist_ok=True)
+    return {kind: GENERATORS[kind](folder, rows, financial_year, month_number, seed=seed)
+            for kind in (kinds or GENERATORS)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('folder', help='output folder')
+    parser.add_argument('--rows', type=int, default=10_000, help='data rows per report (default: 10,000)')
+    parser.add_argument('--kinds', nargs='+', choices=list(GENERATORS), help='reports to write (default: all)')
+    parser.add_argument('--fy', type=int, default=2026, help='financial year (end-year convention)')
+    parser.add_argument('--month', type=int, default=1, choices=range(1, 13), metavar='MONTH', help='month 1-12')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+
+    os.makedirs(args.folder, exist_ok=True)
+    for kind in args.kinds or GENERATORS:
+        started = time.perf_counter()
+        path, rows = GENERATORS[kind](args.folder, args.rows, args.fy, args.month, seed=args.seed)
+        print(f"{kind:<16} {rows:>10,} rows  {time.perf_counter() - started:>7.1f}s  {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,502 @@
+"""
+Column-wise transforms and batched Core inserts for large marketplace imports.
+
+The per-row import path builds one ORM object per spreadsheet row, which is
+slow and memory hungry for 100k+ row files. The helpers here convert whole
+DataFrame columns at once and write plain dicts through SQLAlchemy Core
+``insert()`` in ``executemany`` batches.
+
+Stored rows carry a ``row_hash`` of their column values, so a re-imported
+(reissued) file only writes the rows that are new or changed.
+
+The write helpers take an optional ``progress`` (import_progress.ProgressReporter)
+and advance it after every batch - which is also where a cancelled import stops.
+"""
+import time
+import warnings
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from constants import normalize_rates
+
+BATCH_SIZE = 5000  # rows per executemany call
+CSV_CHUNK_SIZE = 50000  # rows per read_csv chunk (one commit per chunk)
+LOOKUP_BATCH_SIZE = 500  # keys per IN (...) lookup, well under SQLite's parameter limit
+DATE_SAMPLE_SIZE = 100  # cells sampled per column to detect its date format
+
+
+# =============================================================================
+# COLUMN TRANSFORMS
+# =============================================================================
+
+def _missing(df: pd.DataFrame, default):
+    """Constant column used when a source column is absent from the file."""
+    return np.full(len(df), default, dtype=object)
+
+
+def _nullable(series: pd.Series) -> np.ndarray:
+    """Object array with NaN/NaT replaced by None (stored as NULL)."""
+    values = series.to_numpy(dtype=object, copy=True)
+    values[series.isna().to_numpy()] = None
+    return values
+
+
+def raw_column(df: pd.DataFrame, name: str, default="") -> np.ndarray:
+    """Cell values as-is; equivalent to ``row.get(name, default)``."""
+    if name not in df.columns:
+        return _missing(df, default)
+    return _nullable(df[name])
+
+
+def str_column(df: pd.DataFrame, name: str, default="") -> np.ndarray:
+    """Cell values passed through ``str()``; equivalent to ``str(row.get(name, default))``."""
+    if name not in df.columns:
+        return _missing(df, str(default))
+    return df[name].map(str).to_numpy(dtype=object)
+
+
+def str_stripped_column(df: pd.DataFrame, name: str, default="") -> np.ndarray:
+    """Equivalent to ``str(row.get(name, default)).strip()``."""
+    if name not in df.columns:
+        return _missing(df, str(default).strip())
+    return df[name].map(str).astype(object).str.strip().to_numpy(dtype=object)
+
+
+def stripped_column(df: pd.DataFrame, name: str, default="") -> np.ndarray:
+    """Like :func:`raw_column`, with surrounding whitespace removed from text cells."""
+    if name not in df.columns:
+        return _missing(df, default)
+    series = df[name]
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return _nullable(series)
+    stripped = series.str.strip()  # non-text cells come back as NaN
+    return _nullable(stripped.where(stripped.notna(), series))
+
+
+def falsy_mask(df: pd.DataFrame, name: str) -> np.ndarray:
+    """True where ``row.get(name)`` is falsy (column absent, '' or 0); NaN counts as truthy."""
+    if name not in df.columns:
+        return np.ones(len(df), dtype=bool)
+    series = df[name]
+    return (series.notna() & series.isin(["", 0])).to_numpy()
+
+
+def float_column(df: pd.DataFrame, name: str) -> np.ndarray:
+    """Numeric cells as floats; equivalent to ``safe_float()`` per cell.
+
+    Non-numeric text becomes 0.0 and empty cells stay NULL, as with
+    ``float(nan)`` on the per-row path.
+    """
+    if name not in df.columns:
+        return _missing(df, 0.0)
+    source = df[name]
+    values = pd.to_numeric(source, errors="coerce").astype("float64")
+    values = values.where(values.notna() | source.isna(), 0.0)
+    return _nullable(values)
+
+
+def int_column(df: pd.DataFrame, name: str) -> np.ndarray:
+    """Numeric cells truncated to int; unparseable or empty cells become 0."""
+    if name not in df.columns:
+        return _missing(df, 0)
+    values = pd.to_numeric(df[name], errors="coerce").fillna(0)
+    return values.astype("int64").to_numpy(dtype=object)
+
+
+def rate_column(df: pd.DataFrame, name: str) -> np.ndarray:
+    """GST rate cells normalised to percent; identical to ``normalize_rate()`` per cell."""
+    if name not in df.columns:
+        return _missing(df, 0.0)
+    return _nullable(pd.Series(normalize_rates(df[name]), index=df.index))
+
+
+def detect_date_format(text: pd.Series) -> str | None:
+    """
+    strftime format that parses the most sampled cells of a text column, or None.
+
+    Candidates are guessed month-first (as ``pd.to_datetime`` does per cell)
+    from up to ``DATE_SAMPLE_SIZE`` distinct cells spread over the column, so a
+    day-first column is still recognised once the sample has a day above 12.
+    Ties go to the earlier guess; stray non-date cells do not rule a format out.
+    """
+    values = text.dropna()
+    if values.empty:
+        return None
+    positions = np.unique(np.linspace(0, len(values) - 1, min(len(values), DATE_SAMPLE_SIZE)).astype(int))
+    sample = values.iloc[positions].astype(str).str.strip()
+    sample = sample[sample != ""].drop_duplicates()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # "Parsing dates in %d/%m/%Y format when dayfirst=False"
+        candidates = dict.fromkeys(guess_datetime_format(value) for value in sample)
+    best, best_parsed = None, 0
+    for fmt in filter(None, candidates):
+        parsed = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if parsed > best_parsed:
+            best, best_parsed = fmt, parsed
+    return best
+
+
+def parse_dates(series: pd.Series) -> tuple:
+    """
+    Parse a column of date cells in one call.
+
+    Text cells are parsed with the format from :func:`detect_date_format`;
+    cells that do not match it even once stripped (all text cells, when no
+    format was found) fall back to per-cell inference like ``parse_date()``.
+    Date and datetime cells are taken as they are.
+
+    Returns:
+        ``(timestamps, unparseable)`` - unparseable counts the non-blank
+        cells that are still not dates (they are stored as NULL)
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series, 0
+    if pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+        text = series
+    else:
+        # Mixed column (e.g. Excel dates with some text cells)
+        text = series[series.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)]
+
+    fmt = detect_date_format(text)
+    parsed = pd.to_datetime(series, errors="coerce", format=fmt or "mixed")
+    failed = parsed.isna() & series.notna()
+    if not failed.any():
+        return parsed, 0
+
+    # Only the cells that failed: strip stray whitespace, retry the column's
+    # format, then infer the rest per cell
+    retry = series[failed].map(lambda value: value.strip() if isinstance(value, str) else value)
+    blank = retry == ""
+    retry = retry.where(~blank)
+    retried = pd.to_datetime(retry, errors="coerce", format=fmt or "mixed")
+    if fmt and retried.isna().any():
+        retried = retried.where(retried.notna(), pd.to_datetime(retry, errors="coerce", format="mixed"))
+    parsed = parsed.where(~failed, retried)
+    return parsed, int((retried.isna() & ~blank).sum())
+
+
+def date_column(df: pd.DataFrame, name: str, unparseable: Counter = None) -> np.ndarray:
+    """Cells parsed to ``datetime.date`` (see :func:`parse_dates`); counts failures in ``unparseable[name]``."""
+    if name not in df.columns:
+        return _missing(df, None)
+    parsed, failed = parse_dates(df[name])
+    if unparseable is not None and failed:
+        unparseable[name] += failed
+    return _nullable(parsed.dt.date)
+
+
+def datetime_column(df: pd.DataFrame, name: str, unparseable: Counter = None) -> np.ndarray:
+    """Cells parsed to timestamps (time of day kept); unparseable cells become NULL."""
+    if name not in df.columns:
+        return _missing(df, None)
+    parsed, failed = parse_dates(df[name])
+    if unparseable is not None and failed:
+        unparseable[name] += failed
+    return _nullable(parsed)
+
+
+def constant_column(df: pd.DataFrame, value) -> np.ndarray:
+    """The same value for every row (e.g. the file-level GSTIN)."""
+    return _missing(df, value)
+
+
+_DATE_TRANSFORMS = (date_column, datetime_column)
+
+
+def transform_columns(df: pd.DataFrame, spec, unparseable: Counter = None) -> dict:
+    """
+    Apply a column spec to a DataFrame.
+
+    Args:
+        df: Source rows
+        spec: Iterable of ``(db_column, transform, source_column)`` where
+            ``transform`` is one of the ``*_column`` functions above
+        unparseable: Counter of date cells that could not be parsed, by
+            source column (see :func:`parse_dates`)
+
+    Returns:
+        ``{db_column: array}`` ready for :func:`columns_to_records`
+    """
+    columns = {}
+    for db_col, transform, source in spec:
+        if transform in _DATE_TRANSFORMS:
+            columns[db_col] = transform(df, source, unparseable)
+        else:
+            columns[db_col] = transform(df, source)
+    return columns
+
+
+def row_hashes(columns: dict) -> np.ndarray:
+    """
+    Content hash of every row of a ``{db_column: array}`` mapping (16 hex digits).
+
+    Computed from the values as they will be stored, in column-name order,
+    with pandas' fixed-key row hashing - the same values always give the
+    same hash, across runs and processes.
+    """
+    names = sorted(columns)
+    if not names or not len(columns[names[0]]):
+        return np.array([], dtype=object)
+    frame = pd.DataFrame({name: pd.Series(columns[name], dtype=object) for name in names})
+    hashed = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return np.array([f"{value:016x}" for value in hashed], dtype=object)
+
+
+def columns_to_records(columns: dict) -> list:
+    """Zip a ``{db_column: array}`` mapping into a list of row dicts."""
+    keys = list(columns.keys())
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+# =============================================================================
+# BATCHED WRITES
+# =============================================================================
+
+def bulk_insert(db: Session, model, records: list, batch_size: int = BATCH_SIZE, progress=None) -> int:
+    """
+    Insert row dicts into ``model``'s table with Core ``executemany`` batches.
+    Does not commit; the caller owns the transaction.
+
+    Returns:
+        Number of rows written
+    """
+    if not records:
+        return 0
+    stmt = insert(model.__table__)
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        db.execute(stmt, batch)
+        if progress is not None:
+            progress.advance(len(batch))
+    return len(records)
+
+
+def bulk_insert_ignore(db: Session, model, records: list, batch_size: int = BATCH_SIZE, progress=None) -> int:
+    """
+    Insert row dicts with ``INSERT ... ON CONFLICT DO NOTHING`` batches.
+
+    Rows that collide with a unique index on ``model``'s table (including
+    repeats within ``records``) are skipped by SQLite instead of being checked
+    one query at a time. Does not commit.
+
+    Returns:
+        Number of rows actually inserted
+    """
+    if not records:
+        return 0
+    stmt = sqlite_insert(model.__table__).on_conflict_do_nothing()
+    inserted = 0
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        result = db.execute(stmt, batch)
+        inserted += max(result.rowcount, 0)
+        if progress is not None:
+            progress.advance(len(batch))
+    return inserted
+
+
+def bulk_update(db: Session, model, records: list, batch_size: int = BATCH_SIZE, progress=None) -> int:
+    """
+    ``UPDATE`` stored rows by primary key with ``executemany`` batches.
+    Each dict holds the new column values plus ``"id"``. Does not commit.
+
+    Returns:
+        Number of rows updated
+    """
+    if not records:
+        return 0
+    table = model.__table__
+    value_columns = [name for name in records[0] if name != "id"]
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("_id"))
+        .values({name: bindparam(name) for name in value_columns})
+    )
+    params = [{"_id": record["id"], **{name: record[name] for name in value_columns}} for record in records]
+    for start in range(0, len(params), batch_size):
+        batch = params[start:start + batch_size]
+        db.execute(stmt, batch)
+        if progress is not None:
+            progress.advance(len(batch))
+    return len(records)
+
+
+def stored_row_hashes(db: Session, model, key_columns: tuple, keys, progress=None) -> dict:
+    """
+    ``{key: [(id, row_hash), ...]}`` of stored rows whose key is among ``keys``,
+    oldest first. Looked up in batches on the first key column (which should
+    be indexed).
+    """
+    first = getattr(model, key_columns[0])
+    columns = [getattr(model, name) for name in key_columns]
+    wanted = set(keys)
+    first_values = sorted({key[0] for key in wanted}, key=str)
+    stored = {}
+    for start in range(0, len(first_values), LOOKUP_BATCH_SIZE):
+        batch = first_values[start:start + LOOKUP_BATCH_SIZE]
+        query = db.query(model.id, model.row_hash, *columns).filter(first.in_(batch)).order_by(model.id)
+        for row_id, row_hash, *key in query:
+            key = tuple(key)
+            if key in wanted:
+                stored.setdefault(key, []).append((row_id, row_hash))
+        if progress is not None:
+            progress.check()
+    return stored
+
+
+def upsert_changed(db: Session, model, records: list, key_columns: tuple, seen: Counter = None,
+                   progress=None) -> tuple:
+    """
+    Write only new and changed rows, matched to stored rows on ``key_columns``.
+
+    Every record must carry ``row_hash`` (see :func:`row_hashes`). The n-th
+    record with a key is matched with the n-th stored row with that key:
+
+    - no such stored row: inserted (``ON CONFLICT DO NOTHING``, so a unique
+      index still drops repeats)
+    - stored with a different ``row_hash`` (a corrected row, or one imported
+      before rows were hashed): the stored row is updated in place
+    - same ``row_hash``: left alone
+
+    Records with a NULL key part are always inserted. ``seen`` counts the
+    keys of earlier calls in the same import (CSV chunks), so a key
+    continues its numbering across chunks. Does not commit.
+
+    Returns:
+        ``(inserted, updated, skipped)``
+    """
+    seen = Counter() if seen is None else seen
+    keys = [tuple(record[name] for name in key_columns) for record in records]
+    stored = stored_row_hashes(db, model, key_columns, [key for key in keys if None not in key], progress)
+
+    new, changed = [], []
+    unchanged = 0
+    for key, record in zip(keys, records):
+        if None in key:
+            new.append(record)
+            continue
+        occurrence = seen[key]
+        seen[key] += 1
+        matches = stored.get(key, ())
+        if occurrence >= len(matches):
+            new.append(record)
+            continue
+        row_id, row_hash = matches[occurrence]
+        if row_hash == record["row_hash"]:
+            unchanged += 1
+        else:
+            changed.append({**record, "id": row_id})
+
+    if progress is not None:
+        progress.advance(unchanged)
+    inserted = bulk_insert_ignore(db, model, new, progress=progress)
+    updated = bulk_update(db, model, changed, progress=progress)
+    return inserted, updated, unchanged + len(new) - inserted
+
+
+def sync_scope(db: Session, model, records: list, *criteria, progress=None) -> tuple:
+    """
+    Make the stored rows matching ``criteria`` (e.g. one seller's period)
+    equal to ``records``, writing only the difference.
+
+    Rows are compared by ``row_hash`` as a multiset, since the source rows
+    have no unique key: stored rows with no matching record are deleted,
+    records with no matching stored row are inserted, and identical rows
+    are left alone. Does not commit.
+
+    Returns:
+        ``(inserted, deleted, unchanged)``
+    """
+    stored = db.query(model.id, model.row_hash).filter(*criteria).all()
+    available = Counter(record["row_hash"] for record in records)
+    stale_ids = []
+    for row_id, row_hash in stored:
+        if available[row_hash] > 0:
+            available[row_hash] -= 1
+        else:
+            stale_ids.append(row_id)
+
+    kept = Counter(row_hash for _, row_hash in stored)
+    new = []
+    for record in records:
+        if kept[record["row_hash"]] > 0:
+            kept[record["row_hash"]] -= 1
+        else:
+            new.append(record)
+
+    for start in range(0, len(stale_ids), LOOKUP_BATCH_SIZE):
+        db.query(model).filter(model.id.in_(stale_ids[start:start + LOOKUP_BATCH_SIZE])).delete(
+            synchronize_session=False)
+        if progress is not None:
+            progress.check()
+    if progress is not None:
+        progress.advance(len(records) - len(new))
+    inserted = bulk_insert(db, model, new, progress=progress)
+    return inserted, len(stale_ids), len(records) - len(new)
+
+
+def existing_keys(db: Session, *columns) -> set:
+    """
+    All distinct non-NULL keys in one query (for duplicate checks).
+
+    With one column the set holds plain values; with several it holds
+    tuples in column order.
+    """
+    if len(columns) == 1:
+        return {value for (value,) in db.query(columns[0]).distinct() if value is not None}
+    return {tuple(key) for key in db.query(*columns).distinct() if None not in key}
+
+
+def keys_held_elsewhere(db: Session, key_column, owner_column, owner, keys) -> set:
+    """
+    The ``keys`` stored under an ``owner_column`` value other than ``owner``
+    (e.g. order item IDs already imported for another seller), looked up in
+    batches on ``key_column`` (which should be indexed).
+    """
+    values = sorted({key for key in keys if key is not None}, key=str)
+    held = set()
+    for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+        batch = values[start:start + LOOKUP_BATCH_SIZE]
+        query = db.query(key_column).filter(key_column.in_(batch), owner_column.is_distinct_from(owner)).distinct()
+        held.update(key for (key,) in query)
+    return held
+
+
+def first_value_map(db: Session, key_column, value_column, order_by=None) -> dict:
+    """
+    ``{key: value}`` for a whole table in one query.
+
+    When a key repeats, the first row (by ``order_by``) wins, matching a
+    per-row ``.filter(key == x).first()`` lookup.
+    """
+    query = db.query(key_column, value_column)
+    if order_by is not None:
+        query = query.order_by(order_by)
+    mapping = {}
+    for key, value in query:
+        mapping.setdefault(key, value)
+    return mapping
+
+
+class LoadTimer:
+    """Wall-clock timer that reports rows/sec for a bulk load."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def rate(self, rows: int) -> float:
+        elapsed = self.elapsed
+        return rows / elapsed if elapsed > 0 else 0.0
+
+    def summary(self, rows: int) -> str:
+        return f"{rows:,} rows in {self.elapsed:.2f}s ({self.rate(rows):,.0f} rows/sec)"
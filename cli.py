@@ -0,0 +1,195 @@
+"""
+Headless command line for scheduled imports and report generation.
+
+Usage:
+    python cli.py import PATH [PATH ...] [--force] [--workers N]
+    python cli.py report --gstin GSTIN [GSTIN ...] (--fy 2026 [2027 ...] --month 1 [2 ...] | --period 2026:12 2027:1 ...)
+                         [--reports b2cs hsn ...] [--output DIR]
+
+``import`` takes files and/or month folders and runs them through
+:func:`batch_import.run_batch`. ``report`` writes the selected reports for
+every GSTIN x period into ``DIR/<GSTIN>/FY<fy>_M<month>/``; the periods are
+every ``--fy`` x ``--month`` plus the ``FY:MONTH`` pairs of ``--period``, so
+one run can cross financial years. Neither imports Qt, so both run on a
+server without a display.
+
+Each finished file or report is printed to stdout as one JSON object per
+line (with its timing), followed by a ``{"event": "done", ...}`` line.
+Log messages go to stderr. The exit code is 1 when anything failed.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy.orm import Session
+
+from auto_migrate import auto_migrate
+from batch_import import find_import_files, run_batch
+from database import ReadSessionLocal, SessionLocal
+from docissued import generate_docs_issued_csv
+from ledger import generate_ledger_summary_csv
+from logic import (
+    generate_gst_pivot_csv, generate_gst_hsn_pivot_csv,
+    generate_b2b_csv, generate_hsn_b2b_csv, generate_b2cl_csv, generate_cdnr_csv, generate_gstr1_excel_workbook,
+)
+
+logger = logging.getLogger(__name__)
+
+# Report name -> generate(fy, mn, gstin, db, output_folder=...), as the GUI's export buttons call them
+REPORTS = {
+    "b2cs": generate_gst_pivot_csv,
+    "hsn": generate_gst_hsn_pivot_csv,
+    "b2b": generate_b2b_csv,
+    "hsn_b2b": generate_hsn_b2b_csv,
+    "b2cl": generate_b2cl_csv,
+    "cdnr": generate_cdnr_csv,
+    "summary": generate_ledger_summary_csv,  # all marketplaces, from the sales ledger
+    "docs": generate_docs_issued_csv,
+    "workbook": generate_gstr1_excel_workbook,
+}
+
+
+def run_imports(paths: list, db: Session, workers: int = None, force: bool = False) -> list:
+    """
+    Import files and folders (folders are searched like the GUI's month-folder import).
+    Returns one event dict per file: the :func:`run_batch` summary plus ``"event": "import"``.
+    """
+    files = []
+    for path in paths:
+        files.extend(find_import_files(path) if os.path.isdir(path) else [path])
+    if not files:
+        return []
+    return [{"event": "import", **summary} for summary in run_batch(files, db, workers, force)]
+
+
+def period_folder(output_folder: str, gstin: str, financial_year: int, month_number: int) -> str:
+    return os.path.join(output_folder, gstin, f"FY{financial_year}_M{month_number:02d}")
+
+
+def run_reports(db: Session, gstins: list, periods: list, reports: list, output_folder: str):
+    """
+    Generate ``reports`` (keys of :data:`REPORTS`) for every GSTIN and
+    ``(financial_year, month_number)`` in ``periods``.
+
+    Yields one event dict per report as it finishes:
+    ``{"event": "report", "report", "gstin", "financial_year", "month_number",
+    "status", "seconds", "output", "message"}`` with status ``"ok"``,
+    ``"no_data"`` or ``"failed"``.
+    """
+    for gstin in gstins:
+        for financial_year, month_number in periods:
+            folder = period_folder(output_folder, gstin, financial_year, month_number)
+            os.makedirs(folder, exist_ok=True)
+            for report in reports:
+                started = time.perf_counter()
+                output, status = folder, "ok"
+                try:
+                    message = REPORTS[report](financial_year, month_number, gstin, db, output_folder=folder)
+                except LookupError as e:
+                    status, message = "no_data", str(e)
+                except Exception as e:
+                    db.rollback()
+                    logger.exception(f"{report} failed for {gstin}, FY {financial_year} month {month_number}")
+                    status, message = "failed", str(e)
+                yield {
+                    "event": "report",
+                    "report": report,
+                    "gstin": gstin,
+                    "financial_year": financial_year,
+                    "month_number": month_number,
+                    "status": status,
+                    "seconds": time.perf_counter() - started,
+                    "output": output,
+                    "message": message,
+                }
+
+
+def _period(text: str) -> tuple:
+    """``"2026:1"`` -> ``(2026, 1)`` (argparse type of ``--period``)."""
+    try:
+        financial_year, month_number = (int(part) for part in text.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected FY:MONTH, e.g. 2026:1, not {text!r}")
+    if not 1 <= month_number <= 12:
+        raise argparse.ArgumentTypeError(f"month must be 1-12 in {text!r}")
+    return financial_year, month_number
+
+
+def report_periods(fys: list, months: list, periods: list) -> list:
+    """Every ``fys`` x ``months`` then ``periods``, in order and without repeats."""
+    pairs = [(fy, month) for fy in fys or [] for month in months or []] + list(periods or [])
+    return list(dict.fromkeys(pairs))
+
+
+def _emit(event: dict):
+    print(json.dumps(event, ensure_ascii=False), flush=True)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress to stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    imports = commands.add_parser("import", help="import marketplace files and month folders")
+    imports.add_argument("paths", nargs="+", help="files or folders to import")
+    imports.add_argument("--force", action="store_true", help="re-import files already in the import manifest")
+    imports.add_argument("--workers", type=int, help="parser processes (default: CPU count)")
+
+    reports = commands.add_parser("report", help="generate GSTR-1 reports")
+    reports.add_argument("--gstin", nargs="+", required=True, help="seller GSTINs")
+    reports.add_argument("--fy", type=int, nargs="+",
+                         help="financial years (end-year, e.g. 2026 for FY 2025-26), with --month")
+    reports.add_argument("--month", type=int, nargs="+", choices=range(1, 13), metavar="MONTH",
+                         help="month numbers 1-12, for every --fy")
+    reports.add_argument("--period", type=_period, nargs="+", metavar="FY:MONTH",
+                         help="financial year and month pairs, e.g. 2026:12 2027:1")
+    reports.add_argument("--reports", nargs="+", choices=list(REPORTS), default=list(REPORTS),
+                         help="reports to generate (default: all)")
+    reports.add_argument("--output", default=".", help="output folder (default: current folder)")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.command == "report":
+        if bool(args.fy) != bool(args.month):
+            parser.error("--fy and --month go together")
+        args.periods = report_periods(args.fy, args.month, args.period)
+        if not args.periods:
+            parser.error("give --fy and --month, or --period")
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        stream=sys.stderr,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    for message in auto_migrate():
+        logger.info(message)
+
+    started = time.perf_counter()
+    failed = 0
+    db = SessionLocal() if args.command == "import" else ReadSessionLocal()  # reports only read
+    try:
+        if args.command == "import":
+            events = run_imports(args.paths, db, args.workers, args.force)
+        else:
+            events = run_reports(db, args.gstin, args.periods, args.reports, args.output)
+        count = 0
+        for event in events:
+            count += 1
+            failed += event["status"] == "failed"
+            _emit(event)
+    finally:
+        db.close()
+
+    _emit({"event": "done", "command": args.command, "count": count, "failed": failed,
+           "seconds": time.perf_counter() - started})
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
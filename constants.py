@@ -1,6 +1,8 @@
 """
 Application-wide constants and enumerations.
 """
+import numpy as np
+import pandas as pd
 
 # =============================================================================
 # GSTR-1 THRESHOLDS & LIMITS
@@ -102,6 +104,45 @@ def normalize_rate(rate_value):
     return round(rate, 2)
 
 
+def _rate_float(value) -> float:
+    """``float(value)`` as :func:`normalize_rate` reads a cell (None and text it rejects give 0.0)."""
+    if value is None:
+        return 0.0
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def normalize_rates(values) -> np.ndarray:
+    """
+    :func:`normalize_rate` for a whole column (list, array or Series) at once.
+
+    Returns a float64 array identical, element for element, to the scalar
+    version: None and unconvertible cells give 0.0, NaN stays NaN.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series):
+        rates = series.to_numpy(dtype="float64", copy=True)
+    else:
+        rates = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", copy=True)
+        # None, NaN and text to_numeric rejects (e.g. padded numbers): decide cell by cell
+        for i in np.flatnonzero(np.isnan(rates)):
+            rates[i] = _rate_float(series.iloc[i])
+
+    fraction = (rates > 0) & (rates < 1)
+    rates[fraction] *= 100
+    rounded = np.round(rates, 2)
+    # np.round scales by 100 before rounding, which can tip values a hair off
+    # a half cent the other way from round() (1.055 -> 1.06, not 1.05)
+    with np.errstate(invalid="ignore"):  # inf - inf
+        near_half = np.abs(rates * 100 % 1 - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        rounded[i] = round(float(rates[i]), 2)
+    rounded[rates == 0] = 0.0
+    return rounded
+
+
 def get_state_code(state_name: str) -> str:
     """
     Get the GSTR-1 formatted state code for a given state name.
@@ -119,6 +160,16 @@ def get_state_code(state_name: str) -> str:
     return STATE_CODE_MAPPING.get(state_upper, state_name)
 
 
+def state_codes(states) -> list:
+    """
+    :func:`get_state_code` of every state name, looked up once per distinct
+    name; None where the name is missing or blank.
+    """
+    names = [name if isinstance(name, str) else "" for name in states]
+    codes = {name: get_state_code(name) or None for name in set(names)}
+    return [codes[name] for name in names]
+
+
 def generate_note_number(invoice_number: str, note_type: str = NoteType.CREDIT) -> str:
     """
     Generate a note number from invoice number.
@@ -165,6 +216,45 @@ def fy_month_to_date_range(financial_year: int, month_number: int):
     return month_start, month_end
 
 
+def financial_periods(dates) -> tuple:
+    """
+    ``(financial_year, month_number)`` lists for dates or datetimes: the
+    period :func:`fy_month_to_date_range` would place each one in (None
+    where the date is missing).
+    """
+    stamps = pd.to_datetime(pd.Series(list(dates), dtype=object), errors="coerce")
+    missing = stamps.isna().to_numpy()
+    months = stamps.dt.month.fillna(0).astype("int64")
+    years = stamps.dt.year.fillna(0).astype("int64") + (months >= 4)
+    return (
+        [None if gap else int(year) for year, gap in zip(years, missing)],
+        [None if gap else int(month) for month, gap in zip(months, missing)],
+    )
+
+
+def effective_gst_rates(igst, cgst, sgst, positive_igst: bool = True) -> np.ndarray:
+    """
+    GST rate (percent) of every line: the IGST rate when set, else CGST +
+    SGST when both are, normalised as :func:`normalize_rates`; NaN when
+    neither is set.
+
+    ``positive_igst`` only takes IGST rates above zero (otherwise any non-zero one).
+    """
+    igst, cgst, sgst = (np.asarray(rates, dtype="float64") for rates in (igst, cgst, sgst))
+    with np.errstate(invalid="ignore"):
+        use_igst = igst > 0 if positive_igst else (igst != 0) & ~np.isnan(igst)
+    use_split = ~use_igst & (cgst != 0) & ~np.isnan(cgst) & (sgst != 0) & ~np.isnan(sgst)
+    rates = normalize_rates(np.where(use_igst, igst, cgst + sgst))
+    rates[~(use_igst | use_split)] = np.nan
+    return rates
+
+
+def b2b_mask(buyer_gstins) -> np.ndarray:
+    """True where a buyer GSTIN is present - not NULL, '' or 'nan' (the reports' B2B split)."""
+    gstins = pd.Series(list(buyer_gstins), dtype=object)
+    return (gstins.notna() & ~gstins.isin(["", "nan"])).to_numpy()
+
+
 def resolve_gstin(gstin_or_supplier_id, db):
     """
     Resolve a GSTIN string or legacy supplier ID to a GSTIN.
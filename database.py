@@ -1,15 +1,82 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Database file lives alongside this script, not in the CWD
 _DB_DIR = os.path.dirname(os.path.abspath(__file__))
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(_DB_DIR, 'meesho_sales.db')}"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # SQLite-specific configuration
-)
+# Set on every connection. WAL lets reports read while an import writes
+# (readers see the last commit, writers never wait for readers); with WAL,
+# synchronous=NORMAL only syncs at checkpoints and stays crash-safe.
+STORAGE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64 * 1024,  # KiB, i.e. 64 MiB of page cache per connection
+    "mmap_size": 256 * 2**20,  # read pages through a 256 MiB memory map
+    "temp_store": "MEMORY",  # sorts and temp indexes of big GROUP BYs stay off disk
+}
+
+READ_POOL_SIZE = 4  # read connections kept open (with their page cache); as many again for bursts
+
+
+def enable_savepoints(engine):
+    """
+    Make ``Session.begin_nested()`` safe on SQLite.
+
+    pysqlite only emits BEGIN before a data-changing statement, so a
+    SAVEPOINT issued first opens the transaction itself, and releasing it
+    commits - a later rollback could not undo it. Start the real
+    transaction before the first savepoint instead.
+    """
+    @event.listens_for(engine, "savepoint")
+    def _begin_before_savepoint(conn, name):
+        dbapi_connection = conn.connection.dbapi_connection
+        if not dbapi_connection.in_transaction:
+            dbapi_connection.execute("BEGIN")
+
+
+def configure_storage(engine, read_only: bool = False, pragmas: dict = None):
+    """
+    Apply :data:`STORAGE_PRAGMAS` (or ``pragmas``) to every new connection
+    of ``engine``. ``read_only`` connections also get ``query_only``, so a
+    report can never write, and leave the journal mode to the writer.
+    """
+    pragmas = dict(STORAGE_PRAGMAS if pragmas is None else pragmas)
+    if read_only:
+        pragmas.pop("journal_mode", None)
+        pragmas["query_only"] = "ON"
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def make_engine(url: str = SQLALCHEMY_DATABASE_URL, read_only: bool = False, pragmas: dict = None):
+    """
+    Engine with the storage profile. The writer (imports, migrations) gets
+    safe savepoints; a ``read_only`` engine is a pool of query-only
+    connections for report generation, which can run during an import.
+    """
+    options = {"pool_size": READ_POOL_SIZE, "max_overflow": READ_POOL_SIZE} if read_only else {}
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},  # SQLite-specific configuration
+        **options,
+    )
+    configure_storage(engine, read_only, pragmas)
+    if not read_only:
+        enable_savepoints(engine)
+    return engine
+
+
+engine = make_engine()
+read_engine = make_engine(read_only=True)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -17,4 +84,11 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Sessions for code that only reads (reports, exports, GUI filters)
+ReadSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine
+)
+
 Base = declarative_base()
@@ -1,5 +1,6 @@
 import csv
 import logging
+import os
 import re
 from sqlalchemy.orm import Session
 
@@ -42,13 +43,20 @@ def normalize_document_type(doc_type):
     # Return as-is if not a known type
     return doc_type
 
-def append_meesho_docs_from_db(db: Session, csv_rows, gstin: str):
+def _period_filters(model, financial_year=None, month_number=None) -> list:
+    """Filters limiting ``model`` rows to one period (none when no period is given)."""
+    if financial_year is None:
+        return []
+    return [model.financial_year == financial_year, model.month_number == month_number]
+
+def append_meesho_docs_from_db(db: Session, csv_rows, gstin: str, financial_year=None, month_number=None):
     """Read Meesho invoice data from database -> group by type+prefix -> append rows.
 
     Args:
         db: Database session
         csv_rows: List to append rows to
         gstin: GSTIN to filter by (required for data isolation).
+        financial_year, month_number: Only this period's invoices (default: all)
     """
     from models import MeeshoInvoice, MeeshoSale
 
@@ -59,7 +67,8 @@ def append_meesho_docs_from_db(db: Session, csv_rows, gstin: str):
     query = db.query(MeeshoInvoice).join(
         MeeshoSale, MeeshoInvoice.suborder_no == MeeshoSale.sub_order_num
     ).filter(
-        MeeshoSale.gstin == gstin
+        MeeshoSale.gstin == gstin,
+        *_period_filters(MeeshoSale, financial_year, month_number)
     )
     
     invoices = query.all()
@@ -90,13 +99,14 @@ def append_meesho_docs_from_db(db: Session, csv_rows, gstin: str):
             sr_no_to = sorted_pairs[-1][1]    # Last actual invoice number
             csv_rows.append([doc_type, sr_no_from, sr_no_to, data["total"], data["cancelled"]])
 
-def append_flipkart_docs_from_db(db: Session, csv_rows, gstin: str):
+def append_flipkart_docs_from_db(db: Session, csv_rows, gstin: str, financial_year=None, month_number=None):
     """Read Flipkart SALES invoice data from database -> group by invoice prefix -> append rows.
 
     Args:
         db: Database session
         csv_rows: List to append rows to
         gstin: GSTIN to filter by (required for data isolation).
+        financial_year, month_number: Only this period's invoices (default: all)
     """
     from models import FlipkartOrder
 
@@ -107,7 +117,8 @@ def append_flipkart_docs_from_db(db: Session, csv_rows, gstin: str):
     query = db.query(FlipkartOrder).filter(
         FlipkartOrder.buyer_invoice_id.isnot(None),
         FlipkartOrder.seller_gstin == gstin,
-        FlipkartOrder.event_type == 'Sale'  # Only sales invoices, not returns
+        FlipkartOrder.event_type == 'Sale',  # Only sales invoices, not returns
+        *_period_filters(FlipkartOrder, financial_year, month_number)
     )
     
     orders = query.all()
@@ -144,7 +155,7 @@ def append_flipkart_docs_from_db(db: Session, csv_rows, gstin: str):
             sr_no_to = sorted_pairs[-1][1]    # Last actual invoice number
             csv_rows.append([doc_type, sr_no_from, sr_no_to, data["total"], data["cancelled"]])
 
-def append_flipkart_return_docs_from_db(db: Session, csv_rows, gstin: str):
+def append_flipkart_return_docs_from_db(db: Session, csv_rows, gstin: str, financial_year=None, month_number=None):
     """Read Flipkart RETURN invoice data from database -> group by invoice prefix -> append rows.
     
     Returns are tracked as Credit Notes in GSTR-1 Table 13.
@@ -153,6 +164,7 @@ def append_flipkart_return_docs_from_db(db: Session, csv_rows, gstin: str):
         db: Database session
         csv_rows: List to append rows to
         gstin: GSTIN to filter by (required for data isolation).
+        financial_year, month_number: Only this period's returns (default: all)
     """
     from models import FlipkartReturn
 
@@ -162,7 +174,8 @@ def append_flipkart_return_docs_from_db(db: Session, csv_rows, gstin: str):
     # Query return invoices (credit notes)
     query = db.query(FlipkartReturn).filter(
         FlipkartReturn.buyer_invoice_id.isnot(None),
-        FlipkartReturn.seller_gstin == gstin
+        FlipkartReturn.seller_gstin == gstin,
+        *_period_filters(FlipkartReturn, financial_year, month_number)
     )
     
     returns = query.all()
@@ -198,13 +211,14 @@ def append_flipkart_return_docs_from_db(db: Session, csv_rows, gstin: str):
             sr_no_to = sorted_pairs[-1][1]
             csv_rows.append([doc_type, sr_no_from, sr_no_to, data["total"], data["cancelled"]])
 
-def append_amazon_docs_from_db(db: Session, csv_rows, gstin: str):
+def append_amazon_docs_from_db(db: Session, csv_rows, gstin: str, financial_year=None, month_number=None):
     """Read Amazon invoice data from database -> group by order ID -> append rows.
 
     Args:
         db: Database session
         csv_rows: List to append rows to
         gstin: GSTIN to filter by (required for data isolation).
+        financial_year, month_number: Only this period's invoices (default: all)
     """
     from models import AmazonOrder
 
@@ -214,7 +228,8 @@ def append_amazon_docs_from_db(db: Session, csv_rows, gstin: str):
     query = db.query(AmazonOrder).filter(
         AmazonOrder.transaction_type == 'Shipment',
         AmazonOrder.invoice_number.isnot(None),
-        AmazonOrder.seller_gstin == gstin
+        AmazonOrder.seller_gstin == gstin,
+        *_period_filters(AmazonOrder, financial_year, month_number)
     )
     
     orders = query.all()
@@ -257,83 +272,102 @@ def append_amazon_docs_from_db(db: Session, csv_rows, gstin: str):
         doc_type = normalize_document_type("Invoice")
         csv_rows.append([doc_type, sr_no_from, sr_no_to, total_orders, cancelled_orders])
 
-def generate_docs_issued_csv(financial_year, month_number, gstin_or_supplier_id, db: Session, output_csv="docs.csv"):
-    """Generate Documents Issued CSV from database for GSTR-1 filing.
-    
+def generate_docs_issued_csv(financial_year, month_number, gstin_or_supplier_id, db: Session,
+                             file_path=None, output_folder=None):
+    """Generate Documents Issued CSV (GSTR-1 Table 13) for one period from the database.
+
+    Reads the Meesho, Flipkart and Amazon invoices of the GSTIN in that
+    financial year and month, merges the series of each document type
+    into one row and leaves out rows without a valid Sr. No. range.
+
     Args:
         financial_year: Financial year
         month_number: Month number (1-12)
         gstin_or_supplier_id: GSTIN string or supplier ID integer
         db: Database session
-        output_csv: Output file path
-    
+        file_path: Output file path (default: docs.csv in ``output_folder``)
+        output_folder: Folder for docs.csv
+
     Returns:
         Success message with file path
+
+    Raises:
+        LookupError: No invoices (or no valid document rows) of the GSTIN in that period
     """
-    from logic import get_gstin_for_supplier
-    
-    # Get GSTIN
-    if isinstance(gstin_or_supplier_id, str) and len(gstin_or_supplier_id) == 15:
-        gstin = gstin_or_supplier_id
-    else:
-        gstin = get_gstin_for_supplier(gstin_or_supplier_id, db)
-        if not gstin:
-            raise ValueError(f"GSTIN not found for supplier ID {gstin_or_supplier_id}")
-    
+    from constants import resolve_gstin
+    from models import MeeshoInvoice, MeeshoSale, FlipkartOrder, AmazonOrder
+
+    gstin = resolve_gstin(gstin_or_supplier_id, db)
+    period = {"financial_year": financial_year, "month_number": month_number}
+    files_used = []
     csv_rows = []
-    
-    # 1. Append Meesho docs from DB
-    append_meesho_docs_from_db(db, csv_rows, gstin)
-    
-    # 2. Append Flipkart sales docs from DB
-    append_flipkart_docs_from_db(db, csv_rows, gstin)
-    
-    # 3. Append Flipkart return docs (credit notes) from DB
-    append_flipkart_return_docs_from_db(db, csv_rows, gstin)
-    
-    # 4. Append Amazon docs from DB
-    append_amazon_docs_from_db(db, csv_rows, gstin)
-    
-    # 4. Aggregate rows by document type (combine multiple prefixes of same type)
+
+    # Only read the marketplaces that have invoice data for this GSTIN and period
+    has_meesho_db = db.query(MeeshoInvoice).join(
+        MeeshoSale, MeeshoInvoice.suborder_no == MeeshoSale.sub_order_num
+    ).filter(MeeshoSale.gstin == gstin, *_period_filters(MeeshoSale, **period)).count() > 0
+    if has_meesho_db:
+        files_used.append("Meesho")
+        append_meesho_docs_from_db(db, csv_rows, gstin, **period)
+
+    has_flipkart_db = db.query(FlipkartOrder).filter(
+        FlipkartOrder.buyer_invoice_id.isnot(None),
+        FlipkartOrder.seller_gstin == gstin,
+        *_period_filters(FlipkartOrder, **period)
+    ).count() > 0
+    if has_flipkart_db:
+        files_used.append("Flipkart")
+        append_flipkart_docs_from_db(db, csv_rows, gstin, **period)
+        append_flipkart_return_docs_from_db(db, csv_rows, gstin, **period)
+
+    has_amazon_db = db.query(AmazonOrder).filter(
+        AmazonOrder.transaction_type == 'Shipment',
+        AmazonOrder.invoice_number.isnot(None),
+        AmazonOrder.seller_gstin == gstin,
+        *_period_filters(AmazonOrder, **period)
+    ).count() > 0
+    if has_amazon_db:
+        files_used.append("Amazon")
+        append_amazon_docs_from_db(db, csv_rows, gstin, **period)
+
+    if not files_used:
+        raise LookupError(f"No invoice data found for GSTIN: {gstin} in FY {financial_year}, month {month_number}")
+
+    # Aggregate rows by document type (combine multiple prefixes of same type)
     # This handles cases where CREDIT_NOTE, CREDIT_CONVERSION, CREDIT_DISCOUNT all become "Credit Note"
     aggregated_rows = {}
-    for row in csv_rows:
-        doc_type = row[0]
-        sr_from = row[1]
-        sr_to = row[2]
-        total = row[3]
-        cancelled = row[4]
-        
+    for doc_type, sr_from, sr_to, total, cancelled in csv_rows:
         if doc_type not in aggregated_rows:
             aggregated_rows[doc_type] = {
                 "series": [],
                 "total": 0,
                 "cancelled": 0
             }
-        
         aggregated_rows[doc_type]["total"] += total
         aggregated_rows[doc_type]["cancelled"] += cancelled
         aggregated_rows[doc_type]["series"].append((sr_from, sr_to))
-    
-    # Write CSV with proper headers (GST Table 13 format)
+
     final_rows = []
     for doc_type in sorted(aggregated_rows.keys()):
         data = aggregated_rows[doc_type]
         # Use first series From and last series To
         sr_from = data["series"][0][0] if data["series"] else ""
         sr_to = data["series"][-1][1] if data["series"] else ""
-        
+
         # Only include rows with valid Sr. No. From and Sr. No. To (not empty, not 0)
         if sr_from and sr_to and str(sr_from).strip() != "0" and str(sr_to).strip() != "0":
             final_rows.append([doc_type, sr_from, sr_to, data["total"], data["cancelled"]])
-    
+
     if not final_rows:
-        # No valid documents found
-        return "No valid documents found to generate docs.csv. Created empty file with headers only."
-    
-    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        raise LookupError(f"No valid document rows for GSTIN: {gstin} in FY {financial_year}, month {month_number}")
+
+    if not file_path:
+        file_path = os.path.join(output_folder or "", "docs.csv")
+
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["Nature of Document", "Sr. No. From", "Sr. No. To", "Total Number", "Cancelled"])
         writer.writerows(final_rows)
-    
-    return f"✅ Documents CSV written to {output_csv} with {len(final_rows)} aggregated document types (combined {len(csv_rows)} series) in GST standard format."
+
+    return (f"✅ Documents CSV written to {file_path} with {len(final_rows)} aggregated document types "
+            f"(combined {len(csv_rows)} series) from {', '.join(files_used)}.")
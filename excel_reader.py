@@ -0,0 +1,525 @@
+"""
+Streaming Excel reader for marketplace workbooks.
+
+``pd.read_excel`` turns every cell of the sheet into an openpyxl cell object
+and keeps the whole grid in memory before the first row can be used. The
+readers here walk the sheet row by row (openpyxl ``read_only`` mode with
+``values_only=True``, or python-calamine when it is installed), keep only the
+requested columns and hand rows to pandas in fixed-size batches.
+
+Cell values are converted the way pandas' own Excel readers convert them and
+rows are parsed with pandas' ``TextParser``, so :func:`read_sheet` returns
+the same frame as ``pd.read_excel(...)`` (limited to the requested columns).
+"""
+import io
+import os
+import posixpath
+import threading
+import zipfile
+from datetime import date, datetime
+from xml.etree.ElementTree import fromstring, iterparse
+
+import numpy as np
+import pandas as pd
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+BATCH_ROWS = 20000  # rows per DataFrame yielded by iter_sheet_batches
+
+# Error cells come back as their code in openpyxl values_only mode
+_EXCEL_ERRORS = frozenset(("#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A"))
+
+
+# =============================================================================
+# ROW SOURCES (one per engine)
+# =============================================================================
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+class _OpenpyxlBook:
+    """openpyxl read-only workbook; sheets are parsed only when iterated."""
+
+    def __init__(self, source):
+        from openpyxl import load_workbook
+        self._book = load_workbook(_rewind(source), read_only=True, data_only=True, keep_links=False)
+
+    @property
+    def sheet_names(self) -> list:
+        return [sheet.title for sheet in self._book.worksheets]
+
+    def rows(self, sheet_name):
+        """Raw cell values of one sheet, row by row."""
+        book = self._book
+        sheet = book.worksheets[sheet_name] if isinstance(sheet_name, int) else book[sheet_name]
+        sheet.reset_dimensions()  # some exporters write a wrong <dimension> tag
+        for row in sheet.iter_rows(values_only=True):
+            yield [_convert_openpyxl_cell(value) for value in row]
+
+    def close(self):
+        self._book.close()
+
+
+def _convert_openpyxl_cell(value):
+    """Same conversion as pandas' openpyxl reader."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        as_int = int(value) if np.isfinite(value) else None
+        return as_int if as_int == value else value
+    if isinstance(value, str) and value in _EXCEL_ERRORS:
+        return np.nan
+    return value
+
+
+class _CalamineBook:
+    """python-calamine workbook."""
+
+    def __init__(self, source):
+        from python_calamine import load_workbook
+        self._book = load_workbook(_rewind(source))
+
+    @property
+    def sheet_names(self) -> list:
+        return list(self._book.sheet_names)
+
+    def rows(self, sheet_name):
+        """Raw cell values of one sheet, row by row."""
+        if isinstance(sheet_name, int):
+            sheet = self._book.get_sheet_by_index(sheet_name)
+        else:
+            sheet = self._book.get_sheet_by_name(sheet_name)
+        rows = sheet.iter_rows() if hasattr(sheet, "iter_rows") else sheet.to_python(skip_empty_area=False)
+        for row in rows:
+            yield [_convert_calamine_cell(value) for value in row]
+
+    def close(self):
+        close = getattr(self._book, "close", None)
+        if close is not None:
+            close()
+
+
+def _convert_calamine_cell(value):
+    """Same conversion as pandas' calamine reader."""
+    if isinstance(value, float):
+        as_int = int(value) if np.isfinite(value) else None
+        return as_int if as_int == value else value
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+ENGINES = {
+    "openpyxl": _OpenpyxlBook,
+    "calamine": _CalamineBook,
+}
+
+
+def default_engine() -> str:
+    """``"calamine"`` when python-calamine is installed, otherwise ``"openpyxl"``."""
+    try:
+        import python_calamine  # noqa: F401
+        return "calamine"
+    except ImportError:
+        return "openpyxl"
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def _column_filter(usecols):
+    """Predicate on header text from a list of names, a callable, or None (all columns)."""
+    if usecols is None:
+        return lambda name: True
+    if callable(usecols):
+        return usecols
+    wanted = set(usecols)
+    return lambda name: name in wanted
+
+
+def _is_blank(row) -> bool:
+    return all(value == "" for value in row)
+
+
+def _sheet_rows(source, sheet_name, engine):
+    """Open ``source``, yield one sheet's raw rows, then close it."""
+    book = ENGINES[engine or default_engine()](source)
+    try:
+        yield from book.rows(sheet_name)
+    finally:
+        book.close()
+
+
+def _projected_rows(rows, usecols, header):
+    """
+    Header names and an iterator of data rows limited to the ``usecols`` columns.
+
+    Blank rows are dropped at the end of the sheet but kept between data rows,
+    as pandas does. ``names`` is None when the sheet ends before ``header``.
+    """
+    keep = _column_filter(usecols)
+    names = None
+    for row_number, row in enumerate(rows):
+        if row_number == header:
+            names = list(row)
+            break
+    if names is None:
+        return None, iter(())
+
+    while names and names[-1] == "":
+        names.pop()
+    positions = [i for i, name in enumerate(names) if keep(name)]
+    selected = [names[i] for i in positions]
+
+    def data_rows():
+        pending_blank = 0
+        for row in rows:
+            values = [row[i] if i < len(row) else "" for i in positions]
+            if _is_blank(row):
+                pending_blank += 1
+                continue
+            for _ in range(pending_blank):
+                yield [""] * len(positions)
+            pending_blank = 0
+            yield values
+
+    return selected, data_rows()
+
+
+def _parse(names, rows) -> pd.DataFrame:
+    """Raw rows to a DataFrame with pandas' read_excel type inference."""
+    if not rows:
+        return pd.DataFrame(columns=[name for name in names if name != ""])
+    if not names:
+        return pd.DataFrame(index=pd.RangeIndex(len(rows)), columns=pd.Index([], dtype=object))
+    return TextParser([names] + rows, header=0, skip_blank_lines=False).read()
+
+
+def iter_sheet_batches(source, sheet_name=0, usecols=None, header: int = 0,
+                       batch_size: int = BATCH_ROWS, engine: str = None):
+    """
+    Yield one sheet as DataFrames of up to ``batch_size`` rows.
+
+    Args:
+        source: Path or binary file object (e.g. an in-memory ZIP member)
+        sheet_name: Sheet name or zero-based index
+        usecols: Header names to keep, or a callable ``(header) -> bool``;
+            None keeps every named column. Unlike pandas, names missing from
+            the sheet are ignored so callers fall back to their usual defaults.
+        header: Zero-based row holding the column names; rows above it are skipped
+        batch_size: Rows per yielded DataFrame
+        engine: ``"openpyxl"`` or ``"calamine"``; defaults to :func:`default_engine`
+
+    Column dtypes are inferred per batch. Use :func:`read_sheet` when the
+    whole sheet needs one consistent dtype per column.
+    """
+    names, rows = _projected_rows(_sheet_rows(source, sheet_name, engine), usecols, header)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield _parse(names, batch)
+            batch = []
+    if batch:
+        yield _parse(names, batch)
+
+
+def read_sheet(source, sheet_name=0, usecols=None, header: int = 0, engine: str = None) -> pd.DataFrame:
+    """
+    Read one sheet into a DataFrame; same result as ``pd.read_excel(source, sheet_name, header=header)``.
+
+    With ``usecols`` only those columns are kept, row by row, so the
+    rest of the sheet never reaches pandas. Without it the whole grid is
+    read with pandas' own ragged-row rules (ragged rows padded with
+    ``Unnamed: n`` columns).
+    """
+    rows = _sheet_rows(source, sheet_name, engine)
+    if usecols is not None:
+        names, data = _projected_rows(rows, usecols, header)
+        if names is None:
+            raise ValueError(f"Sheet {sheet_name!r} has no header row {header}")
+        return _parse(names, list(data))
+
+    return _frame_from_rows(rows, header)
+
+
+def _frame_from_rows(rows, header: int = 0, nrows: int = None) -> pd.DataFrame:
+    """Whole-grid parse with the same trimming and padding as pandas' Excel readers."""
+    data = []
+    last_with_data = -1
+    for row_number, row in enumerate(rows):
+        row = list(row)
+        while row and row[-1] == "":
+            row.pop()
+        if row:
+            last_with_data = row_number
+        data.append(row)
+        if nrows is not None and len(data) >= header + 1 + nrows:
+            break
+    data = data[:last_with_data + 1]
+    if data:
+        width = max(len(row) for row in data)
+        data = [row + [""] * (width - len(row)) for row in data]
+    try:
+        return TextParser(data, header=header, nrows=nrows, skip_blank_lines=False).read(nrows)
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+# =============================================================================
+# ROW COUNTS (sheet XML scan, no cell objects)
+# =============================================================================
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_DOC_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _part_path(base_part: str, target: str) -> str:
+    """Archive path of a relationship ``target`` relative to ``base_part``."""
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def _relationships(archive: zipfile.ZipFile, part: str) -> dict:
+    """``{relationship id: (type, archive path)}`` for one package part."""
+    rels_path = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+    if rels_path not in archive.namelist():
+        return {}
+    root = fromstring(archive.read(rels_path))
+    return {
+        rel.get("Id"): (rel.get("Type", ""), _part_path(part, rel.get("Target", "")))
+        for rel in root.iter(f"{_PKG_REL_NS}Relationship")
+    }
+
+
+def _empty_shared_strings(archive: zipfile.ZipFile, path: str) -> set:
+    """Indices of shared strings that are empty text (such cells read as blank)."""
+    empty = set()
+    if path is None or path not in archive.namelist():
+        return empty
+    index = 0
+    with archive.open(path) as stream:
+        for _, elem in iterparse(stream):
+            if elem.tag == f"{_MAIN_NS}si":
+                if not "".join(elem.itertext()):
+                    empty.add(str(index))
+                index += 1
+                elem.clear()
+    return empty
+
+
+def _row_has_data(row, empty_strings: set) -> bool:
+    for cell in row.iter(f"{_MAIN_NS}c"):
+        kind = cell.get("t")
+        if kind == "inlineStr":
+            inline = cell.find(f"{_MAIN_NS}is")
+            if inline is not None and "".join(inline.itertext()):
+                return True
+            continue
+        value = cell.find(f"{_MAIN_NS}v")
+        if value is None or not value.text:
+            continue
+        if kind == "s" and value.text in empty_strings:
+            continue
+        return True
+    return False
+
+
+def _last_data_row(stream, empty_strings: set) -> int:
+    """1-based number of the last row holding a non-empty cell (0 for an empty sheet)."""
+    last = 0
+    row_number = 0
+    sheet_data = None
+    for event, elem in iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if elem.tag == f"{_MAIN_NS}sheetData":
+                sheet_data = elem
+            continue
+        if elem.tag != f"{_MAIN_NS}row":
+            continue
+        row_number = int(elem.get("r", row_number + 1))
+        if _row_has_data(elem, empty_strings):
+            last = row_number
+        if sheet_data is not None:
+            sheet_data.clear()  # finished rows are not kept
+    return last
+
+
+def sheet_row_counts(source, header: int = 0) -> dict:
+    """
+    ``{sheet name: data rows}`` for every worksheet of an .xlsx file.
+
+    Each count equals ``len(pd.read_excel(source, sheet_name=name, header=header))``:
+    rows below the header row up to the last row with a value, blank rows in
+    between included. Only the sheet XML is scanned - no cell objects or
+    DataFrames are built. The ``<dimension>`` tag is not used because some
+    exporters write a wrong one (``A1``, or ``A1:IV1`` for a filled sheet).
+    """
+    with zipfile.ZipFile(_rewind(source)) as archive:
+        package = _relationships(archive, "")
+        workbook_part = next(
+            (path for kind, path in package.values() if kind.endswith("/officeDocument")),
+            "xl/workbook.xml",
+        )
+        parts = _relationships(archive, workbook_part)
+        shared_strings = next((path for kind, path in parts.values() if kind.endswith("/sharedStrings")), None)
+        empty_strings = _empty_shared_strings(archive, shared_strings)
+
+        counts = {}
+        workbook = fromstring(archive.read(workbook_part))
+        for sheet in workbook.iter(f"{_MAIN_NS}sheet"):
+            kind, path = parts.get(sheet.get(f"{_DOC_REL_NS}id"), ("", None))
+            if not kind.endswith("/worksheet"):
+                continue  # chartsheets are not worksheets to pandas either
+            with archive.open(path) as stream:
+                last = _last_data_row(stream, empty_strings)
+            counts[sheet.get("name")] = max(last - header - 1, 0)
+    return counts
+
+
+# =============================================================================
+# PARSED-WORKBOOK HANDLE (shared by validation and import)
+# =============================================================================
+
+class _SheetStream:
+    """One pass over a sheet's rows that header checks can pause and the import finishes."""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self._head = []  # rows already pulled by header checks
+
+    def replay(self):
+        """Rows from the top; rows pulled from the sheet are kept for the next read."""
+        yield from self._head
+        for row in self._rows:
+            self._head.append(row)
+            yield row
+
+    def drain(self):
+        """Rows from the top without keeping them; the stream is used up."""
+        yield from self._head
+        yield from self._rows
+
+
+class ParsedWorkbook:
+    """
+    One workbook whose sheets are parsed at most once, shared by validation and import.
+
+    Validation and import both read through the same handle (see
+    :func:`open_workbook`). The file is read from disk and its workbook
+    index and shared strings are loaded a single time. A header check
+    (``nrows``) pulls only the first rows of a sheet and leaves its stream
+    paused; the full :meth:`read` of the import replays those rows and
+    continues the same stream, keeping only the ``usecols`` columns. No
+    rows are kept after a full read, and :meth:`row_counts` never parses
+    cells at all. Reads and :meth:`close` are serialised by a lock, so the
+    handle can be shared between worker threads.
+    """
+
+    def __init__(self, path: str, engine: str = None):
+        self.path = path
+        self.key = workbook_key(path)
+        # Work from an in-memory copy so the file is not held open (and locked
+        # on Windows) between validation and import
+        with open(path, "rb") as f:
+            self._data = f.read()
+        self._engine = engine or default_engine()
+        self._book = ENGINES[self._engine](io.BytesIO(self._data))
+        self.sheet_names = self._book.sheet_names
+        self._streams = {}
+        self._row_counts = None
+        self._lock = threading.Lock()
+
+    def _sheet_title(self, sheet_name) -> str:
+        if isinstance(sheet_name, int):
+            sheet_name = self.sheet_names[sheet_name]
+        if sheet_name not in self.sheet_names:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        return sheet_name
+
+    def read(self, sheet_name=0, header: int = 0, nrows: int = None, usecols=None) -> pd.DataFrame:
+        """Same result as ``pd.read_excel(path, sheet_name, header=header, nrows=nrows)``."""
+        title = self._sheet_title(sheet_name)
+        with self._lock:
+            if self._book is None:  # closed (e.g. evicted) while a caller still held the handle
+                self._book = ENGINES[self._engine](io.BytesIO(self._data))
+            stream = self._streams.pop(title, None) or _SheetStream(self._book.rows(title))
+            if nrows is None:
+                rows = stream.drain()
+            else:
+                self._streams[title] = stream
+                rows = stream.replay()
+
+            if usecols is None:
+                return _frame_from_rows(rows, header, nrows)
+            names, data = _projected_rows(rows, usecols, header)
+            if names is None:
+                raise ValueError(f"Sheet {sheet_name!r} has no header row {header}")
+            if nrows is not None:
+                data = (row for _, row in zip(range(nrows), data))
+            return _parse(names, list(data))
+
+    def row_counts(self) -> dict:
+        """``{sheet name: data rows below the header}`` from :func:`sheet_row_counts` (cached)."""
+        with self._lock:
+            if self._row_counts is None:
+                self._row_counts = sheet_row_counts(io.BytesIO(self._data))
+            return self._row_counts
+
+    def close(self):
+        with self._lock:
+            self._streams.clear()
+            if self._book is not None:
+                self._book.close()
+                self._book = None
+
+
+_MAX_OPEN_WORKBOOKS = 2  # each handle holds its file's bytes; keep only the latest uploads
+_open_workbooks = {}
+_open_workbooks_lock = threading.Lock()  # GUI worker threads and the batch writer share the cache
+
+
+def workbook_key(path: str) -> tuple:
+    """``(absolute path, size, mtime)`` - changes whenever the file is replaced or edited."""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def open_workbook(path: str) -> ParsedWorkbook:
+    """
+    The shared :class:`ParsedWorkbook` for ``path``.
+
+    Returns the handle created by an earlier call (e.g. during validation)
+    as long as the file's size and mtime are unchanged; otherwise parses
+    the file afresh.
+    """
+    key = workbook_key(path)
+    with _open_workbooks_lock:
+        workbook = _open_workbooks.get(key[0])
+        if workbook is not None and workbook.key == key:
+            return workbook
+        stale = [workbook] if workbook is not None else []
+
+        workbook = ParsedWorkbook(path)
+        _open_workbooks[key[0]] = workbook
+        while len(_open_workbooks) > _MAX_OPEN_WORKBOOKS:
+            oldest = next(iter(_open_workbooks))
+            stale.append(_open_workbooks.pop(oldest))
+    # Closed outside the cache lock: close() waits for a read in progress on another thread
+    for old in stale:
+        old.close()
+    return workbook
+
+
+def close_workbook(path: str):
+    """Drop the shared handle for ``path`` (once its import is finished)."""
+    with _open_workbooks_lock:
+        workbook = _open_workbooks.pop(os.path.abspath(path), None)
+    if workbook is not None:
+        workbook.close()
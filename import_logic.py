@@ -1,17 +1,29 @@
 import os
+import time
 import logging
+import numpy as np
 import pandas as pd
 import zipfile
+from collections import Counter
 from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from models import MeeshoSale, MeeshoReturn, MeeshoInvoice
-import shutil
+from models import MeeshoSale, MeeshoReturn, MeeshoInvoice, derived_columns
+from zip_reader import find_member, read_member, open_member, load_member
+from excel_reader import read_sheet, sheet_row_counts, open_workbook, close_workbook
+from import_manifest import check_manifest, skipped_messages, record_import
+from import_progress import ProgressReporter, ImportCancelled, CANCELLED_MESSAGE
+from ledger import record_scopes, refresh_ledger
+from bulk_loader import (
+    CSV_CHUNK_SIZE, LoadTimer, bulk_insert_ignore, columns_to_records, transform_columns, existing_keys,
+    row_hashes, upsert_changed, sync_scope, raw_column, str_column, str_stripped_column, stripped_column, falsy_mask,
+    float_column, int_column, rate_column, date_column, datetime_column, constant_column,
+    first_value_map, keys_held_elsewhere,
+)
 
 logger = logging.getLogger(__name__)
 
 _APP_DIR = os.path.dirname(os.path.abspath(__file__))
-_TEMP_EXTRACT_DIR = os.path.join(_APP_DIR, "extracted_temp")
 _TEMP_GSTIN_FILE = os.path.join(_APP_DIR, "temp_flipkart_gstin.json")
 
 
@@ -32,6 +44,7 @@ def safe_float(value):
 
 
 from constants import normalize_rate as normalize_gst_rate  # backward-compatible alias
+from constants import normalize_rates
 
 
 # ============================================================================
@@ -96,14 +109,15 @@ def validate_flipkart_sales_excel(filepath: str) -> tuple[bool, str]:
         return False, "❌ Wrong file type! Please select an Excel file (.xlsx or .xls)."
     
     try:
-        # Check if 'Sales Report' sheet exists
-        xl_file = pd.ExcelFile(filepath)
+        # Check if 'Sales Report' sheet exists. The opened workbook is kept for
+        # import_flipkart_sales, so the file is only read and opened once.
+        xl_file = open_workbook(filepath)
         
         if 'Sales Report' not in xl_file.sheet_names:
             # Check if it's a different file type
             first_sheet = xl_file.sheet_names[0] if xl_file.sheet_names else None
             if first_sheet:
-                df = pd.read_excel(filepath, sheet_name=first_sheet, nrows=1)
+                df = xl_file.read(first_sheet, nrows=1)
                 df.columns = [str(c).strip() for c in df.columns]
                 
                 if 'Product ID' in df.columns and 'Current Stock' in df.columns:
@@ -114,7 +128,7 @@ def validate_flipkart_sales_excel(filepath: str) -> tuple[bool, str]:
             return False, f"❌ Wrong file! Flipkart Sales Excel should have a 'Sales Report' sheet.\nFound sheets: {', '.join(xl_file.sheet_names)}"
         
         # Validate columns in Sales Report sheet
-        df = pd.read_excel(filepath, sheet_name='Sales Report', nrows=1)
+        df = xl_file.read('Sales Report', nrows=1)
         df.columns = [str(c).strip() for c in df.columns]
         
         required_cols = ['Order ID', 'Order Item ID', 'FSN', 'SKU']
@@ -134,7 +148,8 @@ def validate_flipkart_gst_excel(filepath: str) -> tuple[bool, str]:
         return False, "❌ Wrong file type! Please select an Excel file (.xlsx or .xls)."
     
     try:
-        xl_file = pd.ExcelFile(filepath)
+        # Parsed once here and reused by import_flipkart_b2c
+        xl_file = open_workbook(filepath)
         
         if not xl_file.sheet_names:
             return False, "❌ Empty Excel file!"
@@ -156,7 +171,7 @@ def validate_flipkart_gst_excel(filepath: str) -> tuple[bool, str]:
         if not first_sheet:
             return False, "❌ No data sheets found in Excel file!"
         
-        df = pd.read_excel(filepath, sheet_name=first_sheet, nrows=1)
+        df = xl_file.read(first_sheet, nrows=1)
         df.columns = [str(c).strip() for c in df.columns]
         
         # Check for GSTR-1 related columns (B2C, B2CL)
@@ -222,61 +237,199 @@ def validate_amazon_zip(filepath: str, expected_type: str = "B2B") -> tuple[bool
         return False, f"❌ Error reading ZIP file: {str(e)}"
 
 
-def import_from_zip(zip_path: str, db: Session) -> list:
+def _source_name(source) -> str:
+    """File name for messages, from a path or a named in-memory ZIP member."""
+    return os.path.basename(getattr(source, "name", source))
+
+
+def read_meesho_zip(zip_path: str) -> dict:
+    """
+    Parse the tcs_sales.xlsx / tcs_sales_return.xlsx members of a Meesho GST Report ZIP.
+    No database access, so it can run in a worker process (see batch_import).
+
+    Returns:
+        ``{"sales": (member name, DataFrame), "returns": (...)}``; a key is
+        missing when the ZIP has no such member
+    """
+    parsed = {}
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        sales_file = find_member(zip_ref, lambda f: "tcs_sales.xlsx" in f.lower())
+        returns_file = find_member(zip_ref, lambda f: "tcs_sales_return.xlsx" in f.lower())
+
+        if sales_file:
+            parsed["sales"] = (os.path.basename(sales_file), _read_meesho_sheet(read_member(zip_ref, sales_file)))
+        if returns_file:
+            parsed["returns"] = (os.path.basename(returns_file), _read_meesho_sheet(read_member(zip_ref, returns_file)))
+
+    return parsed
+
+
+def import_from_zip(zip_path: str, db: Session, parsed: dict = None, force: bool = False,
+                    progress: ProgressReporter = None) -> list:
     """
-    Extracts and imports Meesho sales and returns data from a ZIP file.
+    Imports Meesho sales and returns data from a ZIP file (read in memory, not extracted).
+    ``parsed`` is the result of :func:`read_meesho_zip` when the ZIP was already parsed.
+    A ZIP already in the import manifest is skipped unless ``force`` is set.
+    Both sheets are committed together; a failure or a cancel through
+    ``progress`` saves neither. The manifest entry is only written when the
+    sheets were imported without an error and held data rows.
     Returns a list of status messages for GUI display.
     """
-    messages = []
-    extract_dir = _TEMP_EXTRACT_DIR
-    os.makedirs(extract_dir, exist_ok=True)
+    started = time.perf_counter()
+    sha256, previous = check_manifest(db, zip_path, "meesho_gst", force)
+    if previous:
+        return skipped_messages(zip_path, previous)
 
+    messages = []
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-
-        sales_file = None
-        returns_file = None
+        if parsed is None:
+            parsed = read_meesho_zip(zip_path)
 
-        for file in os.listdir(extract_dir):
-            if "tcs_sales.xlsx" in file.lower():
-                sales_file = os.path.join(extract_dir, file)
-            elif "tcs_sales_return.xlsx" in file.lower():
-                returns_file = os.path.join(extract_dir, file)
+        if "sales" in parsed:
+            name, df = parsed["sales"]
+            messages += import_sales_data(name, db, df=df, progress=progress, commit=False)
+        if "returns" in parsed:
+            name, df = parsed["returns"]
+            messages += import_returns_data(name, db, df=df, progress=progress, commit=False)
+    except ImportCancelled:
+        db.rollback()
+        messages.append(CANCELLED_MESSAGE)
+        return messages
+    except Exception as e:
+        db.rollback()
+        messages.append(f"❌ Error importing Meesho GST Report: {e}")
+        messages.append(f"ℹ️  Nothing from {os.path.basename(zip_path)} was saved.")
+        return messages
 
-        if sales_file:
-            messages += import_sales_data(sales_file, db)
-        if returns_file:
-            messages += import_returns_data(returns_file, db)
-    finally:
-        shutil.rmtree(extract_dir, ignore_errors=True)
+    frames = [df for _, df in parsed.values() if not df.empty]
+    if not frames:
+        db.rollback()  # nothing imported, so the file is not recorded as done
+        return messages
 
+    # record_import commits the sheets together with the manifest entry
+    fy, mn, _, gstin = _meesho_file_period(frames[0])
+    record_import(db, zip_path, sha256, "meesho_gst", "Meesho", sum(len(df) for df in frames), started,
+                  gstin=gstin, financial_year=fy, month_number=mn, replaces_period=True)
     return messages
-def import_sales_data(filepath: str, db: Session) -> list:
+
+
+# Numeric columns coerced up front in both tcs_sales.xlsx and tcs_sales_return.xlsx
+_MEESHO_NUMERIC_COLS = [
+    "hsn_code", "quantity", "gst_rate",
+    "total_taxable_sale_value", "tax_amount", "total_invoice_value",
+    "taxable_shipping", "financial_year", "month_number", "supplier_id"
+]
+
+# Column transform shared by the sales and returns imports so the
+# meesho_sales and meesho_returns tables can't drift apart.
+# (db column, transform, source column)
+_MEESHO_LINE_SPEC = [
+    ("identifier", raw_column, "identifier"),
+    ("sup_name", raw_column, "sup_name"),
+    ("sub_order_num", raw_column, "sub_order_num"),
+    ("order_date", date_column, "order_date"),
+    ("hsn_code", int_column, "hsn_code"),
+    ("quantity", int_column, "quantity"),
+    ("gst_rate", float_column, "gst_rate"),
+    ("total_taxable_sale_value", float_column, "total_taxable_sale_value"),
+    ("tax_amount", float_column, "tax_amount"),
+    ("total_invoice_value", float_column, "total_invoice_value"),
+    ("taxable_shipping", float_column, "taxable_shipping"),
+    ("end_customer_state_new", raw_column, "end_customer_state_new"),
+    ("enrollment_no", str_column, "enrollment_no"),
+]
+
+
+# Every tcs_sales*.xlsx column the importers look at; the rest of the sheet is never parsed
+_MEESHO_SOURCE_COLUMNS = sorted(
+    {source for _, _, source in _MEESHO_LINE_SPEC}
+    | set(_MEESHO_NUMERIC_COLS)
+    | {"gstin", "sup_name", "Product Name", "product_name"}
+)
+
+
+def _read_meesho_sheet(source) -> pd.DataFrame:
+    """The columns of a tcs_sales*.xlsx sheet that the importers use."""
+    return read_sheet(source, usecols=_MEESHO_SOURCE_COLUMNS)
+
+
+def _meesho_file_period(df: pd.DataFrame) -> tuple:
+    """``(financial_year, month_number, supplier_id, gstin)`` from the first row of a tcs_sales*.xlsx sheet."""
+    first = df.iloc[0]
+    fy = int(pd.to_numeric(first["financial_year"], errors="coerce"))
+    mn = int(pd.to_numeric(first["month_number"], errors="coerce"))
+    sid = int(pd.to_numeric(first["supplier_id"], errors="coerce"))
+    gstin = first["gstin"] if "gstin" in df.columns and not pd.isna(first["gstin"]) else None
+    return fy, mn, sid, gstin
+
+
+def _meesho_line_records(df: pd.DataFrame, gstin, fy: int, mn: int, sid: int,
+                         extra_columns: dict = None, unparseable: Counter = None) -> list:
+    """Build meesho_sales/meesho_returns row dicts from a tcs_sales*.xlsx DataFrame."""
+    columns = transform_columns(df, _MEESHO_LINE_SPEC, unparseable)
+    columns["gstin"] = constant_column(df, gstin)
+    columns["financial_year"] = constant_column(df, fy)
+    columns["month_number"] = constant_column(df, mn)
+    columns["supplier_id"] = constant_column(df, sid)
+    if extra_columns:
+        columns.update(extra_columns)
+    columns["row_hash"] = row_hashes(columns)
+    return columns_to_records(columns)
+
+
+def _meesho_ledger_scopes(db: Session, model, gstin, fy: int, mn: int, sid: int) -> set:
+    """Ledger scopes a Meesho sheet replaces: its GSTIN plus any other one stored for the supplier's period."""
+    stored = db.query(model.gstin).filter(
+        model.financial_year == fy, model.month_number == mn, model.supplier_id == sid).distinct()
+    return {(g, fy, mn) for (g,) in stored} | {(gstin, fy, mn)}
+
+
+def _meesho_sync_summary(fy: int, mn: int, sid: int, deleted: int, unchanged: int) -> list:
+    """Status line for what a re-import left alone and removed in the period (none on a first import)."""
+    if not deleted and not unchanged:
+        return []
+    return [f"   FY {fy}, Month {mn}, Supplier {sid}: {unchanged:,} unchanged rows kept, "
+            f"{deleted:,} outdated rows removed"]
+
+
+def _unparseable_date_messages(unparseable: Counter) -> list:
+    """Warning lines for date cells that could not be read (they are stored empty)."""
+    return [f"   ⚠️ {count:,} '{column}' cells are not valid dates (left empty)"
+            for column, count in sorted(unparseable.items())]
+
+
+def _meesho_product_names(df: pd.DataFrame):
+    """Column-wise ``row.get("Product Name") or row.get("product_name", "")``, stripped."""
+    names = stripped_column(df, "Product Name", default=None)
+    use_fallback = falsy_mask(df, "Product Name")
+    names[use_fallback] = stripped_column(df, "product_name")[use_fallback]
+    return names
+
+
+def import_sales_data(filepath: str, db: Session, df: pd.DataFrame = None,
+                      progress: ProgressReporter = None, commit: bool = True) -> list:
+    """
+    Import a tcs_sales.xlsx sheet, replacing its financial year, month and supplier.
+    With ``commit=False`` the caller owns the transaction: a cancellation or
+    an error is raised to it instead of being rolled back and reported.
+    """
     from models import SellerMapping
-    df = pd.read_excel(filepath)
+    timer = LoadTimer()
+    if df is None:
+        df = _read_meesho_sheet(filepath)
     messages = []
 
-    numeric_cols = [
-        "hsn_code", "quantity", "gst_rate",
-        "total_taxable_sale_value", "tax_amount", "total_invoice_value",
-        "taxable_shipping", "financial_year", "month_number", "supplier_id"
-    ]
-
-    for col in numeric_cols:
+    for col in _MEESHO_NUMERIC_COLS:
         df[col] = pd.to_numeric(df[col], errors="coerce")
 
     if df.empty:
         messages.append("⚠️ File has headers but no data rows. Nothing to import.")
         return messages
 
-    # Extract unique financial year, month number, and supplier ID from the data
-    fy = int(df["financial_year"].iloc[0])
-    mn = int(df["month_number"].iloc[0])
-    sid = int(df["supplier_id"].iloc[0])
+    # Extract unique financial year, month number, supplier ID and GSTIN from the data
+    fy, mn, sid, gstin = _meesho_file_period(df)
     
-    # Extract GSTIN and supplier name for mapping
-    gstin = df["gstin"].iloc[0] if "gstin" in df.columns and not pd.isna(df["gstin"].iloc[0]) else None
+    # Extract supplier name for mapping
     sup_name = df["sup_name"].iloc[0] if "sup_name" in df.columns and not pd.isna(df["sup_name"].iloc[0]) else None
     
     # Save or update seller mapping
@@ -295,194 +448,214 @@ def import_sales_data(filepath: str, db: Session) -> list:
             )
             db.add(new_mapping)
             messages.append(f"Created seller mapping: Supplier {sid} → GSTIN {gstin}")
-        db.commit()
 
-    # Delete existing sales data for this financial year, month number and supplier ID
-    db.query(MeeshoSale).filter(
-        MeeshoSale.financial_year == fy,
-        MeeshoSale.month_number == mn,
-        MeeshoSale.supplier_id == sid
-    ).delete(synchronize_session=False)
-    db.commit()
-    messages.append(f"Existing sales data deleted for FY {fy}, Month {mn}, Supplier {sid}")
-
-    for _, row in df.iterrows():
-        record = MeeshoSale(
-            identifier=row.get("identifier", ""),
-            sup_name=row.get("sup_name", ""),
-            gstin=gstin,
-            sub_order_num=row.get("sub_order_num", ""),
-            order_date=parse_date(row.get("order_date")),
-            hsn_code=int(row.get("hsn_code") or 0),
-            quantity=int(row.get("quantity") or 0),
-            gst_rate=safe_float(row.get("gst_rate")),
-            total_taxable_sale_value=safe_float(row.get("total_taxable_sale_value")),
-            tax_amount=safe_float(row.get("tax_amount")),
-            total_invoice_value=safe_float(row.get("total_invoice_value")),
-            taxable_shipping=safe_float(row.get("taxable_shipping")),
-            end_customer_state_new=row.get("end_customer_state_new", ""),
-            enrollment_no=str(row.get("enrollment_no", "")),
-            financial_year=fy,
-            month_number=mn,
-            supplier_id=sid,
-        )
-        db.add(record)
+    # Column-wise transform + batched Core inserts (no per-row ORM objects)
+    unparseable = Counter()
+    records = _meesho_line_records(df, gstin, fy, mn, sid, unparseable=unparseable)
 
     try:
-        db.commit()
-        messages.append(f"Sales data imported from {os.path.basename(filepath)}")
+        # The file replaces this financial year, month number and supplier ID;
+        # only rows that differ from the stored period are deleted or inserted
+        progress = progress or ProgressReporter()
+        progress.start(f"Meesho sales ({_source_name(filepath)})", len(records))
+        with db.begin_nested():
+            scopes = _meesho_ledger_scopes(db, MeeshoSale, gstin, fy, mn, sid)
+            inserted, deleted, unchanged = sync_scope(
+                db, MeeshoSale, records,
+                MeeshoSale.financial_year == fy,
+                MeeshoSale.month_number == mn,
+                MeeshoSale.supplier_id == sid,
+                progress=progress,
+            )
+            refresh_ledger(db, MeeshoSale, scopes)
+        if commit:
+            db.commit()
+        messages.append(f"Sales data imported from {_source_name(filepath)}: {timer.summary(inserted)}")
+        messages.extend(_meesho_sync_summary(fy, mn, sid, deleted, unchanged))
+        messages.extend(_unparseable_date_messages(unparseable))
+    except ImportCancelled:
+        if not commit:
+            raise
+        db.rollback()
+        messages.append(CANCELLED_MESSAGE)
     except IntegrityError:
+        if not commit:
+            raise
         db.rollback()
         messages.append("Duplicate skipped during sales import.")
     except Exception as e:
+        if not commit:
+            raise
         db.rollback()
         messages.append(f"Error during sales import: {e}")
 
     return messages
 
 
-def import_returns_data(filepath: str, db: Session) -> list:
-    df = pd.read_excel(filepath)
+def import_returns_data(filepath: str, db: Session, df: pd.DataFrame = None,
+                        progress: ProgressReporter = None, commit: bool = True) -> list:
+    """
+    Import a tcs_sales_return.xlsx sheet, replacing its financial year, month and supplier.
+    With ``commit=False`` the caller owns the transaction: a cancellation or
+    an error is raised to it instead of being rolled back and reported.
+    """
+    timer = LoadTimer()
+    if df is None:
+        df = _read_meesho_sheet(filepath)
     messages = []
 
-    numeric_cols = [
-        "hsn_code", "quantity", "gst_rate",
-        "total_taxable_sale_value", "tax_amount", "total_invoice_value",
-        "taxable_shipping", "financial_year", "month_number", "supplier_id"
-    ]
-
-    for col in numeric_cols:
+    for col in _MEESHO_NUMERIC_COLS:
         df[col] = pd.to_numeric(df[col], errors="coerce")
 
     if df.empty:
         messages.append("⚠️ Returns file has headers but no data rows. Nothing to import.")
         return messages
 
-    fy = int(df["financial_year"].iloc[0])
-    mn = int(df["month_number"].iloc[0])
-    sid = int(df["supplier_id"].iloc[0])
-
-    gstin = df["gstin"].iloc[0] if "gstin" in df.columns and not pd.isna(df["gstin"].iloc[0]) else None
-
-    # Delete existing returns data for this financial year, month number and supplier ID
-    db.query(MeeshoReturn).filter(
-        MeeshoReturn.financial_year == fy,
-        MeeshoReturn.month_number == mn,
-        MeeshoReturn.supplier_id == sid
-    ).delete(synchronize_session=False)
-    db.commit()
-    messages.append(f"Existing returns data deleted for FY {fy}, Month {mn}, Supplier {sid}")
-
-    for _, row in df.iterrows():
-        product_name = row.get("Product Name") or row.get("product_name", "")
-        if isinstance(product_name, str):
-            product_name = product_name.strip()
-
-        record = MeeshoReturn(
-            identifier=row.get("identifier", ""),
-            sup_name=row.get("sup_name", ""),
-            gstin=gstin,
-            sub_order_num=row.get("sub_order_num", ""),
-            order_date=parse_date(row.get("order_date")),
-            product_name=product_name,
-            product_id=None,
-            hsn_code=int(row.get("hsn_code") or 0),
-            quantity=int(row.get("quantity") or 0),
-            gst_rate=safe_float(row.get("gst_rate")),
-            total_taxable_sale_value=safe_float(row.get("total_taxable_sale_value")),
-            tax_amount=safe_float(row.get("tax_amount")),
-            total_invoice_value=safe_float(row.get("total_invoice_value")),
-            taxable_shipping=safe_float(row.get("taxable_shipping")),
-            end_customer_state_new=row.get("end_customer_state_new", ""),
-            enrollment_no=str(row.get("enrollment_no", "")),
-            financial_year=fy,
-            month_number=mn,
-            supplier_id=sid,
-        )
-        db.add(record)
+    fy, mn, sid, gstin = _meesho_file_period(df)
+
+    # Same column transform as sales, plus the returns-only product columns
+    unparseable = Counter()
+    records = _meesho_line_records(df, gstin, fy, mn, sid, extra_columns={
+        "product_name": _meesho_product_names(df),
+        "product_id": constant_column(df, None),
+    }, unparseable=unparseable)
 
     try:
-        db.commit()
-        messages.append(f"Returns data imported from {os.path.basename(filepath)} with product_id mapping")
+        progress = progress or ProgressReporter()
+        progress.start(f"Meesho returns ({_source_name(filepath)})", len(records))
+        with db.begin_nested():
+            scopes = _meesho_ledger_scopes(db, MeeshoReturn, gstin, fy, mn, sid)
+            inserted, deleted, unchanged = sync_scope(
+                db, MeeshoReturn, records,
+                MeeshoReturn.financial_year == fy,
+                MeeshoReturn.month_number == mn,
+                MeeshoReturn.supplier_id == sid,
+                progress=progress,
+            )
+            refresh_ledger(db, MeeshoReturn, scopes)
+        if commit:
+            db.commit()
+        messages.append(f"Returns data imported from {_source_name(filepath)}: {timer.summary(inserted)}")
+        messages.extend(_meesho_sync_summary(fy, mn, sid, deleted, unchanged))
+        messages.extend(_unparseable_date_messages(unparseable))
+    except ImportCancelled:
+        if not commit:
+            raise
+        db.rollback()
+        messages.append(CANCELLED_MESSAGE)
     except IntegrityError:
+        if not commit:
+            raise
         db.rollback()
         messages.append("Duplicate skipped during returns import.")
     except Exception as e:
+        if not commit:
+            raise
         db.rollback()
         messages.append(f"Error during returns import: {e}")
 
     return messages
 
 
-def import_invoice_data(zip_path: str, db: Session) -> list:
-    """Extract and import invoice data from ZIP file containing Tax_invoice_details.xlsx"""
+# Tax_invoice_details.xlsx -> meesho_invoices. (db column, transform, source column)
+_MEESHO_INVOICE_SPEC = [
+    ("invoice_type", str_stripped_column, "Type"),
+    ("order_date", datetime_column, "Order Date"),
+    ("suborder_no", str_stripped_column, "Suborder No."),
+    ("product_description", str_stripped_column, "Product Description"),
+    ("hsn_code", str_stripped_column, "HSN"),
+    ("invoice_no", str_stripped_column, "Invoice No."),
+]
+
+
+def read_invoice_zip(zip_path: str) -> pd.DataFrame | None:
+    """
+    Parse Tax_invoice_details.xlsx from a Meesho Tax Invoice ZIP (no database access).
+    Returns None when the ZIP has no such file.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        # Find Tax_invoice_details.xlsx
+        excel_files = [f for f in zip_ref.namelist() if 'tax_invoice_details' in f.lower() and f.endswith('.xlsx')]
+        if not excel_files:
+            return None
+
+        return read_sheet(read_member(zip_ref, excel_files[0]),
+                          usecols={source for _, _, source in _MEESHO_INVOICE_SPEC})
+
+
+def import_invoice_data(zip_path: str, db: Session, df: pd.DataFrame = None, force: bool = False,
+                        progress: ProgressReporter = None) -> list:
+    """
+    Extract and import invoice data from ZIP file containing Tax_invoice_details.xlsx.
+    ``df`` is the result of :func:`read_invoice_zip` when the ZIP was already parsed.
+    A ZIP already in the import manifest is skipped unless ``force`` is set.
+    ``progress`` reports rows written and can cancel the import (nothing is saved then).
+    """
+    started = time.perf_counter()
+    sha256, previous = check_manifest(db, zip_path, "meesho_invoices", force)
+    if previous:
+        return skipped_messages(zip_path, previous)
+
     messages = []
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            # Find Tax_invoice_details.xlsx
-            excel_files = [f for f in zip_ref.namelist() if 'tax_invoice_details' in f.lower() and f.endswith('.xlsx')]
-            if not excel_files:
-                return ["❌ No Tax_invoice_details.xlsx file found in ZIP"]
-            
-            excel_file = excel_files[0]
-            
-            # Read invoice data
-            df = pd.read_excel(zip_ref.open(excel_file))
-            
-            # Don't delete existing invoices - append new ones (skip duplicates)
-            # This allows multiple sellers' invoices to coexist
-            
-            count = 0
-            skipped = 0
-            errors = 0
-            for _, row in df.iterrows():
-                if pd.isna(row.get("Suborder No.")):
-                    continue
-                
-                try:
-                    suborder_no = str(row.get("Suborder No.", "")).strip()
-                    invoice_no = str(row.get("Invoice No.", "")).strip()
-                    
-                    # Check if this invoice already exists (by suborder_no and invoice_no)
-                    existing = db.query(MeeshoInvoice).filter(
-                        MeeshoInvoice.suborder_no == suborder_no,
-                        MeeshoInvoice.invoice_no == invoice_no
-                    ).first()
-                    
-                    if existing:
-                        skipped += 1
-                        continue
-                    
-                    order_date = pd.to_datetime(row.get("Order Date")) if pd.notna(row.get("Order Date")) else None
-                    
-                    # Get GSTIN from linked MeeshoSale to ensure invoice isolation by seller
-                    meesho_sale = db.query(MeeshoSale).filter(
-                        MeeshoSale.sub_order_num == suborder_no
-                    ).first()
-                    gstin_from_sale = meesho_sale.gstin if meesho_sale else None
-                    
-                    record = MeeshoInvoice(
-                        invoice_type=str(row.get("Type", "")).strip(),
-                        order_date=order_date,
-                        suborder_no=suborder_no,
-                        product_description=str(row.get("Product Description", "")).strip(),
-                        hsn_code=str(row.get("HSN", "")).strip(),
-                        invoice_no=invoice_no,
-                        gstin=gstin_from_sale  # Add GSTIN for data isolation
-                    )
-                    db.add(record)
-                    count += 1
-                except Exception as row_err:
-                    errors += 1
-                    logger.warning(f"Skipped row {invoice_no}: {row_err}")
-                    continue
+        # Read invoice data
+        if df is None:
+            df = read_invoice_zip(zip_path)
+        if df is None:
+            return ["❌ No Tax_invoice_details.xlsx file found in ZIP"]
+        
+        # Don't delete existing invoices - append new ones (skip duplicates)
+        # This allows multiple sellers' invoices to coexist
+        if "Suborder No." in df.columns:
+            df = df[df["Suborder No."].notna()]
+        else:
+            df = df.iloc[0:0]
+        columns = transform_columns(df, _MEESHO_INVOICE_SPEC)
 
-            db.commit()
-            messages.append(f"Invoice data imported: {count} new invoices")
-            if skipped > 0:
-                messages.append(f"   {skipped} duplicates skipped")
-            if errors > 0:
-                messages.append(f"   {errors} rows skipped due to errors (check logs)")
+        # An Order Date that is present but cannot be parsed fails the row
+        bad_date = pd.isna(columns["order_date"]) & pd.notna(raw_column(df, "Order Date", None))
+        errors = int(bad_date.sum())
+        if errors:
+            logger.warning(
+                f"Skipped {errors} invoice rows with unparseable Order Date: "
+                f"{list(columns['invoice_no'][bad_date][:5])}"
+            )
+
+        # Existing (suborder, invoice) keys and the suborder -> GSTIN map, one query each.
+        # The GSTIN from the linked MeeshoSale keeps invoices isolated by seller.
+        existing = existing_keys(db, MeeshoInvoice.suborder_no, MeeshoInvoice.invoice_no)
+        gstin_by_suborder = first_value_map(
+            db, MeeshoSale.sub_order_num, MeeshoSale.gstin, order_by=MeeshoSale.id
+        )
+        columns["gstin"] = np.array(
+            [gstin_by_suborder.get(suborder) for suborder in columns["suborder_no"]], dtype=object
+        )
+
+        is_new = np.array([
+            key not in existing for key in zip(columns["suborder_no"], columns["invoice_no"])
+        ], dtype=bool)
+        keep = ~bad_date & is_new
+        records = columns_to_records({col: values[keep] for col, values in columns.items()})
+
+        # invoice_no is unique: repeats within the file are dropped by the index
+        progress = progress or ProgressReporter()
+        progress.start("Meesho invoices", len(records))
+        with db.begin_nested():
+            count = bulk_insert_ignore(db, MeeshoInvoice, records, progress=progress)
+        skipped = int((~bad_date).sum()) - count
+        db.commit()
+        messages.append(f"Invoice data imported: {count} new invoices")
+        if skipped > 0:
+            messages.append(f"   {skipped} duplicates skipped")
+        if errors > 0:
+            messages.append(f"   {errors} rows skipped due to errors (check logs)")
+
+        gstins = set(pd.unique(columns["gstin"][keep])) - {None}
+        record_import(db, zip_path, sha256, "meesho_invoices", "Meesho", count, started,
+                      gstin=gstins.pop() if len(gstins) == 1 else None)
+    except ImportCancelled:
+        db.rollback()
+        messages.append(CANCELLED_MESSAGE)
     except Exception as e:
         db.rollback()
         messages.append(f"❌ Error importing invoices: {e}")
@@ -490,15 +663,119 @@ def import_invoice_data(zip_path: str, db: Session) -> list:
     return messages
 
 
-def import_flipkart_sales(filepath: str, db: Session) -> list:
+# Flipkart Sales Report columns shared by flipkart_orders and flipkart_returns.
+# (db column, transform, source column)
+_FLIPKART_SALES_COMMON_SPEC = [
+    ("order_id", str_column, "Order ID"),
+    ("order_item_id", str_column, "Order Item ID"),
+    ("product_title", str_column, "Product Title/Description"),
+    ("fsn", str_column, "FSN"),
+    ("sku", str_column, "SKU"),
+    ("hsn_code", str_column, "HSN Code"),
+    ("event_sub_type", str_column, "Event Sub Type"),
+    ("order_date", date_column, "Order Date"),
+    ("quantity", int_column, "Item Quantity"),
+    ("taxable_value", float_column, "Taxable Value (Final Invoice Amount -Taxes)"),
+    ("igst_rate", rate_column, "IGST Rate"),
+    ("igst_amount", float_column, "IGST Amount"),
+    ("cgst_rate", rate_column, "CGST Rate"),
+    ("cgst_amount", float_column, "CGST Amount"),
+    ("sgst_rate", rate_column, "SGST Rate (or UTGST as applicable)"),
+    ("sgst_amount", float_column, "SGST Amount (Or UTGST as applicable)"),
+    ("customer_delivery_state", str_column, "Customer's Delivery State"),
+]
+
+_FLIPKART_ORDER_SPEC = _FLIPKART_SALES_COMMON_SPEC + [
+    ("order_type", str_column, "Order Type"),
+    ("order_approval_date", date_column, "Order Approval Date"),
+    ("warehouse_state", str_column, "Order Shipped From (State)"),
+    ("price_before_discount", float_column, "Price before discount"),
+    ("total_discount", float_column, "Total Discount"),
+    ("price_after_discount", float_column, "Price after discount (Price before discount-Total discount)"),
+    ("shipping_charges", float_column, "Shipping Charges"),
+    ("final_invoice_amount", float_column, "Final Invoice Amount (Price after discount+Shipping Charges)"),
+    ("tcs_total", float_column, "Total TCS Deducted"),
+    ("tds_amount", float_column, "TDS Amount"),
+    ("buyer_invoice_id", str_column, "Buyer Invoice ID"),
+    ("buyer_invoice_date", date_column, "Buyer Invoice Date"),
+    ("customer_billing_state", str_column, "Customer's Billing State"),
+]
+
+_FLIPKART_RETURN_SPEC = _FLIPKART_SALES_COMMON_SPEC + [
+    ("return_amount", float_column, "Final Invoice Amount (Price after discount+Shipping Charges)"),
+]
+
+
+def _clean_flipkart_header(name) -> str:
+    """Sales Report headers come wrapped in stray quotes and whitespace."""
+    return str(name).strip().replace('"""', '').replace('"', '')
+
+
+# Every Sales Report column the import looks at (cleaned header names)
+_FLIPKART_SALES_COLUMNS = (
+    {source for _, _, source in _FLIPKART_ORDER_SPEC + _FLIPKART_RETURN_SPEC}
+    | {"Order ID", "Order Item ID", "Buyer Invoice ID", "Event Type", "Is Shopsy Order?"}
+)
+
+
+def _flipkart_sales_records(df: pd.DataFrame, model, spec, seller_gstin: str, constants: dict = None,
+                            unparseable: Counter = None) -> list:
+    """Build flipkart_orders/flipkart_returns (``model``) row dicts from Sales Report rows."""
+    columns = transform_columns(df, spec, unparseable)
+    is_shopsy = str_stripped_column(df, "Is Shopsy Order?", "False")
+    columns["is_shopsy"] = is_shopsy
+    columns["marketplace"] = pd.Series(is_shopsy).eq("True").map({True: "Shopsy", False: "Flipkart"}).to_numpy(dtype=object)
+    columns["seller_gstin"] = constant_column(df, seller_gstin)
+    for db_col, value in (constants or {}).items():
+        columns[db_col] = constant_column(df, value)
+    columns["row_hash"] = row_hashes(columns)
+    columns.update(derived_columns(model.__tablename__, columns))  # not hashed: they follow from the rest
+    return columns_to_records(columns)
+
+
+def _flipkart_own_records(db: Session, model, records: list, seller_gstin: str) -> tuple:
+    """
+    Drop records whose order item ID is already stored for another seller
+    GSTIN (such a row is never updated or reassigned); returns (records, dropped).
+    """
+    held = keys_held_elsewhere(db, model.order_item_id, model.seller_gstin, seller_gstin,
+                               [record["order_item_id"] for record in records])
+    if not held:
+        return records, 0
+    own = [record for record in records if record["order_item_id"] not in held]
+    return own, len(records) - len(own)
+
+
+def read_flipkart_sales(filepath: str) -> pd.DataFrame:
+    """
+    The Sales Report sheet (only the columns the import uses, headers cleaned).
+    Reuses the workbook opened by validate_flipkart_sales_excel when there was one.
+    """
+    df = open_workbook(filepath).read(
+        'Sales Report', usecols=lambda name: _clean_flipkart_header(name) in _FLIPKART_SALES_COLUMNS)
+    close_workbook(filepath)
+    df.columns = [_clean_flipkart_header(c) for c in df.columns]
+    return df
+
+
+def import_flipkart_sales(filepath: str, db: Session, df: pd.DataFrame = None, force: bool = False,
+                          progress: ProgressReporter = None) -> list:
     """
     Import Flipkart Sales Report Excel file with Sales Report and Cash Back Report sheets.
     Separates sales (Event Type = 'Sale') and returns (Event Type = 'Return') into different tables.
+    ``df`` is the result of :func:`read_flipkart_sales` when the file was already parsed.
+    A file already in the import manifest is skipped unless ``force`` is set.
+    ``progress`` reports rows written and can cancel the import (nothing is saved then).
     
     CRITICAL SAFETY: Requires user to explicitly provide seller GSTIN to prevent data leakage.
     Flipkart Sales Report files don't contain GSTIN, so we MUST validate before importing.
     """
     from models import FlipkartOrder, FlipkartReturn
+    started = time.perf_counter()
+    sha256, previous = check_manifest(db, filepath, "flipkart_sales", force)
+    if previous:
+        return skipped_messages(filepath, previous)
+
     messages = []
     
     # SAFETY CHECK: Require explicit GSTIN entry before import
@@ -529,11 +806,9 @@ def import_flipkart_sales(filepath: str, db: Session) -> list:
         return messages
     
     try:
-        # Read Sales Report sheet
-        df = pd.read_excel(filepath, sheet_name='Sales Report')
-        
-        # Clean column names
-        df.columns = [str(c).strip().replace('"""', '').replace('"', '') for c in df.columns]
+        # Read Sales Report sheet (only the columns used below, names cleaned)
+        if df is None:
+            df = read_flipkart_sales(filepath)
         
         # Remove rows with missing Order ID
         df = df[df["Order ID"].notna()]
@@ -541,108 +816,55 @@ def import_flipkart_sales(filepath: str, db: Session) -> list:
         # Remove duplicates based on Order Item ID + Buyer Invoice ID combination
         df = df.drop_duplicates(subset=['Order Item ID', 'Buyer Invoice ID'], keep='first')
         
-        sales_count = 0
-        returns_count = 0
-        skipped_count = 0
-        
-        for _, row in df.iterrows():
-            event_type = str(row.get("Event Type", "")).strip()
-            is_shopsy = str(row.get("Is Shopsy Order?", "False")).strip()
-            order_item_id = str(row.get("Order Item ID", ""))
-            
-            # Parse dates
-            order_date = parse_date(row.get("Order Date"))
-            order_approval_date = parse_date(row.get("Order Approval Date"))
-            buyer_invoice_date = parse_date(row.get("Buyer Invoice Date"))
-            
-            if event_type == "Sale":
-                # Check if this order item already exists
-                existing = db.query(FlipkartOrder).filter(FlipkartOrder.order_item_id == order_item_id).first()
-                if existing:
-                    skipped_count += 1
-                    continue
-                
-                # This is a sale order
-                record = FlipkartOrder(
-                    marketplace="Shopsy" if is_shopsy == "True" else "Flipkart",
-                    seller_gstin=seller_gstin,  # Add seller GSTIN
-                    order_id=str(row.get("Order ID", "")),
-                    order_item_id=order_item_id,
-                    product_title=str(row.get("Product Title/Description", "")),
-                    fsn=str(row.get("FSN", "")),
-                    sku=str(row.get("SKU", "")),
-                    hsn_code=str(row.get("HSN Code", "")),
-                    event_type=event_type,
-                    event_sub_type=str(row.get("Event Sub Type", "")),
-                    order_type=str(row.get("Order Type", "")),
-                    order_date=order_date,
-                    order_approval_date=order_approval_date,
-                    quantity=int(row.get("Item Quantity") or 0),
-                    warehouse_state=str(row.get("Order Shipped From (State)", "")),
-                    price_before_discount=safe_float(row.get("Price before discount")),
-                    total_discount=safe_float(row.get("Total Discount")),
-                    price_after_discount=safe_float(row.get("Price after discount (Price before discount-Total discount)")),
-                    shipping_charges=safe_float(row.get("Shipping Charges")),
-                    final_invoice_amount=safe_float(row.get("Final Invoice Amount (Price after discount+Shipping Charges)")),
-                    taxable_value=safe_float(row.get("Taxable Value (Final Invoice Amount -Taxes)")),
-                    igst_rate=normalize_gst_rate(row.get("IGST Rate")),
-                    igst_amount=safe_float(row.get("IGST Amount")),
-                    cgst_rate=normalize_gst_rate(row.get("CGST Rate")),
-                    cgst_amount=safe_float(row.get("CGST Amount")),
-                    sgst_rate=normalize_gst_rate(row.get("SGST Rate (or UTGST as applicable)")),
-                    sgst_amount=safe_float(row.get("SGST Amount (Or UTGST as applicable)")),
-                    tcs_total=safe_float(row.get("Total TCS Deducted")),
-                    tds_amount=safe_float(row.get("TDS Amount")),
-                    buyer_invoice_id=str(row.get("Buyer Invoice ID", "")),
-                    buyer_invoice_date=buyer_invoice_date,
-                    customer_billing_state=str(row.get("Customer's Billing State", "")),
-                    customer_delivery_state=str(row.get("Customer's Delivery State", "")),
-                    is_shopsy=is_shopsy
-                )
-                db.add(record)
-                sales_count += 1
-                
-            elif event_type == "Return":
-                # Check if this return item already exists
-                existing = db.query(FlipkartReturn).filter(FlipkartReturn.order_item_id == order_item_id).first()
-                if existing:
-                    skipped_count += 1
-                    continue
-                
-                # This is a return/cancellation
-                record = FlipkartReturn(
-                    marketplace="Shopsy" if is_shopsy == "True" else "Flipkart",
-                    seller_gstin=seller_gstin,  # Add seller GSTIN
-                    order_id=str(row.get("Order ID", "")),
-                    order_item_id=order_item_id,
-                    product_title=str(row.get("Product Title/Description", "")),
-                    fsn=str(row.get("FSN", "")),
-                    sku=str(row.get("SKU", "")),
-                    hsn_code=str(row.get("HSN Code", "")),
-                    event_sub_type=str(row.get("Event Sub Type", "")),
-                    order_date=order_date,
-                    quantity=int(row.get("Item Quantity") or 0),
-                    return_amount=safe_float(row.get("Final Invoice Amount (Price after discount+Shipping Charges)")),
-                    taxable_value=safe_float(row.get("Taxable Value (Final Invoice Amount -Taxes)")),
-                    igst_rate=normalize_gst_rate(row.get("IGST Rate")),
-                    cgst_rate=normalize_gst_rate(row.get("CGST Rate")),
-                    sgst_rate=normalize_gst_rate(row.get("SGST Rate (or UTGST as applicable)")),
-                    igst_amount=safe_float(row.get("IGST Amount")),
-                    cgst_amount=safe_float(row.get("CGST Amount")),
-                    sgst_amount=safe_float(row.get("SGST Amount (Or UTGST as applicable)")),
-                    customer_delivery_state=str(row.get("Customer's Delivery State", "")),
-                    is_shopsy=is_shopsy
-                )
-                db.add(record)
-                returns_count += 1
+        event_types = str_stripped_column(df, "Event Type")
+        is_sale = event_types == "Sale"
+        is_return = event_types == "Return"
+
+        # Rows are matched to stored rows on Order Item ID: new items are
+        # inserted, items whose content changed (a reissued report) are
+        # updated in place, unchanged items are skipped.
+        progress = progress or ProgressReporter()
+        progress.start("Flipkart sales", int(is_sale.sum() + is_return.sum()))
+        unparseable = Counter()
+        order_records, orders_elsewhere = _flipkart_own_records(db, FlipkartOrder, _flipkart_sales_records(
+            df[is_sale], FlipkartOrder, _FLIPKART_ORDER_SPEC, seller_gstin, {"event_type": "Sale"}, unparseable),
+            seller_gstin)
+        return_records, returns_elsewhere = _flipkart_own_records(db, FlipkartReturn, _flipkart_sales_records(
+            df[is_return], FlipkartReturn, _FLIPKART_RETURN_SPEC, seller_gstin, unparseable=unparseable),
+            seller_gstin)
+        progress.advance(orders_elsewhere + returns_elsewhere)
+        # Keyed on the seller too: a re-import never rewrites another seller's rows
+        key = ("order_item_id", "seller_gstin")
+        with db.begin_nested():
+            sales_count, sales_updated, sales_skipped = upsert_changed(
+                db, FlipkartOrder, order_records, key, progress=progress)
+            refresh_ledger(db, FlipkartOrder, record_scopes(order_records, "seller_gstin"))
+        with db.begin_nested():
+            returns_count, returns_updated, returns_skipped = upsert_changed(
+                db, FlipkartReturn, return_records, key, progress=progress)
+            refresh_ledger(db, FlipkartReturn, record_scopes(return_records, "seller_gstin"))
+        updated_count = sales_updated + returns_updated
+        skipped_count = sales_skipped + returns_skipped
+        elsewhere_count = orders_elsewhere + returns_elsewhere
         
         db.commit()
         messages.append("Flipkart Sales Report imported:")
         messages.append(f"   📦 {sales_count} orders")
         messages.append(f"   🔄 {returns_count} returns/cancellations")
+        if updated_count > 0:
+            messages.append(f"   ✏️ {updated_count} rows updated (changed since last import)")
         if skipped_count > 0:
             messages.append(f"   ⏭️ {skipped_count} duplicates skipped")
+        if elsewhere_count > 0:
+            messages.append(f"   ⚠️ {elsewhere_count} rows skipped: their Order Item IDs are already imported "
+                            f"for another GSTIN")
+        messages.extend(_unparseable_date_messages(unparseable))
+        record_import(db, filepath, sha256, "flipkart_sales", "Flipkart",
+                      sales_count + returns_count + updated_count, started, gstin=seller_gstin)
         
+    except ImportCancelled:
+        db.rollback()
+        messages.append(CANCELLED_MESSAGE)
     except Exception as e:
         db.rollback()
         messages.append(f"❌ Error importing Flipkart Sales Report: {e}")
@@ -650,15 +872,46 @@ def import_flipkart_sales(filepath: str, db: Session) -> list:
     return messages
 
 
-def import_flipkart_b2c(filepath: str, db: Session) -> list:
+def _remember_flipkart_gstin(seller_gstin: str) -> list:
+    """Save the seller GSTIN for the Sales Report import that follows; returns the safety messages."""
+    import json
+    # Save to a temp config file for use in next import
+    temp_config = {
+        'last_flipkart_gstin': seller_gstin,
+        'timestamp': time.time()  # Track when this was imported for safety
+    }
+    with open(_TEMP_GSTIN_FILE, 'w') as f:
+        json.dump(temp_config, f)
+    return [
+        "\nDATA ISOLATION SAFETY:",
+        f"   GSTIN saved: {seller_gstin}",
+        "   Import Sales Report for THIS SELLER next (don't switch sellers)",
+        "   If you switch to different seller, re-import GST Report first",
+    ]
+
+
+def import_flipkart_b2c(filepath: str, db: Session, force: bool = False,
+                        progress: ProgressReporter = None) -> list:
     """
     Import Flipkart GST Report (Excel file with GSTR-1 sections).
     This report contains aggregated tax data for GST filing purposes.
     Note: Individual sales data should be imported from Flipkart Sales Report instead.
     
     NEW: Extracts and returns seller GSTIN from GST report for use in Sales Report imports.
+    A file already in the import manifest is skipped unless ``force`` is set; its
+    GSTIN is still saved for the Sales Report import. ``progress`` reports the
+    rows of an old-format B2C ZIP and can cancel its import.
     """
     from models import FlipkartOrder, FlipkartReturn
+    started = time.perf_counter()
+    sha256, previous = check_manifest(db, filepath, "flipkart_gst", force)
+    if previous:
+        messages = skipped_messages(filepath, previous)
+        if previous.gstin:
+            messages.append(f"✅ Seller GSTIN extracted: {previous.gstin}")
+            messages += _remember_flipkart_gstin(previous.gstin)
+        return messages
+
     messages = []
     seller_gstin = None
     
@@ -669,11 +922,12 @@ def import_flipkart_b2c(filepath: str, db: Session) -> list:
             messages.append("ℹ️  Flipkart GST Report detected (GSTR-1 format)")
             
             # Extract seller GSTIN from the first sheet
-            xl = pd.ExcelFile(filepath)
+            # (workbook parsed once, shared with validate_flipkart_gst_excel)
+            xl = open_workbook(filepath)
             for sheet in xl.sheet_names:
                 if sheet != 'Help':
                     try:
-                        df = pd.read_excel(filepath, sheet_name=sheet, nrows=1)
+                        df = xl.read(sheet, nrows=1)
                         if 'GSTIN' in df.columns and not df.empty:
                             gstin_value = df['GSTIN'].iloc[0]
                             if pd.notna(gstin_value) and str(gstin_value).strip():
@@ -690,54 +944,32 @@ def import_flipkart_b2c(filepath: str, db: Session) -> list:
             messages.append("ℹ️  For sales analytics, please import Flipkart Sales Report (.xlsx) instead.")
             messages.append("⚠️  GST Report import is not required for sales tracking.")
             
-            # Read the file to show what's available
+            # Show what's available; counts come from the sheet XML, so the
+            # sections are never parsed into DataFrames
             messages.append("\nGST Report Sections found:")
+            row_counts = xl.row_counts()
             for sheet in xl.sheet_names:
                 if sheet != 'Help':
-                    df = pd.read_excel(filepath, sheet_name=sheet)
-                    messages.append(f"   • {sheet} ({len(df)} records)")
+                    messages.append(f"   • {sheet} ({row_counts[sheet]} records)")
+            close_workbook(filepath)
             
             messages.append("\n✅ GST Report validated. Use for tax filing reference.")
             
             # Store GSTIN for later use (if Sales Report is imported next)
             if seller_gstin:
-                # Save to a temp config file for use in next import
-                import json
-                import time
-                temp_config = {
-                    'last_flipkart_gstin': seller_gstin,
-                    'timestamp': time.time()  # Track when this was imported for safety
-                }
-                with open(_TEMP_GSTIN_FILE, 'w') as f:
-                    json.dump(temp_config, f)
-                messages.append("\nDATA ISOLATION SAFETY:")
-                messages.append(f"   GSTIN saved: {seller_gstin}")
-                messages.append("   Import Sales Report for THIS SELLER next (don't switch sellers)")
-                messages.append("   If you switch to different seller, re-import GST Report first")
+                messages += _remember_flipkart_gstin(seller_gstin)
             
+            record_import(db, filepath, sha256, "flipkart_gst", "Flipkart", 0, started, gstin=seller_gstin)
             return messages
         
         # If it's a ZIP file, try to process as B2C report (old format)
-        extract_dir = _TEMP_EXTRACT_DIR
-        os.makedirs(extract_dir, exist_ok=True)
-        
-        with zipfile.ZipFile(filepath, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-        
-        # Find CSV file
-        csv_file = None
-        for file in os.listdir(extract_dir):
-            if file.endswith('.csv'):
-                csv_file = os.path.join(extract_dir, file)
-                break
-        
-        if not csv_file:
-            messages.append("❌ No CSV file found in ZIP")
-            shutil.rmtree(extract_dir, ignore_errors=True)
-            return messages
-        
-        # Read CSV
-        df = pd.read_csv(csv_file)
+        with open_member(filepath, lambda f: f.endswith('.csv')) as csv_file:
+            if csv_file is None:
+                messages.append("❌ No CSV file found in ZIP")
+                return messages
+            
+            # Read CSV
+            df = pd.read_csv(csv_file)
         
         # Clean column names
         df.columns = [str(c).strip() for c in df.columns]
@@ -762,19 +994,33 @@ def import_flipkart_b2c(filepath: str, db: Session) -> list:
             messages.append("    1. Import Flipkart GST Report (Excel) FIRST")
             messages.append("    2. Then import Flipkart B2C Report (ZIP) immediately after")
             messages.append("    3. Do NOT switch between different sellers without re-importing GST")
-            shutil.rmtree(extract_dir, ignore_errors=True)
             return messages
         
         shipments_count = 0
         cancellations_count = 0
+        written = []
+        progress = progress or ProgressReporter()
+        progress.start("Flipkart B2C report", len(df))
+        savepoint = db.begin_nested()
+
+        # Parse the date columns once, not cell by cell
+        unparseable = Counter()
+        order_dates = date_column(df, "Order Date", unparseable)
+        shipment_dates = date_column(df, "Shipment Date", unparseable)
+        invoice_dates = date_column(df, "Invoice Date", unparseable)
+        igst_rates, cgst_rates, sgst_rates = (
+            normalize_rates(df[name]) if name in df.columns else np.zeros(len(df))
+            for name in ("Igst Rate", "Cgst Rate", "Sgst Rate")
+        )
         
-        for _, row in df.iterrows():
+        for i, (_, row) in enumerate(df.iterrows()):
+            progress.advance(1)
             transaction_type = str(row.get("Transaction Type", "")).strip()
             
-            # Parse dates
-            order_date = parse_date(row.get("Order Date"))
-            shipment_date = parse_date(row.get("Shipment Date"))
-            invoice_date = parse_date(row.get("Invoice Date"))
+            order_date = order_dates[i]
+            shipment_date = shipment_dates[i]
+            invoice_date = invoice_dates[i]
+            igst_rate, cgst_rate, sgst_rate = float(igst_rates[i]), float(cgst_rates[i]), float(sgst_rates[i])
             
             if transaction_type == "Shipment":
                 # This is a shipment order
@@ -800,11 +1046,11 @@ def import_flipkart_b2c(filepath: str, db: Session) -> list:
                     shipping_charges=safe_float(row.get("Shipping Amount")),
                     final_invoice_amount=safe_float(row.get("Invoice Amount")),
                     taxable_value=safe_float(row.get("Tax Exclusive Gross")),
-                    igst_rate=normalize_gst_rate(row.get("Igst Rate")),
+                    igst_rate=igst_rate,
                     igst_amount=safe_float(row.get("Igst Tax")),
-                    cgst_rate=normalize_gst_rate(row.get("Cgst Rate")),
+                    cgst_rate=cgst_rate,
                     cgst_amount=safe_float(row.get("Cgst Tax")),
-                    sgst_rate=normalize_gst_rate(row.get("Sgst Rate")),
+                    sgst_rate=sgst_rate,
                     sgst_amount=safe_float(row.get("Sgst Tax")),
                     tcs_total=safe_float(row.get("Tcs Igst Amount", 0)) + safe_float(row.get("Tcs Cgst Amount", 0)) + safe_float(row.get("Tcs Sgst Amount", 0)),
                     tds_amount=0.0,
@@ -815,6 +1061,7 @@ def import_flipkart_b2c(filepath: str, db: Session) -> list:
                     is_shopsy="False"
                 )
                 db.add(record)
+                written.append(record)
                 shipments_count += 1
                 
             elif transaction_type == "Cancel":
@@ -833,9 +1080,9 @@ def import_flipkart_b2c(filepath: str, db: Session) -> list:
                     quantity=int(row.get("Quantity") or 0),
                     return_amount=safe_float(row.get("Invoice Amount")),
                     taxable_value=safe_float(row.get("Tax Exclusive Gross")),
-                    igst_rate=normalize_gst_rate(row.get("Igst Rate")),
-                    cgst_rate=normalize_gst_rate(row.get("Cgst Rate")),
-                    sgst_rate=normalize_gst_rate(row.get("Sgst Rate")),
+                    igst_rate=igst_rate,
+                    cgst_rate=cgst_rate,
+                    sgst_rate=sgst_rate,
                     igst_amount=safe_float(row.get("Igst Tax")),
                     cgst_amount=safe_float(row.get("Cgst Tax")),
                     sgst_amount=safe_float(row.get("Sgst Tax")),
@@ -843,263 +1090,270 @@ def import_flipkart_b2c(filepath: str, db: Session) -> list:
                     is_shopsy="False"
                 )
                 db.add(record)
+                written.append(record)
                 cancellations_count += 1
-        
+
+        # The derived columns (and so the ledger scopes) are set on flush
+        db.flush()
+        for model in (FlipkartOrder, FlipkartReturn):
+            refresh_ledger(db, model, {(r.seller_gstin, r.financial_year, r.month_number)
+                                       for r in written if isinstance(r, model)})
+        savepoint.commit()
         db.commit()
         messages.append("Flipkart B2C Report imported:")
         messages.append(f"   📦 {shipments_count} shipments")
         messages.append(f"   ❌ {cancellations_count} cancellations")
+        messages.extend(_unparseable_date_messages(unparseable))
+        record_import(db, filepath, sha256, "flipkart_gst", "Flipkart",
+                      shipments_count + cancellations_count, started, gstin=seller_gstin)
         
-        # Clean up extracted files
-        shutil.rmtree(extract_dir, ignore_errors=True)
-        
+    except ImportCancelled:
+        db.rollback()
+        messages.append(CANCELLED_MESSAGE)
     except Exception as e:
         db.rollback()
         messages.append(f"❌ Error importing Flipkart report: {e}")
-        if 'extract_dir' in locals():
-            shutil.rmtree(extract_dir, ignore_errors=True)
     
     return messages
 
 
-def import_amazon_mtr(filepath: str, db: Session) -> list:
+# Amazon MTR columns shared by amazon_orders and amazon_returns.
+# (db column, transform, source column)
+_AMAZON_MTR_COMMON_SPEC = [
+    ("transaction_type", str_stripped_column, "Transaction Type"),
+    ("order_id", str_column, "Order Id"),
+    ("shipment_item_id", str_column, "Shipment Item Id"),
+    ("invoice_number", str_column, "Invoice Number"),
+    ("invoice_date", date_column, "Invoice Date"),
+    ("order_date", date_column, "Order Date"),
+    ("quantity", int_column, "Quantity"),
+    ("item_description", str_column, "Item Description"),
+    ("asin", str_column, "Asin"),
+    ("sku", str_column, "Sku"),
+    ("hsn_sac", str_column, "Hsn/sac"),
+    ("taxable_value", float_column, "Tax Exclusive Gross"),
+    ("igst_rate", rate_column, "Igst Rate"),
+    ("igst_amount", float_column, "Igst Tax"),
+    ("cgst_rate", rate_column, "Cgst Rate"),
+    ("cgst_amount", float_column, "Cgst Tax"),
+    ("sgst_rate", rate_column, "Sgst Rate"),
+    ("sgst_amount", float_column, "Sgst Tax"),
+    ("utgst_rate", rate_column, "Utgst Rate"),
+    ("ship_to_state", str_column, "Ship To State"),
+    ("seller_gstin", str_column, "Seller Gstin"),
+    ("customer_bill_to_gstid", str_column, "Customer Bill To Gstid"),
+    ("buyer_name", str_column, "Buyer Name"),
+]
+
+_AMAZON_ORDER_SPEC = _AMAZON_MTR_COMMON_SPEC + [
+    ("shipment_id", str_column, "Shipment Id"),
+    ("invoice_amount", float_column, "Invoice Amount"),
+    ("shipment_date", date_column, "Shipment Date"),
+    ("tax_exclusive_gross", float_column, "Tax Exclusive Gross"),
+    ("total_tax_amount", float_column, "Total Tax Amount"),
+    ("principal_amount", float_column, "Principal Amount"),
+    ("shipping_amount", float_column, "Shipping Amount"),
+    ("gift_wrap_amount", float_column, "Gift Wrap Amount"),
+    ("utgst_amount", float_column, "Utgst Tax"),
+    ("compensatory_cess_rate", rate_column, "Compensatory Cess Rate"),
+    ("compensatory_cess_amount", float_column, "Compensatory Cess Tax Amount"),
+    ("tcs_igst_rate", rate_column, "Tcs Igst Rate"),
+    ("tcs_igst_amount", float_column, "Tcs Igst Amount"),
+    ("tcs_cgst_rate", rate_column, "Tcs Cgst Rate"),
+    ("tcs_cgst_amount", float_column, "Tcs Cgst Amount"),
+    ("tcs_sgst_rate", rate_column, "Tcs Sgst Rate"),
+    ("tcs_sgst_amount", float_column, "Tcs Sgst Amount"),
+    ("ship_from_state", str_column, "Ship From State"),
+    ("ship_to_city", str_column, "Ship To City"),
+    ("ship_to_postal_code", str_column, "Ship To Postal Code"),
+    ("bill_to_state", str_column, "Bill To State"),
+    ("bill_to_city", str_column, "Bill To City"),
+    ("bill_to_postal_code", str_column, "Bill To Postalcode"),
+    ("customer_ship_to_gstid", str_column, "Customer Ship To Gstid"),
+    ("warehouse_id", str_column, "Warehouse Id"),
+    ("fulfillment_channel", str_column, "Fulfillment Channel"),
+]
+
+_AMAZON_RETURN_SPEC = _AMAZON_MTR_COMMON_SPEC + [
+    ("return_amount", float_column, "Invoice Amount"),
+]
+
+
+# Identifier columns are read as text so their values do not depend on whether
+# a chunk happens to contain blanks (which would turn 3923 into "3923.0").
+_AMAZON_MTR_TEXT_DTYPES = {
+    col: str for col in (
+        "Order Id", "Shipment Id", "Shipment Item Id", "Invoice Number", "Hsn/sac",
+        "Ship To Postal Code", "Bill To Postalcode",
+    )
+}
+
+
+def _amazon_mtr_records(df: pd.DataFrame, model, spec, unparseable: Counter = None) -> list:
+    """Build amazon_orders/amazon_returns (``model``) row dicts from MTR CSV rows."""
+    columns = transform_columns(df, spec, unparseable)
+    columns["marketplace"] = constant_column(df, "Amazon")
+    columns["row_hash"] = row_hashes(columns)
+    columns.update(derived_columns(model.__tablename__, columns))  # not hashed: they follow from the rest
+    return columns_to_records(columns)
+
+
+def _load_amazon_mtr_chunks(chunks, db: Session, progress: ProgressReporter, unparseable: Counter = None) -> tuple:
+    """
+    Write MTR CSV chunks, each in its own savepoint, then the sales ledger
+    rows of the periods they cover; the caller commits.
+    Returns (shipments, returns, updated, skipped, seller GSTINs); date cells
+    that could not be parsed are counted in ``unparseable``.
+    """
+    from models import AmazonOrder, AmazonReturn
+    shipments_count = 0
+    returns_count = 0
+    updated_count = 0
+    skipped_count = 0
+    seller_gstins = set()
+    seen_shipments, seen_returns = Counter(), Counter()
+    shipment_scopes, return_scopes = set(), set()
+
+    for chunk in chunks:
+        # Clean column names
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+
+        # Remove rows with missing Order Id
+        chunk = chunk[chunk["Order Id"].notna()]
+
+        transaction_types = str_stripped_column(chunk, "Transaction Type")
+        shipments_df = chunk[transaction_types == "Shipment"]
+        returns_df = chunk[pd.Series(transaction_types).isin(["Refund", "Cancel"]).to_numpy()]
+
+        # Rows are matched on (order_id, shipment_item_id): changed rows are
+        # updated in place, unchanged ones and repeats within the file skipped.
+        key = ("order_id", "shipment_item_id")
+        shipment_records = _amazon_mtr_records(shipments_df, AmazonOrder, _AMAZON_ORDER_SPEC, unparseable)
+        return_records = _amazon_mtr_records(returns_df, AmazonReturn, _AMAZON_RETURN_SPEC, unparseable)
+        shipment_scopes |= record_scopes(shipment_records, "seller_gstin")
+        return_scopes |= record_scopes(return_records, "seller_gstin")
+        with db.begin_nested():
+            inserted, updated, skipped = upsert_changed(
+                db, AmazonOrder, shipment_records, key, seen_shipments, progress=progress)
+            shipments_count += inserted
+            updated_count += updated
+            skipped_count += skipped
+            inserted, updated, skipped = upsert_changed(
+                db, AmazonReturn, return_records, key, seen_returns, progress=progress)
+            returns_count += inserted
+            updated_count += updated
+            skipped_count += skipped
+
+        if "Seller Gstin" in chunk.columns:
+            seller_gstins.update(chunk["Seller Gstin"].dropna().astype(str).str.strip())
+
+    # Once for the whole file: a period usually spans every chunk
+    with db.begin_nested():
+        refresh_ledger(db, AmazonOrder, shipment_scopes)
+        refresh_ledger(db, AmazonReturn, return_scopes)
+
+    return shipments_count, returns_count, updated_count, skipped_count, seller_gstins
+
+
+def import_amazon_mtr(filepath: str, db: Session, chunksize: int = CSV_CHUNK_SIZE,
+                      force: bool = False, progress: ProgressReporter = None) -> list:
     """
     Import Amazon MTR (Monthly Tax Report) from ZIP file containing CSV.
     Handles B2B and B2C reports with shipments, refunds, and cancellations.
+
+    The CSV is read and written ``chunksize`` rows at a time, each chunk in a
+    savepoint, and committed once at the end: a failure or a cancel through
+    ``progress`` saves nothing. A ZIP already in the import manifest is
+    skipped unless ``force`` is set.
     """
-    from models import AmazonOrder, AmazonReturn
+    started = time.perf_counter()
+    sha256, previous = check_manifest(db, filepath, "amazon_mtr", force)
+    if previous:
+        return skipped_messages(filepath, previous)
+
     messages = []
+    progress = progress or ProgressReporter()
+    unparseable = Counter()
     
     try:
-        # Extract ZIP file
-        extract_dir = _TEMP_EXTRACT_DIR
-        os.makedirs(extract_dir, exist_ok=True)
-        
-        with zipfile.ZipFile(filepath, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-        
-        # Find CSV file
-        csv_file = None
-        for file in os.listdir(extract_dir):
-            if file.endswith('.csv'):
-                csv_file = os.path.join(extract_dir, file)
-                break
-        
-        if not csv_file:
-            messages.append("❌ No CSV file found in ZIP")
-            shutil.rmtree(extract_dir, ignore_errors=True)
-            return messages
-        
-        # Read CSV
-        df = pd.read_csv(csv_file)
-        
-        # Clean column names
-        df.columns = [str(c).strip() for c in df.columns]
-        
-        # Remove rows with missing Order Id
-        df = df[df["Order Id"].notna()]
-        
-        shipments_count = 0
-        returns_count = 0
-        skipped_count = 0
-        
-        for _, row in df.iterrows():
-            transaction_type = str(row.get("Transaction Type", "")).strip()
-            order_id = str(row.get("Order Id", ""))
-            shipment_item_id = str(row.get("Shipment Item Id", ""))
-            
-            # Parse dates
-            order_date = parse_date(row.get("Order Date"))
-            shipment_date = parse_date(row.get("Shipment Date"))
-            invoice_date = parse_date(row.get("Invoice Date"))
-            
-            if transaction_type == "Shipment":
-                # Check if already exists
-                existing = db.query(AmazonOrder).filter(
-                    AmazonOrder.order_id == order_id,
-                    AmazonOrder.shipment_item_id == shipment_item_id
-                ).first()
-                if existing:
-                    skipped_count += 1
-                    continue
-                
-                # This is a shipment order
-                record = AmazonOrder(
-                    marketplace="Amazon",
-                    transaction_type=transaction_type,
-                    order_id=order_id,
-                    shipment_id=str(row.get("Shipment Id", "")),
-                    shipment_item_id=shipment_item_id,
-                    invoice_number=str(row.get("Invoice Number", "")),
-                    invoice_date=invoice_date,
-                    invoice_amount=safe_float(row.get("Invoice Amount")),
-                    order_date=order_date,
-                    shipment_date=shipment_date,
-                    quantity=int(row.get("Quantity") or 0),
-                    item_description=str(row.get("Item Description", "")),
-                    asin=str(row.get("Asin", "")),
-                    sku=str(row.get("Sku", "")),
-                    hsn_sac=str(row.get("Hsn/sac", "")),
-                    
-                    # Tax and pricing
-                    tax_exclusive_gross=safe_float(row.get("Tax Exclusive Gross")),
-                    total_tax_amount=safe_float(row.get("Total Tax Amount")),
-                    taxable_value=safe_float(row.get("Tax Exclusive Gross")),
-                    principal_amount=safe_float(row.get("Principal Amount")),
-                    shipping_amount=safe_float(row.get("Shipping Amount")),
-                    gift_wrap_amount=safe_float(row.get("Gift Wrap Amount")),
-                    
-                    # Tax breakdown
-                    igst_rate=normalize_gst_rate(row.get("Igst Rate")),
-                    igst_amount=safe_float(row.get("Igst Tax")),
-                    cgst_rate=normalize_gst_rate(row.get("Cgst Rate")),
-                    cgst_amount=safe_float(row.get("Cgst Tax")),
-                    sgst_rate=normalize_gst_rate(row.get("Sgst Rate")),
-                    sgst_amount=safe_float(row.get("Sgst Tax")),
-                    utgst_rate=normalize_gst_rate(row.get("Utgst Rate")),
-                    utgst_amount=safe_float(row.get("Utgst Tax")),
-                    compensatory_cess_rate=normalize_gst_rate(row.get("Compensatory Cess Rate")),
-                    compensatory_cess_amount=safe_float(row.get("Compensatory Cess Tax Amount")),
-                    
-                    # TCS
-                    tcs_igst_rate=normalize_gst_rate(row.get("Tcs Igst Rate")),
-                    tcs_igst_amount=safe_float(row.get("Tcs Igst Amount")),
-                    tcs_cgst_rate=normalize_gst_rate(row.get("Tcs Cgst Rate")),
-                    tcs_cgst_amount=safe_float(row.get("Tcs Cgst Amount")),
-                    tcs_sgst_rate=normalize_gst_rate(row.get("Tcs Sgst Rate")),
-                    tcs_sgst_amount=safe_float(row.get("Tcs Sgst Amount")),
-                    
-                    # Location
-                    ship_from_state=str(row.get("Ship From State", "")),
-                    ship_to_state=str(row.get("Ship To State", "")),
-                    ship_to_city=str(row.get("Ship To City", "")),
-                    ship_to_postal_code=str(row.get("Ship To Postal Code", "")),
-                    bill_to_state=str(row.get("Bill To State", "")),
-                    bill_to_city=str(row.get("Bill To City", "")),
-                    bill_to_postal_code=str(row.get("Bill To Postalcode", "")),
-                    
-                    # B2B specific
-                    seller_gstin=str(row.get("Seller Gstin", "")),
-                    customer_bill_to_gstid=str(row.get("Customer Bill To Gstid", "")),
-                    customer_ship_to_gstid=str(row.get("Customer Ship To Gstid", "")),
-                    buyer_name=str(row.get("Buyer Name", "")),
-                    
-                    # Warehouse
-                    warehouse_id=str(row.get("Warehouse Id", "")),
-                    fulfillment_channel=str(row.get("Fulfillment Channel", ""))
-                )
-                db.add(record)
-                shipments_count += 1
-                
-            elif transaction_type in ["Refund", "Cancel"]:
-                # Check if already exists
-                existing = db.query(AmazonReturn).filter(
-                    AmazonReturn.order_id == order_id,
-                    AmazonReturn.shipment_item_id == shipment_item_id
-                ).first()
-                if existing:
-                    skipped_count += 1
-                    continue
-                
-                # This is a return/cancellation
-                record = AmazonReturn(
-                    marketplace="Amazon",
-                    transaction_type=transaction_type,
-                    order_id=order_id,
-                    shipment_item_id=shipment_item_id,
-                    invoice_number=str(row.get("Invoice Number", "")),
-                    invoice_date=invoice_date,
-                    return_amount=safe_float(row.get("Invoice Amount")),
-                    order_date=order_date,
-                    quantity=int(row.get("Quantity") or 0),
-                    item_description=str(row.get("Item Description", "")),
-                    asin=str(row.get("Asin", "")),
-                    sku=str(row.get("Sku", "")),
-                    hsn_sac=str(row.get("Hsn/sac", "")),
-                    taxable_value=safe_float(row.get("Tax Exclusive Gross")),
-                    
-                    # Tax rates - normalized
-                    igst_rate=normalize_gst_rate(row.get("Igst Rate")),
-                    cgst_rate=normalize_gst_rate(row.get("Cgst Rate")),
-                    sgst_rate=normalize_gst_rate(row.get("Sgst Rate")),
-                    utgst_rate=normalize_gst_rate(row.get("Utgst Rate")),
-                    
-                    # Tax amounts
-                    igst_amount=safe_float(row.get("Igst Tax")),
-                    cgst_amount=safe_float(row.get("Cgst Tax")),
-                    sgst_amount=safe_float(row.get("Sgst Tax")),
-                    ship_to_state=str(row.get("Ship To State", "")),
-                    
-                    # B2B specific
-                    seller_gstin=str(row.get("Seller Gstin", "")),
-                    customer_bill_to_gstid=str(row.get("Customer Bill To Gstid", "")),
-                    buyer_name=str(row.get("Buyer Name", ""))
-                )
-                db.add(record)
-                returns_count += 1
-        
+        # The CSV is streamed straight out of the ZIP - nothing is extracted to disk
+        with open_member(filepath, lambda f: f.endswith('.csv')) as csv_file:
+            if csv_file is None:
+                messages.append("❌ No CSV file found in ZIP")
+                return messages
+
+            # Stream the CSV in fixed-size chunks; each chunk is transformed and
+            # written on its own so memory stays flat for annual FBA dumps.
+            progress.start("Amazon MTR")
+            reader = pd.read_csv(csv_file, chunksize=chunksize, dtype=_AMAZON_MTR_TEXT_DTYPES)
+            totals = _load_amazon_mtr_chunks(reader, db, progress, unparseable)
         db.commit()
+        shipments_count, returns_count, updated_count, skipped_count, seller_gstins = totals
+
         messages.append("Amazon MTR Report imported:")
         messages.append(f"   📦 {shipments_count} shipments")
         messages.append(f"   🔄 {returns_count} returns/cancellations")
+        if updated_count > 0:
+            messages.append(f"   ✏️ {updated_count} rows updated (changed since last import)")
         if skipped_count > 0:
             messages.append(f"   ⏭️ {skipped_count} duplicates skipped")
+        messages.extend(_unparseable_date_messages(unparseable))
+        record_import(db, filepath, sha256, "amazon_mtr", "Amazon",
+                      shipments_count + returns_count + updated_count, started,
+                      gstin=seller_gstins.pop() if len(seller_gstins) == 1 else None)
         
-        # Clean up extracted files
-        shutil.rmtree(extract_dir, ignore_errors=True)
-        
+    except ImportCancelled:
+        db.rollback()
+        messages.append(CANCELLED_MESSAGE)
     except Exception as e:
         db.rollback()
         messages.append(f"❌ Error importing Amazon MTR Report: {e}")
-        shutil.rmtree(extract_dir, ignore_errors=True)
     
     return messages
 
 
-def import_amazon_gstr1(filepath: str, db: Session) -> list:
+def import_amazon_gstr1(filepath: str, db: Session, force: bool = False,
+                        progress: ProgressReporter = None) -> list:
     """
     Import Amazon GSTR-1 Report (Excel file with B2B, B2C, HSN Summary sheets).
     This report contains aggregated tax data for GST filing purposes.
     The data is validated and can be used as reference for GST exports.
+    A ZIP already in the import manifest is skipped unless ``force`` is set.
+    ``progress`` counts the sheets checked and can cancel the check.
     """
+    started = time.perf_counter()
+    sha256, previous = check_manifest(db, filepath, "amazon_gstr1", force)
+    if previous:
+        return skipped_messages(filepath, previous)
+
     messages = []
     
     try:
-        # Extract ZIP file
-        extract_dir = _TEMP_EXTRACT_DIR
-        os.makedirs(extract_dir, exist_ok=True)
-        
-        with zipfile.ZipFile(filepath, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
+        # Read the Excel file from the ZIP in memory
+        excel_file = load_member(filepath, lambda f: f.endswith('.xlsx'))
         
-        # Find Excel file
-        excel_file = None
-        for file in os.listdir(extract_dir):
-            if file.endswith('.xlsx'):
-                excel_file = os.path.join(extract_dir, file)
-                break
-        
-        if not excel_file:
+        if excel_file is None:
             messages.append("❌ No Excel file found in ZIP")
-            shutil.rmtree(extract_dir, ignore_errors=True)
             return messages
         
         messages.append("ℹ️  Amazon GSTR-1 Report detected (aggregated tax data)")
         messages.append("ℹ️  This report contains B2B, B2C, and HSN summary for GST filing.")
         
-        # Read the file to validate and show what's available
-        xl = pd.ExcelFile(excel_file)
+        # Validate and show what's available. Row counts come from the sheet
+        # XML; only B2C Small and HSN Summary are parsed, for their totals.
+        row_counts = sheet_row_counts(excel_file)
         messages.append("\nGSTR-1 Report Sections found:")
         
         b2c_small_data = None
         hsn_summary_data = None
+        progress = progress or ProgressReporter()
+        progress.start("Amazon GSTR-1 sheets", len(row_counts))
         
-        for sheet in xl.sheet_names:
-            df = pd.read_excel(excel_file, sheet_name=sheet)
-            
+        for sheet, row_count in row_counts.items():
+            progress.advance(1)
             if sheet == "B2C Small":
                 # Read B2C Small data (starts from row 4)
-                b2c_small_data = pd.read_excel(excel_file, sheet_name=sheet, header=3)
+                b2c_small_data = read_sheet(excel_file, sheet_name=sheet, header=3)
                 b2c_small_data.columns = [str(c).strip() for c in b2c_small_data.columns]
                 valid_rows = len(b2c_small_data.dropna(how='all'))
                 messages.append(f"   • {sheet} ({valid_rows} records)")
@@ -1110,7 +1364,7 @@ def import_amazon_gstr1(filepath: str, db: Session) -> list:
             
             elif sheet == "HSN Summary":
                 # Read HSN Summary data (starts from row 4)
-                hsn_summary_data = pd.read_excel(excel_file, sheet_name=sheet, header=3)
+                hsn_summary_data = read_sheet(excel_file, sheet_name=sheet, header=3)
                 hsn_summary_data.columns = [str(c).strip() for c in hsn_summary_data.columns]
                 valid_rows = len(hsn_summary_data.dropna(how='all'))
                 messages.append(f"   • {sheet} ({valid_rows} records)")
@@ -1121,21 +1375,19 @@ def import_amazon_gstr1(filepath: str, db: Session) -> list:
             
             elif sheet == "GSTIN":
                 messages.append(f"   • {sheet} (GSTIN info)")
-            elif len(df) > 3:  # Has data beyond header
-                messages.append(f"   • {sheet} ({len(df) - 3} records)")
+            elif row_count > 3:  # Has data beyond header
+                messages.append(f"   • {sheet} ({row_count - 3} records)")
             else:
                 messages.append(f"   • {sheet} (summary only)")
         
         messages.append("\n✅ Amazon GSTR-1 Report validated successfully.")
         messages.append("ℹ️  Data ready for use in B2CS CSV and HSN CSV exports.")
         messages.append("ℹ️  Note: GSTR-1 contains pre-aggregated data. For order-level details, use MTR reports.")
+        record_import(db, filepath, sha256, "amazon_gstr1", "Amazon", 0, started)
         
-        # Clean up extracted files
-        shutil.rmtree(extract_dir, ignore_errors=True)
-        
+    except ImportCancelled:
+        messages.append(CANCELLED_MESSAGE)
     except Exception as e:
         messages.append(f"❌ Error importing Amazon GSTR-1 Report: {e}")
-        if 'extract_dir' in locals():
-            shutil.rmtree(extract_dir, ignore_errors=True)
     
     return messages
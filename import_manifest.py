@@ -0,0 +1,100 @@
+"""
+Import manifest: which source files have already been imported.
+
+Every importer hashes its file and looks the SHA-256 up in the
+``import_manifest`` table first. An identical file that was imported
+before returns straight away instead of being parsed and compared row by
+row against the stored data again. Pass ``force=True`` to an importer to
+import the file anyway.
+"""
+import hashlib
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from models import ImportManifest
+
+HASH_CHUNK_SIZE = 1 << 20  # bytes read per hashing step
+
+def file_sha256(filepath: str) -> str:
+    """Hex SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_import(db: Session, sha256: str, report_type: str) -> ImportManifest | None:
+    """Manifest entry for this file content and importer, if it was imported before."""
+    return db.query(ImportManifest).filter(
+        ImportManifest.sha256 == sha256,
+        ImportManifest.report_type == report_type,
+    ).first()
+
+
+def check_manifest(db: Session, filepath: str, report_type: str, force: bool = False) -> tuple:
+    """
+    Hash ``filepath`` and look it up.
+
+    Returns:
+        ``(sha256, previous)`` - ``previous`` is the manifest entry of an
+        earlier import of the same content (the caller should return
+        :func:`skipped_messages`), or None when the file should be imported
+    """
+    sha256 = file_sha256(filepath)
+    previous = None if force else find_import(db, sha256, report_type)
+    return sha256, previous
+
+
+def skipped_messages(filepath: str, entry: ImportManifest) -> list:
+    """Status messages for a file skipped because ``entry`` already imported it."""
+    details = f"{entry.rows_imported} rows" if entry.rows_imported is not None else "no rows"
+    if entry.gstin:
+        details += f", GSTIN {entry.gstin}"
+    if entry.financial_year and entry.month_number:
+        details += f", FY {entry.financial_year} Month {entry.month_number}"
+    return [
+        f"⏭️ {os.path.basename(filepath)} was already imported on "
+        f"{entry.imported_at:%Y-%m-%d %H:%M} ({details}) - skipped.",
+        "ℹ️  Use force re-import to load the same file again.",
+    ]
+
+
+def record_import(db: Session, filepath: str, sha256: str, report_type: str, marketplace: str,
+                  rows: int, started: float, gstin: str = None, financial_year: int = None,
+                  month_number: int = None, replaces_period: bool = False):
+    """
+    Add (or, after a forced re-import, refresh) the manifest entry for a finished import, and commit.
+
+    Args:
+        started: ``time.perf_counter()`` value taken when the import began
+        replaces_period: The import replaced all data for ``gstin`` and the
+            period (Meesho), so earlier files for that period are forgotten -
+            re-uploading one of them must import it again
+    """
+    if replaces_period and gstin and financial_year and month_number:
+        db.query(ImportManifest).filter(
+            ImportManifest.report_type == report_type,
+            ImportManifest.gstin == gstin,
+            ImportManifest.financial_year == financial_year,
+            ImportManifest.month_number == month_number,
+            ImportManifest.sha256 != sha256,
+        ).delete(synchronize_session=False)
+
+    entry = find_import(db, sha256, report_type)
+    if entry is None:
+        entry = ImportManifest(sha256=sha256, report_type=report_type)
+        db.add(entry)
+    entry.file_name = os.path.basename(filepath)
+    entry.file_size = os.path.getsize(filepath)
+    entry.marketplace = marketplace
+    entry.gstin = gstin
+    entry.financial_year = financial_year
+    entry.month_number = month_number
+    entry.rows_imported = rows
+    entry.duration_seconds = time.perf_counter() - started
+    entry.imported_at = datetime.now()
+    db.commit()
@@ -0,0 +1,134 @@
+"""
+Progress reporting and cancellation for long imports.
+
+Importers accept an optional :class:`ProgressReporter`. The bulk write
+helpers advance it after every batch, which is also where a
+:class:`CancelToken` set from another thread (the GUI's Cancel button) is
+noticed: :meth:`ProgressReporter.advance` raises :class:`ImportCancelled`,
+and the importer rolls back everything it wrote for the file.
+"""
+import threading
+import time
+
+PROGRESS_INTERVAL = 0.1  # seconds between callback calls
+
+CANCELLED_MESSAGE = "❌ Import cancelled - no changes were saved."
+
+
+class ImportCancelled(BaseException):
+    """
+    Raised inside an import when its token is cancelled.
+
+    A BaseException (like ``asyncio.CancelledError``) so the importers'
+    ``except Exception`` error handlers let it through to the code that
+    owns the transaction.
+    """
+
+
+class CancelToken:
+    """Thread-safe cancellation flag shared between the caller and a running import."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class ProgressReporter:
+    """
+    Counts rows processed by an import and reports rows/sec and ETA.
+
+    Args:
+        callback: Called with :meth:`snapshot` dicts, at most every
+            ``interval`` seconds and once more when a stage completes
+        token: :class:`CancelToken` checked on every :meth:`advance`
+        interval: Minimum seconds between callback calls
+    """
+
+    def __init__(self, callback=None, token: CancelToken = None, interval: float = PROGRESS_INTERVAL):
+        self.callback = callback
+        self.token = token
+        self.interval = interval
+        self.stage = ""
+        self.total = None
+        self.rows = 0
+        self._started = time.perf_counter()
+        self._reported = 0.0
+
+    def start(self, stage: str, total: int = None):
+        """Begin a stage (e.g. one sheet) of ``total`` rows; None when the size is unknown."""
+        self.check()
+        self.stage = stage
+        self.total = total
+        self.rows = 0
+        self._started = time.perf_counter()
+        self._reported = 0.0
+        self._report()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token is not None and self.token.cancelled
+
+    def check(self):
+        """Raise :class:`ImportCancelled` if the token was cancelled."""
+        if self.cancelled:
+            raise ImportCancelled()
+
+    def advance(self, rows: int):
+        """Record ``rows`` more rows processed, report, and check for cancellation."""
+        self.rows += rows
+        now = time.perf_counter()
+        if now - self._reported >= self.interval or (self.total is not None and self.rows >= self.total):
+            self._report(now)
+        self.check()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    @property
+    def rows_per_sec(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> float | None:
+        """Seconds left at the current rate; None while the total or the rate is unknown."""
+        rate = self.rows_per_sec
+        if self.total is None or rate <= 0:
+            return None
+        return max(self.total - self.rows, 0) / rate
+
+    def snapshot(self) -> dict:
+        """``{"stage", "rows", "total", "elapsed", "rows_per_sec", "eta_seconds"}``"""
+        return {
+            "stage": self.stage,
+            "rows": self.rows,
+            "total": self.total,
+            "elapsed": self.elapsed,
+            "rows_per_sec": self.rows_per_sec,
+            "eta_seconds": self.eta_seconds,
+        }
+
+    def _report(self, now: float = None):
+        self._reported = time.perf_counter() if now is None else now
+        if self.callback is not None:
+            self.callback(self.snapshot())
+
+
+def format_progress(snapshot: dict) -> str:
+    """One status line for a :meth:`ProgressReporter.snapshot`."""
+    done = f"{snapshot['rows']:,}"
+    if snapshot["total"]:
+        done += f"/{snapshot['total']:,} rows ({snapshot['rows'] / snapshot['total']:.0%})"
+    else:
+        done += " rows"
+    line = f"{snapshot['stage']}: {done}, {snapshot['rows_per_sec']:,.0f} rows/sec"
+    if snapshot["eta_seconds"] is not None:
+        line += f", ETA {snapshot['eta_seconds']:.0f}s"
+    return line
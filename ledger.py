@@ -0,0 +1,327 @@
+"""
+Cross-marketplace sales ledger: the ``sales_ledger`` fact table.
+
+Each marketplace table names its columns its own way (``end_customer_state_new``
+vs ``customer_delivery_state`` vs ``ship_to_state``, ``total_taxable_sale_value``
+vs ``taxable_value``, ...). The ledger holds one normalized row per taxable
+line of all of them: GSTIN, period, marketplace, document type, place-of-supply
+state code, rate, HSN, quantity and amounts. Credit notes and cancellations
+carry negative amounts, so a period's net figures are plain sums.
+
+Every import rebuilds the ledger rows of the GSTINs and periods it wrote
+(:func:`refresh_ledger`) in its own transaction; migration 6 fills it for
+existing databases (:func:`rebuild_ledger`). One period of one GSTIN is a
+single range of ``ix_sales_ledger_gstin_period`` (:func:`ledger_totals`).
+"""
+import csv
+import os
+
+import pandas as pd
+from sqlalchemy import delete, func, insert, select
+
+from constants import b2b_mask, resolve_gstin, state_codes
+from models import (
+    AmazonOrder, AmazonReturn, FlipkartOrder, FlipkartReturn, MeeshoReturn, MeeshoSale, SalesLedger,
+)
+
+BATCH_SIZE = 5000  # source rows read and ledger rows written per statement
+
+INVOICE = "invoice"
+CREDIT_NOTE = "credit_note"
+CANCELLATION = "cancellation"
+
+# Source model -> (seller GSTIN column, document type of its rows, row filter).
+# The filter keeps the table's report index usable and matches what the imports write.
+LEDGER_SOURCES = {
+    MeeshoSale: ("gstin", INVOICE, None),
+    MeeshoReturn: ("gstin", CREDIT_NOTE, None),
+    FlipkartOrder: ("seller_gstin", INVOICE, ("event_type", "Sale")),
+    FlipkartReturn: ("seller_gstin", CREDIT_NOTE, None),
+    AmazonOrder: ("seller_gstin", INVOICE, ("transaction_type", "Shipment")),
+    AmazonReturn: ("seller_gstin", CREDIT_NOTE, None),
+}
+
+# Meesho tables: ledger column -> source column
+_MEESHO_COLUMNS = {
+    "gst_rate": "gst_rate",
+    "hsn_code": "hsn_code",
+    "quantity": "quantity",
+    "taxable_value": "total_taxable_sale_value",
+    "tax_amount": "tax_amount",
+    "state": "end_customer_state_new",
+}
+
+# Flipkart and Amazon tables (after the derived columns of migration 5)
+_MARKETPLACE_COLUMNS = {
+    "flipkart": {
+        "marketplace": "marketplace", "is_b2b": "is_b2b", "pos_state_code": "pos_state_code",
+        "gst_rate": "effective_gst_rate", "hsn_code": "hsn_code", "quantity": "quantity",
+        "taxable_value": "taxable_value", "igst_amount": "igst_amount", "cgst_amount": "cgst_amount",
+        "sgst_amount": "sgst_amount", "invoice_number": "buyer_invoice_id", "detail": "event_sub_type",
+    },
+    "amazon": {
+        "marketplace": "marketplace", "is_b2b": "is_b2b", "pos_state_code": "pos_state_code",
+        "gst_rate": "effective_gst_rate", "hsn_code": "hsn_sac", "quantity": "quantity",
+        "taxable_value": "taxable_value", "igst_amount": "igst_amount", "cgst_amount": "cgst_amount",
+        "sgst_amount": "sgst_amount", "invoice_number": "invoice_number",
+        "buyer_gstin": "customer_bill_to_gstid", "detail": "transaction_type",
+    },
+}
+
+# Return-table rows that are cancellations rather than credit notes, by source detail column
+_CANCELLATIONS = {"Cancellation", "Cancel"}
+
+
+def _source_columns(model) -> dict:
+    """Ledger column -> source column of ``model``."""
+    gstin_column = LEDGER_SOURCES[model][0]
+    common = {"source_id": "id", "gstin": gstin_column,
+              "financial_year": "financial_year", "month_number": "month_number"}
+    if model in (MeeshoSale, MeeshoReturn):
+        return {**common, **_MEESHO_COLUMNS}
+    marketplace = "flipkart" if model in (FlipkartOrder, FlipkartReturn) else "amazon"
+    return {**common, **_MARKETPLACE_COLUMNS[marketplace]}
+
+
+def _source_select(model):
+    """SELECT of the source columns (labelled with their ledger names) of ``model``."""
+    table = model.__table__
+    query = select(*(table.c[source].label(name) for name, source in _source_columns(model).items()))
+    row_filter = LEDGER_SOURCES[model][2]
+    if row_filter:
+        query = query.where(table.c[row_filter[0]] == row_filter[1])
+    return query
+
+
+def _nullable(series: pd.Series) -> list:
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _integers(series: pd.Series) -> list:
+    return _nullable(pd.to_numeric(series, errors="coerce").astype("Int64"))
+
+
+def _signed(frame: pd.DataFrame, name: str, negative) -> list:
+    """``frame[name]`` as floats, made negative on credit note and cancellation rows (None stays None)."""
+    if name not in frame.columns:
+        return [None] * len(frame)
+    values = pd.to_numeric(frame[name], errors="coerce").abs()
+    return _nullable(values.where(~negative, -values))
+
+
+def _buyer_gstins(values: pd.Series) -> list:
+    """Buyer GSTINs, None where :func:`constants.b2b_mask` sees no buyer (NULL, '' or 'nan')."""
+    return _nullable(values.where(b2b_mask(values), None))
+
+
+def _hsn_codes(values: pd.Series) -> list:
+    """HSN as text: Meesho stores integers, the others strings; blank, 0 and 'nan' are None."""
+    codes = []
+    for value in values.tolist():
+        if isinstance(value, float) and value == value and value.is_integer():
+            value = int(value)
+        text = "" if value is None or value != value else str(value).strip()
+        codes.append(None if text in ("", "0", "nan") else text)
+    return codes
+
+
+def ledger_records(model, frame: pd.DataFrame) -> list:
+    """``sales_ledger`` row dicts for source rows of ``model`` read with :func:`_source_select`."""
+    if frame.empty:
+        return []
+    document_type = LEDGER_SOURCES[model][1]
+    n = len(frame)
+    document_types = pd.Series([document_type] * n, index=frame.index, dtype=object)
+    if document_type == CREDIT_NOTE and "detail" in frame.columns:
+        document_types[frame["detail"].isin(_CANCELLATIONS)] = CANCELLATION
+    negative = (document_types != INVOICE).to_numpy()
+
+    if "state" in frame.columns:  # Meesho: B2C only, no tax split
+        marketplace = ["Meesho"] * n
+        is_b2b = [False] * n
+        pos_state_codes = state_codes(frame["state"].tolist())
+        tax_amount = _signed(frame, "tax_amount", negative)
+    else:
+        marketplace = _nullable(frame["marketplace"])
+        is_b2b = [bool(flag) for flag in frame["is_b2b"].fillna(False).tolist()]
+        pos_state_codes = _nullable(frame["pos_state_code"])
+        split = frame[["igst_amount", "cgst_amount", "sgst_amount"]].apply(pd.to_numeric, errors="coerce").abs()
+        tax = split.sum(axis=1, min_count=1)
+        tax_amount = _nullable(tax.where(~negative, -tax))
+
+    columns = {
+        "source_table": [model.__tablename__] * n,
+        "source_id": frame["source_id"].tolist(),
+        "marketplace": marketplace,
+        "gstin": _nullable(frame["gstin"]),
+        "financial_year": _integers(frame["financial_year"]),
+        "month_number": _integers(frame["month_number"]),
+        "document_type": document_types.tolist(),
+        "is_b2b": is_b2b,
+        "buyer_gstin": _buyer_gstins(frame["buyer_gstin"]) if "buyer_gstin" in frame.columns else [None] * n,
+        "invoice_number": _nullable(frame["invoice_number"]) if "invoice_number" in frame.columns else [None] * n,
+        "pos_state_code": pos_state_codes,
+        "gst_rate": _nullable(pd.to_numeric(frame["gst_rate"], errors="coerce")),
+        "hsn_code": _hsn_codes(frame["hsn_code"]),
+        "quantity": _integers(frame["quantity"]),
+        "taxable_value": _signed(frame, "taxable_value", negative),
+        "igst_amount": _signed(frame, "igst_amount", negative),
+        "cgst_amount": _signed(frame, "cgst_amount", negative),
+        "sgst_amount": _signed(frame, "sgst_amount", negative),
+        "tax_amount": tax_amount,
+    }
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+def _read(db, model, query) -> list:
+    """Ledger row dicts of the source rows of ``model`` that ``query`` selects."""
+    result = db.execute(query)
+    return ledger_records(model, pd.DataFrame(result.fetchall(), columns=list(result.keys())))
+
+
+def _insert(db, records: list) -> int:
+    """
+    Insert ledger rows. ``OR REPLACE`` drops a ledger row of the same source
+    row filed under another scope (one whose GSTIN or period an update changed).
+    """
+    stmt = insert(SalesLedger.__table__).prefix_with("OR REPLACE")
+    for start in range(0, len(records), BATCH_SIZE):
+        db.execute(stmt, records[start:start + BATCH_SIZE])
+    return len(records)
+
+
+def refresh_ledger(db, model, scopes) -> int:
+    """
+    Rebuild the ledger rows of ``model``'s table for each ``(gstin,
+    financial_year, month_number)`` in ``scopes``: rows of source rows that
+    were deleted go, inserted and updated ones are (re)written. Imports call
+    it with the scopes they wrote, before committing. ``db`` is a session or
+    a connection; nothing is committed.
+
+    Returns:
+        Number of ledger rows written
+    """
+    table = model.__table__
+    gstin_column = table.c[LEDGER_SOURCES[model][0]]
+    written = 0
+    for gstin, financial_year, month_number in sorted(scopes, key=repr):
+        db.execute(delete(SalesLedger).where(
+            SalesLedger.gstin == gstin,
+            SalesLedger.financial_year == financial_year,
+            SalesLedger.month_number == month_number,
+            SalesLedger.source_table == table.name,
+        ))
+        written += _insert(db, _read(db, model, _source_select(model).where(
+            gstin_column == gstin,
+            table.c.financial_year == financial_year,
+            table.c.month_number == month_number,
+        )))
+    return written
+
+
+def record_scopes(records: list, gstin_column: str) -> set:
+    """The ``(gstin, financial_year, month_number)`` scopes of imported row dicts."""
+    return {(r[gstin_column], r["financial_year"], r["month_number"]) for r in records}
+
+
+def rebuild_ledger(db, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Empty the ledger and fill it from every marketplace table, ``batch_size``
+    source rows at a time (keyset pagination on id). Used by migration 6;
+    nothing is committed. Returns the number of ledger rows written.
+    """
+    db.execute(delete(SalesLedger))
+    written = 0
+    for model in LEDGER_SOURCES:
+        id_column, last_id = model.__table__.c.id, 0
+        while True:
+            records = _read(db, model, _source_select(model).where(id_column > last_id)
+                            .order_by(id_column).limit(batch_size))
+            if not records:
+                break
+            written += _insert(db, records)
+            last_id = records[-1]["source_id"]
+    return written
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+_TOTALS_KEY = (
+    SalesLedger.marketplace, SalesLedger.document_type, SalesLedger.is_b2b,
+    SalesLedger.pos_state_code, SalesLedger.gst_rate,
+)
+
+
+def ledger_totals(db, gstin: str, financial_year: int, month_number: int) -> list:
+    """
+    Quantity and amounts of one GSTIN's period, per marketplace, document
+    type, B2B flag, place of supply and rate - one query over the ledger index.
+    Returns a list of dicts sorted by those keys.
+    """
+    rows = db.execute(
+        select(
+            *_TOTALS_KEY,
+            func.count().label("lines"),
+            func.sum(SalesLedger.quantity).label("quantity"),
+            func.sum(SalesLedger.taxable_value).label("taxable_value"),
+            func.sum(SalesLedger.igst_amount).label("igst_amount"),
+            func.sum(SalesLedger.cgst_amount).label("cgst_amount"),
+            func.sum(SalesLedger.sgst_amount).label("sgst_amount"),
+            func.sum(SalesLedger.tax_amount).label("tax_amount"),
+        )
+        .where(
+            SalesLedger.gstin == gstin,
+            SalesLedger.financial_year == financial_year,
+            SalesLedger.month_number == month_number,
+        )
+        .group_by(*_TOTALS_KEY)
+        .order_by(*_TOTALS_KEY)
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+_SUMMARY_FIELDS = [
+    "Marketplace", "Document Type", "Supply Type", "Place Of Supply", "Rate", "Lines", "Quantity",
+    "Taxable Value", "Integrated Tax Amount", "Central Tax Amount", "State/UT Tax Amount", "Tax Amount",
+]
+
+
+def _rounded(value):
+    return round(value, 2) if value is not None else ""
+
+
+def generate_ledger_summary_csv(financial_year, month_number, gstin_or_supplier_id, db,
+                                file_path=None, output_folder=None):
+    """
+    Cross-marketplace summary of a period from the sales ledger: net quantity,
+    taxable value and tax per marketplace, document type, B2B/B2C, place of
+    supply and rate (credit notes and cancellations are negative).
+    """
+    gstin = resolve_gstin(gstin_or_supplier_id, db)
+    totals = ledger_totals(db, gstin, financial_year, month_number)
+    if not file_path:
+        file_path = os.path.join(output_folder or "", "ledger_summary.csv")
+
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=_SUMMARY_FIELDS)
+        writer.writeheader()
+        for row in totals:
+            writer.writerow({
+                "Marketplace": row["marketplace"] or "",
+                "Document Type": row["document_type"],
+                "Supply Type": "B2B" if row["is_b2b"] else "B2C",
+                "Place Of Supply": row["pos_state_code"] or "",
+                "Rate": row["gst_rate"] if row["gst_rate"] is not None else "",
+                "Lines": row["lines"],
+                "Quantity": row["quantity"] or 0,
+                "Taxable Value": _rounded(row["taxable_value"]),
+                "Integrated Tax Amount": _rounded(row["igst_amount"]),
+                "Central Tax Amount": _rounded(row["cgst_amount"]),
+                "State/UT Tax Amount": _rounded(row["sgst_amount"]),
+                "Tax Amount": _rounded(row["tax_amount"]),
+            })
+
+    return f"✅ Ledger summary CSV written to {file_path} with {len(totals)} rows."
@@ -3,6 +3,7 @@ from models import MeeshoSale, MeeshoReturn
 from collections import defaultdict
 import csv
 import logging
+import numpy as np
 import pandas as pd
 import os
 from datetime import datetime
@@ -13,8 +14,9 @@ from constants import (
     STATE_CODE_MAPPING,
     get_state_code, generate_note_number,
     NoteType,
-    normalize_rate, fy_month_to_date_range, resolve_gstin,
+    normalize_rate, normalize_rates, effective_gst_rates, resolve_gstin,
 )
+from scratch import scratch_dir
 
 _APP_DIR = os.path.dirname(os.path.abspath(__file__))
 _CONFIG_FILE = os.path.join(_APP_DIR, "config.json")
@@ -72,18 +74,17 @@ def read_flipkart_gst_b2cs_data(excel_file_path):
     """
     try:
         df = pd.read_excel(excel_file_path, sheet_name="Section 7(B)(2) in GSTR-1")
+        rates = normalize_rates(df['IGST %'] if 'IGST %' in df.columns else np.zeros(len(df))).tolist()
         
         data = {}
-        for _, row in df.iterrows():
+        for (_, row), rate_normalized in zip(df.iterrows(), rates):
             state = str(row.get('Delivered State (PoS)', '')).strip()
-            rate = row.get('IGST %', 0)
             taxable_value = row.get('Aggregate Taxable Value Rs.', 0)
             
             if state and taxable_value:
                 # Normalize state to match our STATE_CODE_MAPPING format
                 state_upper = state.upper()
                 normalized_state = STATE_CODE_MAPPING.get(state_upper, state)
-                rate_normalized = normalize_rate(rate)
                 
                 key = (normalized_state, rate_normalized)
                 data[key] = data.get(key, 0) + taxable_value
@@ -101,9 +102,21 @@ def read_flipkart_gst_hsn_data(excel_file_path):
     """
     try:
         df = pd.read_excel(excel_file_path, sheet_name="Section 12 in GSTR-1")
+
+        # Rate from the tax amounts (IGST, else CGST + SGST), snapped to the nearest official GST rate
+        igst_col, cgst_col, sgst_col, taxable_col = (
+            df[name].to_numpy(dtype="float64") if name in df.columns else np.zeros(len(df))
+            for name in ('IGST Amount Rs.', 'CGST Amount Rs.', 'SGST Amount Rs.', 'Total Taxable Value Rs.')
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            use_igst = igst_col > 0
+            use_split = ~use_igst & (cgst_col != 0) & (sgst_col != 0)
+            raw_rates = np.where(use_igst, igst_col, cgst_col + sgst_col) / taxable_col * 100
+        raw_rates[~(use_igst | use_split)] = 0
+        rates = approximate_gst_rates(normalize_rates(raw_rates), slabs=GST_SLAB_TABLE).tolist()
         
         data = {}
-        for _, row in df.iterrows():
+        for (_, row), rate_normalized in zip(df.iterrows(), rates):
             hsn = str(row.get('HSN Number', '')).strip()
             qty = row.get('Total Quantity in Nos.', 0)
             total_value = row.get('Total\n Value Rs.', 0)
@@ -114,15 +127,6 @@ def read_flipkart_gst_hsn_data(excel_file_path):
             cess = row.get('Cess Rs.', 0)
             
             if hsn and taxable_value:
-                # Calculate rate from tax amounts, then snap to nearest GST slab
-                if igst and igst > 0:
-                    rate = (igst / taxable_value) * 100 if taxable_value else 0
-                elif cgst and sgst:
-                    rate = ((cgst + sgst) / taxable_value) * 100 if taxable_value else 0
-                else:
-                    rate = 0
-
-                rate_normalized = approximate_gst_rate(normalize_rate(rate))
                 key = (hsn, rate_normalized)
                 
                 data[key] = {
@@ -154,10 +158,39 @@ def _extract_flipkart_excel_gstin(excel_file_path):
         pass
     return None
 
-GST_SLABS = [5.0, 12.0, 18.0]
+GST_SLABS = [5.0, 12.0, 18.0]  # default of the approximate_gst_rate helpers, as they have always snapped
+
+# Every GST rate a supply can carry (percent), nil-rated and special rates included
+GST_SLAB_TABLE = [0.0, 0.1, 0.25, 3.0, 5.0, 12.0, 18.0, 28.0]
 
-def approximate_gst_rate(raw_rate):
-    return min(GST_SLABS, key=lambda x: abs(x - raw_rate))
+def approximate_gst_rate(raw_rate, slabs=GST_SLABS):
+    return min(slabs, key=lambda x: abs(x - raw_rate))
+
+def approximate_gst_rates(raw_rates, slabs=GST_SLABS) -> np.ndarray:
+    """
+    :func:`approximate_gst_rate` for an array: the nearest of the sorted
+    ``slabs`` by binary search, the lower one on a tie (NaN gives the first).
+    """
+    rates = np.asarray(raw_rates, dtype="float64")
+    slabs = np.asarray(slabs, dtype="float64")
+    upper = np.clip(np.searchsorted(slabs, rates), 1, len(slabs) - 1)
+    lower = upper - 1
+    nearest = np.where(np.abs(slabs[upper] - rates) < np.abs(slabs[lower] - rates), slabs[upper], slabs[lower])
+    nearest[np.isnan(rates)] = slabs[0]
+    return nearest
+
+def _line_rates(lines, default=None, positive_igst=True) -> list:
+    """
+    GST rate (percent) of every Flipkart/Amazon line: the IGST rate when set,
+    else CGST + SGST when both are, else ``default``. The same values as
+    calling normalize_rate() on the chosen field line by line.
+
+    ``positive_igst`` only takes IGST rates above zero (otherwise any non-zero one).
+    """
+    rates = effective_gst_rates(
+        [line.igst_rate for line in lines], [line.cgst_rate for line in lines], [line.sgst_rate for line in lines],
+        positive_igst)
+    return [default if rate != rate else rate for rate in rates.tolist()]  # NaN: no rate set
 
 def get_gstin_for_supplier(supplier_id: int, db: Session):
     from models import SellerMapping
@@ -261,9 +294,6 @@ def generate_gst_pivot_csv(financial_year, month_number, gstin_or_supplier_id, d
         for row in b2cs_rows:
             combined_data[(row["state"], round(row["gst_rate"], 2))] = combined_data.get((row["state"], round(row["gst_rate"], 2)), 0) + row["total_taxable_value"]
 
-    # Calculate date range for Flipkart and Amazon queries
-    month_start, month_end = fy_month_to_date_range(financial_year, month_number)
-
     # 2. Flipkart - Use certified GST Excel data when configured (validate GSTIN match)
     flipkart_excel = get_flipkart_gst_excel_path()
     use_flipkart_excel = False
@@ -280,21 +310,17 @@ def generate_gst_pivot_csv(financial_year, month_number, gstin_or_supplier_id, d
         # Use database (GSTIN-filtered)
         flipkart_query = db.query(FlipkartOrder).filter(
             FlipkartOrder.event_type == 'Sale',
-            FlipkartOrder.order_date >= month_start,
-            FlipkartOrder.order_date < month_end,
+            FlipkartOrder.financial_year == financial_year,
+            FlipkartOrder.month_number == month_number,
             FlipkartOrder.seller_gstin == gstin
         )
         flipkart_orders = flipkart_query.all()
         
-        for order in flipkart_orders:
+        for order, gst_rate in zip(flipkart_orders, _line_rates(flipkart_orders)):
             delivery_state = str(order.customer_delivery_state or "").strip().upper()
             delivery_state_normalized = get_state_code(delivery_state)
             
-            if order.igst_rate and order.igst_rate > 0:
-                gst_rate = normalize_rate(order.igst_rate)
-            elif order.cgst_rate and order.sgst_rate:
-                gst_rate = normalize_rate(order.cgst_rate + order.sgst_rate)
-            else:
+            if gst_rate is None:
                 continue
             
             taxable_value = order.taxable_value or 0
@@ -303,20 +329,16 @@ def generate_gst_pivot_csv(financial_year, month_number, gstin_or_supplier_id, d
                 combined_data[key] = combined_data.get(key, 0) + taxable_value
 
         flipkart_returns = db.query(FlipkartReturn).filter(
-            FlipkartReturn.order_date >= month_start,
-            FlipkartReturn.order_date < month_end,
+            FlipkartReturn.financial_year == financial_year,
+            FlipkartReturn.month_number == month_number,
             FlipkartReturn.seller_gstin == gstin
         ).all()
         
-        for ret in flipkart_returns:
+        for ret, gst_rate in zip(flipkart_returns, _line_rates(flipkart_returns)):
             delivery_state = str(ret.customer_delivery_state or "").strip().upper()
             delivery_state_normalized = get_state_code(delivery_state)
 
-            if ret.igst_rate and ret.igst_rate > 0:
-                gst_rate = normalize_rate(ret.igst_rate)
-            elif ret.cgst_rate and ret.sgst_rate:
-                gst_rate = normalize_rate(ret.cgst_rate + ret.sgst_rate)
-            else:
+            if gst_rate is None:
                 continue
 
             taxable_value = abs(float(ret.taxable_value or 0))
@@ -327,28 +349,19 @@ def generate_gst_pivot_csv(financial_year, month_number, gstin_or_supplier_id, d
     # 3. Amazon DB - aggregate by state and GST rate - B2C only (exclude B2B which goes to Table 4)
     amazon_query = db.query(AmazonOrder).filter(
         AmazonOrder.transaction_type == TransactionType.SHIPMENT,
-        AmazonOrder.order_date >= month_start,
-        AmazonOrder.order_date < month_end,
+        AmazonOrder.financial_year == financial_year,
+        AmazonOrder.month_number == month_number,
         AmazonOrder.seller_gstin == gstin,
-        (AmazonOrder.customer_bill_to_gstid.is_(None) |
-         (AmazonOrder.customer_bill_to_gstid == '') |
-         (AmazonOrder.customer_bill_to_gstid == 'nan'))
+        AmazonOrder.is_b2b.is_(False)
     )
     amazon_orders = amazon_query.all()
     
-    for order in amazon_orders:
+    # GST rate: Interstate (IGST) or Intrastate (CGST + SGST), normalized
+    for order, gst_rate in zip(amazon_orders, _line_rates(amazon_orders, positive_igst=False)):
         # Normalize ship-to state
         delivery_state_normalized = get_state_code(order.ship_to_state) if order.ship_to_state else "Unknown"
         
-        # Calculate GST rate: Interstate (IGST) or Intrastate (CGST + SGST) - normalize rate
-        gst_rate = None
-        if order.igst_rate:
-            # Interstate - use IGST rate
-            gst_rate = normalize_rate(order.igst_rate)
-        elif order.cgst_rate and order.sgst_rate:
-            # Intrastate - use CGST + SGST
-            gst_rate = normalize_rate(order.cgst_rate + order.sgst_rate)
-        else:
+        if gst_rate is None:
             continue  # Skip if no tax rate
         
         taxable_value = order.taxable_value or 0
@@ -359,25 +372,18 @@ def generate_gst_pivot_csv(financial_year, month_number, gstin_or_supplier_id, d
     # Amazon returns - B2C only (exclude B2B which goes to CDNR Table 9B)
     amazon_returns = db.query(AmazonReturn).filter(
         AmazonReturn.transaction_type == TransactionType.REFUND,
-        AmazonReturn.order_date >= month_start,
-        AmazonReturn.order_date < month_end,
+        AmazonReturn.financial_year == financial_year,
+        AmazonReturn.month_number == month_number,
         AmazonReturn.seller_gstin == gstin,
-        (AmazonReturn.customer_bill_to_gstid.is_(None) |
-         (AmazonReturn.customer_bill_to_gstid == '') |
-         (AmazonReturn.customer_bill_to_gstid == 'nan'))
+        AmazonReturn.is_b2b.is_(False)
     ).all()
     
-    for ret in amazon_returns:
+    # GST rate: Interstate (IGST) or Intrastate (CGST + SGST) - use rate fields only (no approximation)
+    for ret, gst_rate in zip(amazon_returns, _line_rates(amazon_returns, positive_igst=False)):
         # Normalize ship-to state
         delivery_state_normalized = get_state_code(ret.ship_to_state) if ret.ship_to_state else "Unknown"
 
-        # Calculate GST rate: Interstate (IGST) or Intrastate (CGST + SGST) - use rate fields only (no approximation)
-        gst_rate = None
-        if ret.igst_rate:
-            gst_rate = normalize_rate(ret.igst_rate)
-        elif ret.cgst_rate and ret.sgst_rate:
-            gst_rate = normalize_rate(ret.cgst_rate + ret.sgst_rate)
-        else:
+        if gst_rate is None:
             continue  # Skip if no tax rate can be determined
 
         taxable_value = abs(float(ret.taxable_value or 0))
@@ -484,8 +490,6 @@ def generate_gst_hsn_pivot_csv(financial_year, month_number, gstin_or_supplier_i
             pivot_data[k]["igst_amount"] -= (rec.total_taxable_sale_value or 0) * rec.gst_rate / 100
 
     # Flipkart HSN merge - now from database
-    month_start, month_end = fy_month_to_date_range(financial_year, month_number)
-
     flipkart_orders = []
     flipkart_returns = []
     hsn_rate_map = {}
@@ -513,26 +517,20 @@ def generate_gst_hsn_pivot_csv(financial_year, month_number, gstin_or_supplier_i
         # Use database (GSTIN-filtered)
         flipkart_orders = db.query(FlipkartOrder).filter(
             FlipkartOrder.event_type == 'Sale',
-            FlipkartOrder.order_date >= month_start,
-            FlipkartOrder.order_date < month_end,
+            FlipkartOrder.financial_year == financial_year,
+            FlipkartOrder.month_number == month_number,
             FlipkartOrder.seller_gstin == gstin_for_supplier
         ).all()
         
         flipkart_returns = db.query(FlipkartReturn).filter(
-            FlipkartReturn.order_date >= month_start,
-            FlipkartReturn.order_date < month_end,
+            FlipkartReturn.financial_year == financial_year,
+            FlipkartReturn.month_number == month_number,
             FlipkartReturn.seller_gstin == gstin_for_supplier
         ).all()
         
         # Aggregate Flipkart sales by HSN
-        for order in flipkart_orders:
+        for order, rate in zip(flipkart_orders, _line_rates(flipkart_orders, default=0)):
             hsn = str(order.hsn_code or "UNKNOWN")
-            if order.igst_rate and order.igst_rate > 0:
-                rate = normalize_rate(order.igst_rate)
-            elif order.cgst_rate and order.sgst_rate:
-                rate = normalize_rate(order.cgst_rate + order.sgst_rate)
-            else:
-                rate = 0
             
             if hsn not in hsn_rate_map:
                 hsn_rate_map[hsn] = rate
@@ -545,20 +543,14 @@ def generate_gst_hsn_pivot_csv(financial_year, month_number, gstin_or_supplier_i
             pivot_data[k]["sgst_amount"] += float(order.sgst_amount or 0)
         
         # Subtract Flipkart returns (use abs() since returns may store negative amounts)
-        for ret in flipkart_returns:
+        for ret, own_rate in zip(flipkart_returns, _line_rates(flipkart_returns, default=0.0)):
             hsn = str(ret.hsn_code or "UNKNOWN")
 
             if hsn in hsn_rate_map:
                 rate = hsn_rate_map[hsn]
             else:
-                if ret.igst_rate and ret.igst_rate > 0:
-                    rate = normalize_rate(ret.igst_rate)
-                elif ret.cgst_rate and ret.sgst_rate:
-                    rate = normalize_rate(ret.cgst_rate + ret.sgst_rate)
-                else:
-                    rate = 0.0
-                if hsn not in hsn_rate_map:
-                    hsn_rate_map[hsn] = rate
+                rate = own_rate
+                hsn_rate_map[hsn] = rate
 
             k = (hsn, rate)
             pivot_data[k]["quantity"] -= abs(int(ret.quantity or 0))
@@ -570,34 +562,24 @@ def generate_gst_hsn_pivot_csv(financial_year, month_number, gstin_or_supplier_i
     # Amazon HSN merge - B2C only (exclude B2B which goes to HSN B2B report)
     amazon_orders = db.query(AmazonOrder).filter(
         AmazonOrder.transaction_type == TransactionType.SHIPMENT,
-        AmazonOrder.order_date >= month_start,
-        AmazonOrder.order_date < month_end,
+        AmazonOrder.financial_year == financial_year,
+        AmazonOrder.month_number == month_number,
         AmazonOrder.seller_gstin == gstin_for_supplier,
-        (AmazonOrder.customer_bill_to_gstid.is_(None) |
-         (AmazonOrder.customer_bill_to_gstid == '') |
-         (AmazonOrder.customer_bill_to_gstid == 'nan'))
+        AmazonOrder.is_b2b.is_(False)
     ).all()
 
     amazon_returns = db.query(AmazonReturn).filter(
         AmazonReturn.transaction_type == TransactionType.REFUND,
-        AmazonReturn.order_date >= month_start,
-        AmazonReturn.order_date < month_end,
+        AmazonReturn.financial_year == financial_year,
+        AmazonReturn.month_number == month_number,
         AmazonReturn.seller_gstin == gstin_for_supplier,
-        (AmazonReturn.customer_bill_to_gstid.is_(None) |
-         (AmazonReturn.customer_bill_to_gstid == '') |
-         (AmazonReturn.customer_bill_to_gstid == 'nan'))
+        AmazonReturn.is_b2b.is_(False)
     ).all()
     
     # Aggregate Amazon sales by HSN (update the map)
-    for order in amazon_orders:
+    # Effective tax rate of each line, normalized
+    for order, rate in zip(amazon_orders, _line_rates(amazon_orders, default=0)):
         hsn = str(order.hsn_sac or "UNKNOWN")
-        # Calculate effective tax rate and normalize
-        if order.igst_rate and order.igst_rate > 0:
-            rate = normalize_rate(order.igst_rate)
-        elif order.cgst_rate and order.sgst_rate:
-            rate = normalize_rate(order.cgst_rate + order.sgst_rate)
-        else:
-            rate = 0
         
         # Store the rate for this HSN if not already set
         if hsn not in hsn_rate_map:
@@ -611,7 +593,7 @@ def generate_gst_hsn_pivot_csv(financial_year, month_number, gstin_or_supplier_i
         pivot_data[k]["sgst_amount"] += float(order.sgst_amount or 0)
     
     # Subtract Amazon returns (use abs() since returns may store negative amounts)
-    for ret in amazon_returns:
+    for ret, own_rate in zip(amazon_returns, _line_rates(amazon_returns, default=0.0)):
         hsn = str(ret.hsn_sac or "UNKNOWN")
 
         # Use the rate established from sales (most reliable source)
@@ -619,15 +601,9 @@ def generate_gst_hsn_pivot_csv(financial_year, month_number, gstin_or_supplier_i
             rate = hsn_rate_map[hsn]
         else:
             # For returns without prior sales, use the return's own rate fields (NORMALIZED)
-            if ret.igst_rate and ret.igst_rate > 0:
-                rate = normalize_rate(ret.igst_rate)
-            elif ret.cgst_rate and ret.sgst_rate:
-                rate = normalize_rate(ret.cgst_rate + ret.sgst_rate)
-            else:
-                rate = 0.0
+            rate = own_rate
             # Store this rate for future use
-            if hsn not in hsn_rate_map:
-                hsn_rate_map[hsn] = rate
+            hsn_rate_map[hsn] = rate
 
         k = (hsn, rate)
         pivot_data[k]["quantity"] -= abs(int(ret.quantity or 0))
@@ -675,8 +651,6 @@ def generate_b2b_csv(financial_year, month_number, gstin_or_supplier_id, db,
             Rate, Taxable Value, Cess Amount
     """
     from models import AmazonOrder, AmazonReturn
-    # Calculate month start and end dates
-    month_start, month_end = fy_month_to_date_range(financial_year, month_number)
 
     # Resolve supplier GSTIN early for filtering
     supplier_gstin = resolve_gstin(gstin_or_supplier_id, db)
@@ -684,20 +658,16 @@ def generate_b2b_csv(financial_year, month_number, gstin_or_supplier_id, db,
     # Query B2B transactions (where customer GSTIN is present) - filtered by seller GSTIN
     b2b_orders = db.query(AmazonOrder).filter(
         AmazonOrder.transaction_type == TransactionType.SHIPMENT,
-        AmazonOrder.customer_bill_to_gstid.isnot(None),
-        AmazonOrder.customer_bill_to_gstid != '',
-        AmazonOrder.customer_bill_to_gstid != 'nan',
-        AmazonOrder.order_date >= month_start,
-        AmazonOrder.order_date < month_end,
+        AmazonOrder.is_b2b.is_(True),
+        AmazonOrder.financial_year == financial_year,
+        AmazonOrder.month_number == month_number,
         AmazonOrder.seller_gstin == supplier_gstin
     ).all()
 
     b2b_returns = db.query(AmazonReturn).filter(
-        AmazonReturn.customer_bill_to_gstid.isnot(None),
-        AmazonReturn.customer_bill_to_gstid != '',
-        AmazonReturn.customer_bill_to_gstid != 'nan',
-        AmazonReturn.order_date >= month_start,
-        AmazonReturn.order_date < month_end,
+        AmazonReturn.is_b2b.is_(True),
+        AmazonReturn.financial_year == financial_year,
+        AmazonReturn.month_number == month_number,
         AmazonReturn.seller_gstin == supplier_gstin
     ).all()
 
@@ -802,8 +772,6 @@ def generate_hsn_b2b_csv(financial_year, month_number, gstin_or_supplier_id, db,
             Integrated Tax Amount, Central Tax Amount, State/UT Tax Amount, Cess Amount
     """
     from models import AmazonOrder, AmazonReturn
-    # Calculate month start and end dates
-    month_start, month_end = fy_month_to_date_range(financial_year, month_number)
 
     # Resolve supplier GSTIN for filtering
     supplier_gstin = resolve_gstin(gstin_or_supplier_id, db)
@@ -811,20 +779,16 @@ def generate_hsn_b2b_csv(financial_year, month_number, gstin_or_supplier_id, db,
     # Query B2B transactions (where customer GSTIN is present) - filtered by seller GSTIN
     b2b_orders = db.query(AmazonOrder).filter(
         AmazonOrder.transaction_type == TransactionType.SHIPMENT,
-        AmazonOrder.customer_bill_to_gstid.isnot(None),
-        AmazonOrder.customer_bill_to_gstid != '',
-        AmazonOrder.customer_bill_to_gstid != 'nan',
-        AmazonOrder.order_date >= month_start,
-        AmazonOrder.order_date < month_end,
+        AmazonOrder.is_b2b.is_(True),
+        AmazonOrder.financial_year == financial_year,
+        AmazonOrder.month_number == month_number,
         AmazonOrder.seller_gstin == supplier_gstin
     ).all()
 
     b2b_returns = db.query(AmazonReturn).filter(
-        AmazonReturn.customer_bill_to_gstid.isnot(None),
-        AmazonReturn.customer_bill_to_gstid != '',
-        AmazonReturn.customer_bill_to_gstid != 'nan',
-        AmazonReturn.order_date >= month_start,
-        AmazonReturn.order_date < month_end,
+        AmazonReturn.is_b2b.is_(True),
+        AmazonReturn.financial_year == financial_year,
+        AmazonReturn.month_number == month_number,
         AmazonReturn.seller_gstin == supplier_gstin
     ).all()
 
@@ -908,8 +872,6 @@ def generate_b2cl_csv(financial_year, month_number, gstin_or_supplier_id, db,
             Rate, Taxable Value, Cess Amount, E-Commerce GSTIN
     """
     from models import AmazonOrder
-    # Calculate month start and end dates
-    month_start, month_end = fy_month_to_date_range(financial_year, month_number)
 
     # Get supplier state for determining inter/intra state
     supplier_gstin = resolve_gstin(gstin_or_supplier_id, db)
@@ -919,13 +881,11 @@ def generate_b2cl_csv(financial_year, month_number, gstin_or_supplier_id, db,
     # Filtered by seller GSTIN to prevent cross-seller data leakage
     large_orders = db.query(AmazonOrder).filter(
         AmazonOrder.transaction_type == TransactionType.SHIPMENT,
-        AmazonOrder.order_date >= month_start,
-        AmazonOrder.order_date < month_end,
+        AmazonOrder.financial_year == financial_year,
+        AmazonOrder.month_number == month_number,
         AmazonOrder.seller_gstin == supplier_gstin,
         # B2C: No customer GSTIN or empty
-        (AmazonOrder.customer_bill_to_gstid.is_(None) |
-         (AmazonOrder.customer_bill_to_gstid == '') |
-         (AmazonOrder.customer_bill_to_gstid == 'nan')),
+        AmazonOrder.is_b2b.is_(False),
         # Large: Invoice value > B2CL threshold
         AmazonOrder.invoice_amount > B2CL_INVOICE_THRESHOLD
     ).all()
@@ -1014,8 +974,6 @@ def generate_cdnr_csv(financial_year, month_number, gstin_or_supplier_id, db,
             Rate, Taxable Value, Cess Amount
     """
     from models import AmazonReturn
-    # Calculate month start and end dates
-    month_start, month_end = fy_month_to_date_range(financial_year, month_number)
 
     # Resolve supplier GSTIN for filtering
     supplier_gstin = resolve_gstin(gstin_or_supplier_id, db)
@@ -1023,11 +981,9 @@ def generate_cdnr_csv(financial_year, month_number, gstin_or_supplier_id, db,
     # Query returns to B2B customers (those with GSTIN) - filtered by seller GSTIN
     b2b_returns = db.query(AmazonReturn).filter(
         AmazonReturn.transaction_type.in_([TransactionType.REFUND, TransactionType.CANCEL]),
-        AmazonReturn.customer_bill_to_gstid.isnot(None),
-        AmazonReturn.customer_bill_to_gstid != '',
-        AmazonReturn.customer_bill_to_gstid != 'nan',
-        AmazonReturn.order_date >= month_start,
-        AmazonReturn.order_date < month_end,
+        AmazonReturn.is_b2b.is_(True),
+        AmazonReturn.financial_year == financial_year,
+        AmazonReturn.month_number == month_number,
         AmazonReturn.seller_gstin == supplier_gstin
     ).all()
     
@@ -1131,7 +1087,6 @@ def generate_gstr1_excel_workbook(financial_year, month_number, gstin_or_supplie
     from openpyxl import Workbook
     from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
     from openpyxl.utils import get_column_letter
-    import tempfile
     import csv as csv_module
     
     # Determine output file path
@@ -1188,151 +1143,139 @@ def generate_gstr1_excel_workbook(financial_year, month_number, gstin_or_supplie
             adjusted_width = min(max_length + 2, 50)  # Max width 50
             ws.column_dimensions[column_letter].width = adjusted_width
     
-    # Generate each CSV in memory and add to workbook
+    # Generate each table as a CSV in this workbook's own scratch directory
+    # (removed afterwards, even when a table fails) and copy it into a sheet
     table_count = 0
     total_records = 0
     
-    # 1. B2B Sheet
-    try:
-        temp_csv = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='', encoding='utf-8')
-        temp_csv_path = temp_csv.name
-        temp_csv.close()
+    with scratch_dir("gstr1_") as scratch:
+        # 1. B2B Sheet
+        try:
+            temp_csv_path = os.path.join(scratch, "b2b.csv")
         
-        result = generate_b2b_csv(financial_year, month_number, gstin_or_supplier_id, db, file_path=temp_csv_path)
+            result = generate_b2b_csv(financial_year, month_number, gstin_or_supplier_id, db, file_path=temp_csv_path)
         
-        # Read CSV and add to Excel
-        ws = wb.create_sheet("B2B")
-        with open(temp_csv_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv_module.reader(csvfile)
-            for row_idx, row in enumerate(reader, 1):
-                for col_idx, value in enumerate(row, 1):
-                    cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                    if row_idx == 1:
-                        cell.border = thin_border
+            # Read CSV and add to Excel
+            ws = wb.create_sheet("B2B")
+            with open(temp_csv_path, 'r', encoding='utf-8') as csvfile:
+                reader = csv_module.reader(csvfile)
+                for row_idx, row in enumerate(reader, 1):
+                    for col_idx, value in enumerate(row, 1):
+                        cell = ws.cell(row=row_idx, column=col_idx, value=value)
+                        if row_idx == 1:
+                            cell.border = thin_border
         
-        style_header_row(ws, 1)
-        auto_adjust_column_width(ws)
-        os.unlink(temp_csv_path)
+            style_header_row(ws, 1)
+            auto_adjust_column_width(ws)
         
-        # Extract record count from result message
-        import re
-        match = re.search(r'with (\d+)', result)
-        if match:
-            count = int(match.group(1))
-            total_records += count
-        table_count += 1
-    except Exception as e:
-        logger.warning(f"Could not generate B2B sheet: {e}")
+            # Extract record count from result message
+            import re
+            match = re.search(r'with (\d+)', result)
+            if match:
+                count = int(match.group(1))
+                total_records += count
+            table_count += 1
+        except Exception as e:
+            logger.warning(f"Could not generate B2B sheet: {e}")
     
-    # 2. B2CL Sheet
-    try:
-        temp_csv = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='', encoding='utf-8')
-        temp_csv_path = temp_csv.name
-        temp_csv.close()
+        # 2. B2CL Sheet
+        try:
+            temp_csv_path = os.path.join(scratch, "b2cl.csv")
         
-        result = generate_b2cl_csv(financial_year, month_number, gstin_or_supplier_id, db, file_path=temp_csv_path)
+            result = generate_b2cl_csv(financial_year, month_number, gstin_or_supplier_id, db, file_path=temp_csv_path)
         
-        ws = wb.create_sheet("B2CL")
-        with open(temp_csv_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv_module.reader(csvfile)
-            for row_idx, row in enumerate(reader, 1):
-                for col_idx, value in enumerate(row, 1):
-                    ws.cell(row=row_idx, column=col_idx, value=value)
+            ws = wb.create_sheet("B2CL")
+            with open(temp_csv_path, 'r', encoding='utf-8') as csvfile:
+                reader = csv_module.reader(csvfile)
+                for row_idx, row in enumerate(reader, 1):
+                    for col_idx, value in enumerate(row, 1):
+                        ws.cell(row=row_idx, column=col_idx, value=value)
         
-        style_header_row(ws, 1)
-        auto_adjust_column_width(ws)
-        os.unlink(temp_csv_path)
+            style_header_row(ws, 1)
+            auto_adjust_column_width(ws)
         
-        match = re.search(r'with (\d+)', result)
-        if match:
-            count = int(match.group(1))
-            total_records += count
-        table_count += 1
-    except Exception as e:
-        logger.warning(f"Could not generate B2CL sheet: {e}")
+            match = re.search(r'with (\d+)', result)
+            if match:
+                count = int(match.group(1))
+                total_records += count
+            table_count += 1
+        except Exception as e:
+            logger.warning(f"Could not generate B2CL sheet: {e}")
     
-    # 3. B2CS Sheet (B2C Small - using generate_gst_pivot_csv)
-    try:
-        temp_csv = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='', encoding='utf-8')
-        temp_csv_path = temp_csv.name
-        temp_csv.close()
+        # 3. B2CS Sheet (B2C Small - using generate_gst_pivot_csv)
+        try:
+            temp_csv_path = os.path.join(scratch, "b2cs.csv")
         
-        # B2CS data is generated by generate_gst_pivot_csv function
-        result = generate_gst_pivot_csv(financial_year, month_number, gstin_or_supplier_id, db, file_path=temp_csv_path)
+            # B2CS data is generated by generate_gst_pivot_csv function
+            result = generate_gst_pivot_csv(financial_year, month_number, gstin_or_supplier_id, db, file_path=temp_csv_path)
         
-        ws = wb.create_sheet("B2CS")
-        with open(temp_csv_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv_module.reader(csvfile)
-            for row_idx, row in enumerate(reader, 1):
-                for col_idx, value in enumerate(row, 1):
-                    ws.cell(row=row_idx, column=col_idx, value=value)
+            ws = wb.create_sheet("B2CS")
+            with open(temp_csv_path, 'r', encoding='utf-8') as csvfile:
+                reader = csv_module.reader(csvfile)
+                for row_idx, row in enumerate(reader, 1):
+                    for col_idx, value in enumerate(row, 1):
+                        ws.cell(row=row_idx, column=col_idx, value=value)
         
-        style_header_row(ws, 1)
-        auto_adjust_column_width(ws)
-        os.unlink(temp_csv_path)
+            style_header_row(ws, 1)
+            auto_adjust_column_width(ws)
         
-        match = re.search(r'with (\d+)', result)
-        if match:
-            count = int(match.group(1))
-            total_records += count
-        table_count += 1
-    except Exception as e:
-        logger.warning(f"Could not generate B2CS sheet: {e}")
+            match = re.search(r'with (\d+)', result)
+            if match:
+                count = int(match.group(1))
+                total_records += count
+            table_count += 1
+        except Exception as e:
+            logger.warning(f"Could not generate B2CS sheet: {e}")
     
-    # 4. CDNR Sheet
-    try:
-        temp_csv = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='', encoding='utf-8')
-        temp_csv_path = temp_csv.name
-        temp_csv.close()
+        # 4. CDNR Sheet
+        try:
+            temp_csv_path = os.path.join(scratch, "cdnr.csv")
         
-        result = generate_cdnr_csv(financial_year, month_number, gstin_or_supplier_id, db, file_path=temp_csv_path)
+            result = generate_cdnr_csv(financial_year, month_number, gstin_or_supplier_id, db, file_path=temp_csv_path)
         
-        ws = wb.create_sheet("CDNR")
-        with open(temp_csv_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv_module.reader(csvfile)
-            for row_idx, row in enumerate(reader, 1):
-                for col_idx, value in enumerate(row, 1):
-                    ws.cell(row=row_idx, column=col_idx, value=value)
+            ws = wb.create_sheet("CDNR")
+            with open(temp_csv_path, 'r', encoding='utf-8') as csvfile:
+                reader = csv_module.reader(csvfile)
+                for row_idx, row in enumerate(reader, 1):
+                    for col_idx, value in enumerate(row, 1):
+                        ws.cell(row=row_idx, column=col_idx, value=value)
         
-        style_header_row(ws, 1)
-        auto_adjust_column_width(ws)
-        os.unlink(temp_csv_path)
+            style_header_row(ws, 1)
+            auto_adjust_column_width(ws)
         
-        match = re.search(r'with (\d+)', result)
-        if match:
-            count = int(match.group(1))
-            total_records += count
-        table_count += 1
-    except Exception as e:
-        logger.warning(f"Could not generate CDNR sheet: {e}")
+            match = re.search(r'with (\d+)', result)
+            if match:
+                count = int(match.group(1))
+                total_records += count
+            table_count += 1
+        except Exception as e:
+            logger.warning(f"Could not generate CDNR sheet: {e}")
     
-    # 5. HSN Summary Sheet
-    try:
-        temp_csv = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='', encoding='utf-8')
-        temp_csv_path = temp_csv.name
-        temp_csv.close()
+        # 5. HSN Summary Sheet
+        try:
+            temp_csv_path = os.path.join(scratch, "hsn.csv")
         
-        result = generate_hsn_b2b_csv(financial_year, month_number, gstin_or_supplier_id, db, file_path=temp_csv_path)
+            result = generate_hsn_b2b_csv(financial_year, month_number, gstin_or_supplier_id, db, file_path=temp_csv_path)
         
-        ws = wb.create_sheet("HSN")
-        with open(temp_csv_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv_module.reader(csvfile)
-            for row_idx, row in enumerate(reader, 1):
-                for col_idx, value in enumerate(row, 1):
-                    ws.cell(row=row_idx, column=col_idx, value=value)
+            ws = wb.create_sheet("HSN")
+            with open(temp_csv_path, 'r', encoding='utf-8') as csvfile:
+                reader = csv_module.reader(csvfile)
+                for row_idx, row in enumerate(reader, 1):
+                    for col_idx, value in enumerate(row, 1):
+                        ws.cell(row=row_idx, column=col_idx, value=value)
         
-        style_header_row(ws, 1)
-        auto_adjust_column_width(ws)
-        os.unlink(temp_csv_path)
+            style_header_row(ws, 1)
+            auto_adjust_column_width(ws)
         
-        match = re.search(r'with (\d+)', result)
-        if match:
-            count = int(match.group(1))
-            total_records += count
-        table_count += 1
-    except Exception as e:
-        logger.warning(f"Could not generate HSN sheet: {e}")
+            match = re.search(r'with (\d+)', result)
+            if match:
+                count = int(match.group(1))
+                total_records += count
+            table_count += 1
+        except Exception as e:
+            logger.warning(f"Could not generate HSN sheet: {e}")
     
+
     # 6. Add summary/index sheet as first sheet
     ws_summary = wb.create_sheet("Summary", 0)
     
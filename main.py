@@ -8,13 +8,13 @@ logger = logging.getLogger(__name__)
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QLabel, QPushButton, QComboBox,
     QVBoxLayout, QWidget, QTableWidget, QTableWidgetItem, QTextEdit,
-    QFileDialog, QMessageBox, QHBoxLayout
+    QFileDialog, QMessageBox, QHBoxLayout, QCheckBox, QProgressBar
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThreadPool, QTimer
 
 
 
-from database import SessionLocal
+from database import ReadSessionLocal, SessionLocal
 from models import MeeshoSale
 from import_logic import (
     import_from_zip, import_invoice_data, import_flipkart_sales, import_flipkart_b2c,
@@ -22,22 +22,27 @@ from import_logic import (
     validate_meesho_tax_invoice_zip, validate_invoices_zip,
     validate_flipkart_sales_excel, validate_flipkart_gst_excel, validate_amazon_zip
 )
-from docissued import append_meesho_docs_from_db, append_flipkart_docs_from_db, append_flipkart_return_docs_from_db, append_amazon_docs_from_db
+from docissued import generate_docs_issued_csv
 from logic import (
     generate_gst_pivot_csv, generate_gst_hsn_pivot_csv,
     generate_b2b_csv, generate_hsn_b2b_csv, generate_b2cl_csv, generate_cdnr_csv, generate_gstr1_excel_workbook
 )
 from auto_migrate import auto_migrate, verify_multi_seller_setup
+from batch_import import import_directory
+from import_progress import CANCELLED_MESSAGE, format_progress
+from workers import DbWorker
 
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_FILE = os.path.join(APP_DIR, "config.json")
+CLOSE_TIMEOUT_MS = 15000  # longest a close waits for a cancelled import to roll back
+THREAD_EXIT_MS = 2000  # then, for the pool threads to return
 
 # Automatic database migration on app startup
 def initialize_database():
     """
     Automatically migrates database schema on startup.
-    Creates missing tables and adds missing columns.
-    Safe to run every time - idempotent operation.
+    Runs only the migrations the database has not had yet; on a current
+    schema this is a single read of schema_version.
     """
     logger.info("DATABASE INITIALIZATION")
 
@@ -46,7 +51,9 @@ def initialize_database():
     for msg in migration_messages:
         logger.info(msg)
 
-    # Verify multi-seller setup
+
+def log_setup_status():
+    """Multi-seller status for the log; deferred until the window is up."""
     logger.info("Multi-Seller Setup Status:")
     verify_messages = verify_multi_seller_setup()
     for msg in verify_messages:
@@ -106,6 +113,7 @@ class DashboardApp(QMainWindow):
         self.btn_import_amazon_b2b = QPushButton("Import Amazon B2B (ZIP)")
         self.btn_import_amazon_b2c = QPushButton("Import Amazon B2C (ZIP)")
         self.btn_import_amazon_gstr1 = QPushButton("Import Amazon GSTR1 (ZIP)")
+        self.btn_import_folder = QPushButton("Import Month Folder (All Files)")
         
         # GST export buttons
         self.btn_b2cs_csv = QPushButton("B2CS (Table 7)")
@@ -123,6 +131,7 @@ class DashboardApp(QMainWindow):
             self.btn_upload, self.btn_import_invoices,
             self.btn_import_flipkart_sales, self.btn_import_flipkart_gst,
             self.btn_import_amazon_b2b, self.btn_import_amazon_b2c, self.btn_import_amazon_gstr1,
+            self.btn_import_folder,
             self.btn_b2cs_csv, self.btn_hsn_csv, self.btn_b2b, self.btn_hsn_b2b,
             self.btn_b2cl, self.btn_cdnr, self.btn_docs_csv, self.btn_gstr1_excel
         ]
@@ -148,6 +157,25 @@ class DashboardApp(QMainWindow):
         row1c.addWidget(self.btn_import_amazon_gstr1)
         layout.addLayout(row1c)
 
+        # Files already in the import manifest are skipped unless this is ticked
+        self.chk_force_reimport = QCheckBox("Force re-import (ignore import history)")
+        row1d = QHBoxLayout()
+        row1d.addWidget(self.btn_import_folder)
+        row1d.addWidget(self.chk_force_reimport)
+        layout.addLayout(row1d)
+
+        # Background job status: imports and exports run off the GUI thread
+        self.status_label = QLabel("Ready")
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        self.btn_cancel = QPushButton("Cancel Import")
+        self.btn_cancel.setEnabled(False)
+        status_row = QHBoxLayout()
+        status_row.addWidget(self.status_label, 1)
+        status_row.addWidget(self.progress_bar, 1)
+        status_row.addWidget(self.btn_cancel)
+        layout.addLayout(status_row)
+
         # Row 2: GST Exports
         layout.addWidget(QLabel("GST Reports (GSTR-1):"))
         row2 = QHBoxLayout()
@@ -183,7 +211,15 @@ class DashboardApp(QMainWindow):
         container.setLayout(layout)
         self.setCentralWidget(container)
 
-        self.db = SessionLocal()
+        # self.db is only used on the GUI thread (filters); workers open their own sessions.
+        # Imports run one at a time (SQLite has a single writer); exports share the global pool
+        # and read through query-only connections, so they can run while an import writes.
+        self.db = ReadSessionLocal()
+        self.import_pool = QThreadPool(self)
+        self.import_pool.setMaxThreadCount(1)
+        self._workers = {}
+        self._closing = False
+        self._close_timed_out = False
         self.load_filters()
 
         # Button connections
@@ -195,6 +231,8 @@ class DashboardApp(QMainWindow):
         self.btn_import_amazon_b2b.clicked.connect(self.import_amazon_b2b)
         self.btn_import_amazon_b2c.clicked.connect(self.import_amazon_b2c)
         self.btn_import_amazon_gstr1.clicked.connect(self.import_amazon_gstr1)
+        self.btn_import_folder.clicked.connect(self.import_month_folder)
+        self.btn_cancel.clicked.connect(self.cancel_imports)
         
         # GST exports
         self.btn_b2cs_csv.clicked.connect(self.generate_b2cs_csv)
@@ -305,20 +343,9 @@ class DashboardApp(QMainWindow):
         meesho_years = {r[0] for r in self.db.query(MeeshoSale.financial_year).distinct() if r[0]}
         years.update(meesho_years)
         
-        # Flipkart order years (convert to financial year: Apr-Mar)
-        flipkart_dates = self.db.query(FlipkartOrder.order_date).filter(FlipkartOrder.order_date.isnot(None)).distinct().all()
-        for (date,) in flipkart_dates:
-            if date:
-                # Financial year: if month >= 4, FY = year+1, else FY = year
-                fy = date.year + 1 if date.month >= 4 else date.year
-                years.add(fy)
-        
-        # Amazon order years (convert to financial year)
-        amazon_dates = self.db.query(AmazonOrder.order_date).filter(AmazonOrder.order_date.isnot(None)).distinct().all()
-        for (date,) in amazon_dates:
-            if date:
-                fy = date.year + 1 if date.month >= 4 else date.year
-                years.add(fy)
+        # Flipkart and Amazon financial years (derived from order_date at import)
+        years.update(r[0] for r in self.db.query(FlipkartOrder.financial_year).distinct() if r[0])
+        years.update(r[0] for r in self.db.query(AmazonOrder.financial_year).distinct() if r[0])
         
         # Month dropdown (always 1-12)
         months = list(range(1, 13))
@@ -343,33 +370,106 @@ class DashboardApp(QMainWindow):
         self.supplier_combo.addItems(sorted(gstins))  # Now populating with GSTINs
 
     # --- Actions ---
+    # Imports and exports run on pool threads (see workers.py); the slots
+    # below only pick the file or filters and start a DbWorker.
+    def _start_worker(self, title, job, on_finished, error_prefix, pool):
+        """Run ``job(db, progress)`` on ``pool``; ``on_finished(result)`` runs on the GUI thread."""
+        queued = pool is self.import_pool and bool(self._running_imports())
+        worker = DbWorker(title, job, SessionLocal if pool is self.import_pool else ReadSessionLocal)
+        worker.signals.progress.connect(self._worker_progress)
+        worker.signals.finished.connect(self._worker_finished)
+        worker.signals.error.connect(self._worker_failed)
+        self._workers[worker.id] = (worker, pool, on_finished, error_prefix)
+        self._update_status(f"{title}: {'queued' if queued else 'started'}")
+        pool.start(worker)
+
+    def _running_imports(self):
+        """Workers on the import pool, running or queued."""
+        return [worker for worker, pool, _, _ in self._workers.values() if pool is self.import_pool]
+
+    def _worker_progress(self, worker_id, snapshot):
+        entry = self._workers.get(worker_id)
+        if entry is None or not snapshot["stage"]:
+            return
+        self._update_status(f"{entry[0].title} - {format_progress(snapshot)}")
+        if snapshot["total"]:
+            self.progress_bar.setRange(0, snapshot["total"])
+            self.progress_bar.setValue(min(snapshot["rows"], snapshot["total"]))
+        else:
+            self.progress_bar.setRange(0, 0)  # busy indicator
+
+    def _worker_finished(self, worker_id, result):
+        worker, _, on_finished, _ = self._workers.pop(worker_id)
+        self._update_status(f"{worker.title}: done")
+        if not self._closing:
+            on_finished(result)
+
+    def _worker_failed(self, worker_id, error):
+        worker, _, _, error_prefix = self._workers.pop(worker_id)
+        self._update_status(f"{worker.title}: failed")
+        if not self._closing:
+            QMessageBox.critical(self, "Error", f"{error_prefix}{error}")
+        self.debug_output.append(f"❌ Error: {error}")
+
+    def _update_status(self, text):
+        self.status_label.setText(text)
+        busy = bool(self._workers)
+        self.progress_bar.setVisible(busy)
+        self.btn_cancel.setEnabled(bool(self._running_imports()))
+        if not busy:
+            self.progress_bar.setRange(0, 1)
+            if self._closing:
+                QTimer.singleShot(0, self.close)  # the close that was waiting on the workers
+
+    def cancel_imports(self):
+        """Stop the running import (rolled back) and any queued ones."""
+        for worker in self._running_imports():
+            worker.cancel()
+        self._update_status("Cancelling import...")
+
+    def _start_import(self, title, file_path, validate, run_import, success_message, on_success=None):
+        """Validate and import ``file_path`` on the import pool (one at a time: SQLite has a single writer)."""
+        force = self.chk_force_reimport.isChecked()
+
+        def job(db, progress):
+            is_valid, message = validate(file_path)
+            if not is_valid:
+                return None, message
+            return run_import(file_path, db, force=force, progress=progress), None
+
+        def finished(outcome):
+            result, invalid = outcome
+            if invalid is not None:
+                QMessageBox.warning(self, "Invalid File", invalid)
+                self.debug_output.append(invalid)
+                return
+            if result and result[-1] == CANCELLED_MESSAGE:
+                QMessageBox.information(self, "Cancelled", CANCELLED_MESSAGE)
+            else:
+                if on_success:
+                    on_success()
+                QMessageBox.information(self, "Success", success_message)
+            self._append_import_log(title, f"File: {os.path.basename(file_path)}", result)
+
+        self._start_worker(title, job, finished, "Import failed: ", self.import_pool)
+
+    def _append_import_log(self, title, source, result):
+        self.debug_output.append("\n" + "=" * 60)
+        self.debug_output.append(title)
+        self.debug_output.append("=" * 60)
+        self.debug_output.append(source)
+        if result:
+            self.debug_output.append('\n'.join(result))
+        self.debug_output.append(f"{'='*60}\n")
+        self.load_filters()
+
     def import_meesho_gst_report(self):
         """Import Meesho GST Report (ZIP file containing sales, returns, and tax data)."""
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Meesho GST Report ZIP", self.base_folder, "ZIP files (*.zip)")
         if not file_path: 
             return
-        
-        # Validate file before importing
-        is_valid, message = validate_meesho_tax_invoice_zip(file_path)
-        if not is_valid:
-            QMessageBox.warning(self, "Invalid File", message)
-            self.debug_output.append(message)
-            return
-        
-        try:
-            result = import_from_zip(file_path, self.db)
-            QMessageBox.information(self, "Success", "Meesho GST Report imported successfully!")
-            self.debug_output.append("\n" + "=" * 60)
-            self.debug_output.append("MEESHO GST REPORT IMPORT")
-            self.debug_output.append("=" * 60)
-            self.debug_output.append(f"File: {os.path.basename(file_path)}")
-            if result:
-                self.debug_output.append('\n'.join(result))
-            self.debug_output.append(f"{'='*60}\n")
-            self.load_filters()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        self._start_import("MEESHO GST REPORT IMPORT", file_path, validate_meesho_tax_invoice_zip,
+                           import_from_zip, "Meesho GST Report imported successfully!")
     
     def import_invoices(self):
         """Import Meesho Tax Invoice Details from ZIP file."""
@@ -378,27 +478,8 @@ class DashboardApp(QMainWindow):
         )
         if not file_path:
             return
-        
-        # Validate file before importing
-        is_valid, message = validate_invoices_zip(file_path)
-        if not is_valid:
-            QMessageBox.warning(self, "Invalid File", message)
-            self.debug_output.append(message)
-            return
-        
-        try:
-            result = import_invoice_data(file_path, self.db)
-            QMessageBox.information(self, "Success", "Meesho Tax Invoice Details imported successfully!")
-            self.debug_output.append("\n" + "=" * 60)
-            self.debug_output.append("MEESHO TAX INVOICE DETAILS IMPORT")
-            self.debug_output.append("=" * 60)
-            self.debug_output.append(f"File: {os.path.basename(file_path)}")
-            self.debug_output.append('\n'.join(result))
-            self.debug_output.append(f"{'='*60}\n")
-            self.load_filters()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Import failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        self._start_import("MEESHO TAX INVOICE DETAILS IMPORT", file_path, validate_invoices_zip,
+                           import_invoice_data, "Meesho Tax Invoice Details imported successfully!")
     
     def import_flipkart_sales(self):
         """Import Flipkart sales data from Excel file (Sales Report sheet)."""
@@ -407,27 +488,8 @@ class DashboardApp(QMainWindow):
         )
         if not file_path:
             return
-        
-        # Validate file before importing
-        is_valid, message = validate_flipkart_sales_excel(file_path)
-        if not is_valid:
-            QMessageBox.warning(self, "Invalid File", message)
-            self.debug_output.append(message)
-            return
-        
-        try:
-            result = import_flipkart_sales(file_path, self.db)
-            QMessageBox.information(self, "Success", "Flipkart sales data imported successfully!")
-            self.debug_output.append("\n" + "=" * 60)
-            self.debug_output.append("FLIPKART SALES IMPORT")
-            self.debug_output.append("=" * 60)
-            self.debug_output.append(f"File: {os.path.basename(file_path)}")
-            self.debug_output.append('\n'.join(result))
-            self.debug_output.append(f"{'='*60}\n")
-            self.load_filters()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Import failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        self._start_import("FLIPKART SALES IMPORT", file_path, validate_flipkart_sales_excel,
+                           import_flipkart_sales, "Flipkart sales data imported successfully!")
     
     def import_flipkart_gst(self):
         """Import Flipkart GST data from Excel file (GSTR-1 sections)."""
@@ -437,31 +499,16 @@ class DashboardApp(QMainWindow):
         if not file_path:
             return
 
-        # Validate file before importing
-        is_valid, message = validate_flipkart_gst_excel(file_path)
-        if not is_valid:
-            QMessageBox.warning(self, "Invalid File", message)
-            self.debug_output.append(message)
-            return
-
-        try:
-            result = import_flipkart_b2c(file_path, self.db)
-
+        def use_official_values():
             # Save the Excel path so B2CS/HSN generators use official certified values
             from logic import set_flipkart_gst_excel_path
             set_flipkart_gst_excel_path(file_path)
 
-            QMessageBox.information(self, "Success", "Flipkart GST data imported successfully!\n\nOfficial GST values will be used for B2CS and HSN reports.")
-            self.debug_output.append("\n" + "=" * 60)
-            self.debug_output.append("FLIPKART GST IMPORT")
-            self.debug_output.append("=" * 60)
-            self.debug_output.append(f"File: {os.path.basename(file_path)}")
-            self.debug_output.append('\n'.join(result))
-            self.debug_output.append(f"{'='*60}\n")
-            self.load_filters()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Import failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        self._start_import(
+            "FLIPKART GST IMPORT", file_path, validate_flipkart_gst_excel, import_flipkart_b2c,
+            "Flipkart GST data imported successfully!\n\nOfficial GST values will be used for B2CS and HSN reports.",
+            on_success=use_official_values,
+        )
     
     def import_amazon_b2b(self):
         """Import Amazon B2B sales data from ZIP containing MTR CSV."""
@@ -470,27 +517,8 @@ class DashboardApp(QMainWindow):
         )
         if not file_path:
             return
-        
-        # Validate file before importing
-        is_valid, message = validate_amazon_zip(file_path, expected_type="B2B")
-        if not is_valid:
-            QMessageBox.warning(self, "Invalid File", message)
-            self.debug_output.append(message)
-            return
-        
-        try:
-            result = import_amazon_mtr(file_path, self.db)
-            QMessageBox.information(self, "Success", "Amazon B2B data imported successfully!")
-            self.debug_output.append("\n" + "=" * 60)
-            self.debug_output.append("AMAZON B2B IMPORT")
-            self.debug_output.append("=" * 60)
-            self.debug_output.append(f"File: {os.path.basename(file_path)}")
-            self.debug_output.append('\n'.join(result))
-            self.debug_output.append(f"{'='*60}\n")
-            self.load_filters()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Import failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        self._start_import("AMAZON B2B IMPORT", file_path, lambda f: validate_amazon_zip(f, expected_type="B2B"),
+                           import_amazon_mtr, "Amazon B2B data imported successfully!")
     
     def import_amazon_b2c(self):
         """Import Amazon B2C sales data from ZIP containing MTR CSV."""
@@ -499,27 +527,8 @@ class DashboardApp(QMainWindow):
         )
         if not file_path:
             return
-        
-        # Validate file before importing
-        is_valid, message = validate_amazon_zip(file_path, expected_type="B2C")
-        if not is_valid:
-            QMessageBox.warning(self, "Invalid File", message)
-            self.debug_output.append(message)
-            return
-        
-        try:
-            result = import_amazon_mtr(file_path, self.db)
-            QMessageBox.information(self, "Success", "Amazon B2C data imported successfully!")
-            self.debug_output.append("\n" + "=" * 60)
-            self.debug_output.append("AMAZON B2C IMPORT")
-            self.debug_output.append("=" * 60)
-            self.debug_output.append(f"File: {os.path.basename(file_path)}")
-            self.debug_output.append('\n'.join(result))
-            self.debug_output.append(f"{'='*60}\n")
-            self.load_filters()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Import failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        self._start_import("AMAZON B2C IMPORT", file_path, lambda f: validate_amazon_zip(f, expected_type="B2C"),
+                           import_amazon_mtr, "Amazon B2C data imported successfully!")
     
     def import_amazon_gstr1(self):
         """Import Amazon GSTR1 data from ZIP containing Excel file."""
@@ -528,27 +537,25 @@ class DashboardApp(QMainWindow):
         )
         if not file_path:
             return
-        
-        # Validate file before importing
-        is_valid, message = validate_amazon_zip(file_path, expected_type="GSTR1")
-        if not is_valid:
-            QMessageBox.warning(self, "Invalid File", message)
-            self.debug_output.append(message)
+        self._start_import("AMAZON GSTR1 IMPORT", file_path, lambda f: validate_amazon_zip(f, expected_type="GSTR1"),
+                           import_amazon_gstr1, "Amazon GSTR1 data imported successfully!")
+    
+    def import_month_folder(self):
+        """Import every marketplace file in a folder (parsed in parallel, see batch_import)."""
+        folder = QFileDialog.getExistingDirectory(self, "Select Month Folder", self.base_folder)
+        if not folder:
             return
-        
-        try:
-            result = import_amazon_gstr1(file_path, self.db)
-            QMessageBox.information(self, "Success", "Amazon GSTR1 data imported successfully!")
-            self.debug_output.append("\n" + "=" * 60)
-            self.debug_output.append("AMAZON GSTR1 IMPORT")
-            self.debug_output.append("=" * 60)
-            self.debug_output.append(f"File: {os.path.basename(file_path)}")
-            self.debug_output.append('\n'.join(result))
-            self.debug_output.append(f"{'='*60}\n")
-            self.load_filters()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Import failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        force = self.chk_force_reimport.isChecked()
+
+        def finished(result):
+            QMessageBox.information(self, "Batch Import", result[-1].strip())
+            self._append_import_log("MONTH FOLDER IMPORT", f"Folder: {folder}", result)
+
+        self._start_worker(
+            "MONTH FOLDER IMPORT",
+            lambda db, progress: import_directory(folder, db, force=force, progress=progress),
+            finished, "Batch import failed: ", self.import_pool,
+        )
     
     def get_month_filter(self):
         """Get current month filter value."""
@@ -575,177 +582,76 @@ class DashboardApp(QMainWindow):
             return None, False
         return gstin, True
 
-    def generate_b2cs_csv(self):
+    def _start_export(self, title, generate, on_finished, error_prefix="Generation failed: "):
+        """Run ``generate(fy, mn, gstin, db, output_folder=...)`` on the shared pool; exports run side by side."""
         gstin, valid = self._validate_gstin_selected()
         if not valid:
             return
         try:
             fy = int(self.year_combo.currentText())
             mn = int(self.month_combo.currentText())
-            csv_debug = generate_gst_pivot_csv(fy, mn, gstin, self.db,
-                output_folder=self.base_folder)
+        except ValueError as e:
+            QMessageBox.critical(self, "Error", f"{error_prefix}{e}")
+            return
+        folder = self.base_folder
+        self._start_worker(
+            title, lambda db, progress: generate(fy, mn, gstin, db, output_folder=folder),
+            on_finished, error_prefix, QThreadPool.globalInstance(),
+        )
+
+    def _show_generated(self, label):
+        def finished(path):
+            QMessageBox.information(self, "Success", f"{label} saved at:\n{path}")
+            self.debug_output.append(f"✅ Generated: {path}")
+        return finished
+
+    def generate_b2cs_csv(self):
+        def finished(csv_debug):
             QMessageBox.information(self, "Success", "B2CS CSV generated.")
             self.debug_output.append(csv_debug)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"{e}")
+        self._start_export("B2CS CSV", generate_gst_pivot_csv, finished, error_prefix="")
 
     def generate_hsn_csv(self):
-        gstin, valid = self._validate_gstin_selected()
-        if not valid:
-            return
-        try:
-            fy = int(self.year_combo.currentText())
-            mn = int(self.month_combo.currentText())
-            debug_csv = generate_gst_hsn_pivot_csv(fy, mn, gstin, self.db,
-                output_folder=self.base_folder)
+        def finished(debug_csv):
             QMessageBox.information(self, "Success", "HSN WISE B2CS CSV generated.")
             self.debug_output.append(debug_csv)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"{e}")
+        self._start_export("HSN CSV", generate_gst_hsn_pivot_csv, finished, error_prefix="")
 
     def generate_docs_csv(self):
-        gstin, valid = self._validate_gstin_selected()
-        if not valid:
-            return
-        try:
-            
-            files_used = []
-            supplied_files = {}
-            
-            # Check if Meesho data exists in database for this GSTIN
-            from models import MeeshoInvoice, MeeshoSale
-            has_meesho_db = self.db.query(MeeshoInvoice).join(
-                MeeshoSale, MeeshoInvoice.suborder_no == MeeshoSale.sub_order_num
-            ).filter(MeeshoSale.gstin == gstin).count() > 0
-            if has_meesho_db:
-                supplied_files["meesho_db"] = True
-                files_used.append("Meesho (from database)")
-            
-            # Check if Flipkart data exists in database for this GSTIN
-            from models import FlipkartOrder
-            has_flipkart_db = self.db.query(FlipkartOrder).filter(
-                FlipkartOrder.buyer_invoice_id.isnot(None),
-                FlipkartOrder.seller_gstin == gstin
-            ).count() > 0
-            if has_flipkart_db:
-                supplied_files["flipkart_db"] = True
-                files_used.append("Flipkart (from database)")
-            
-            # Check if Amazon data exists in database for this GSTIN
-            from models import AmazonOrder
-            has_amazon_db = self.db.query(AmazonOrder).filter(
-                AmazonOrder.transaction_type == 'Shipment',
-                AmazonOrder.invoice_number.isnot(None),
-                AmazonOrder.seller_gstin == gstin
-            ).count() > 0
-            if has_amazon_db:
-                supplied_files["amazon_db"] = True
-                files_used.append("Amazon (from database)")
-            
-            if not files_used:
-                QMessageBox.warning(self, "No Data", f"No invoice data found for GSTIN: {gstin}")
-                return
-            
-            output_path = os.path.join(self.base_folder, "docs.csv")
-            csv_rows = []
-            
-            # Pass GSTIN to filter functions
-            if supplied_files.get("meesho_db"):
-                append_meesho_docs_from_db(self.db, csv_rows, gstin=gstin)
-            if supplied_files.get("flipkart_db"):
-                append_flipkart_docs_from_db(self.db, csv_rows, gstin=gstin)
-                append_flipkart_return_docs_from_db(self.db, csv_rows, gstin=gstin)
-            if supplied_files.get("amazon_db"):
-                append_amazon_docs_from_db(self.db, csv_rows, gstin=gstin)
-            
-            if not csv_rows:
-                QMessageBox.warning(self, "No Data", "No document rows generated.")
+        def generate(fy, mn, gstin, db, output_folder):
+            try:
+                return generate_docs_issued_csv(fy, mn, gstin, db, output_folder=output_folder)
+            except LookupError as e:
+                return e
+
+        def finished(outcome):
+            if isinstance(outcome, LookupError):
+                QMessageBox.warning(self, "No Data", str(outcome))
                 return
-            
-            import csv
-            with open(output_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(["Nature of Document", "Sr. No. From", "Sr. No. To", "Total Number", "Cancelled"])
-                writer.writerows(csv_rows)
-            
-            QMessageBox.information(self, "Success", f"Docs CSV saved to: {output_path}\n\nMarketplaces: {', '.join(files_used)}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"{e}")
+            QMessageBox.information(self, "Success", "Docs CSV generated.")
+            self.debug_output.append(outcome)
+
+        self._start_export("DOCS CSV", generate, finished, error_prefix="")
     
     def export_b2b(self):
         """Generate B2B invoices CSV."""
-        gstin, valid = self._validate_gstin_selected()
-        if not valid:
-            return
-        try:
-            fy = int(self.year_combo.currentText())
-            mn = int(self.month_combo.currentText())
-            csv_path = generate_b2b_csv(fy, mn, gstin, self.db, output_folder=self.base_folder)
-            QMessageBox.information(self, "Success", f"B2B CSV saved at:\n{csv_path}")
-            self.debug_output.append(f"✅ Generated: {csv_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Generation failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        self._start_export("B2B CSV", generate_b2b_csv, self._show_generated("B2B CSV"))
 
     def export_hsn_b2b(self):
         """Generate HSN B2B summary CSV."""
-        gstin, valid = self._validate_gstin_selected()
-        if not valid:
-            return
-        try:
-            fy = int(self.year_combo.currentText())
-            mn = int(self.month_combo.currentText())
-            csv_path = generate_hsn_b2b_csv(fy, mn, gstin, self.db, output_folder=self.base_folder)
-            QMessageBox.information(self, "Success", f"HSN B2B CSV saved at:\n{csv_path}")
-            self.debug_output.append(f"✅ Generated: {csv_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Generation failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        self._start_export("HSN B2B CSV", generate_hsn_b2b_csv, self._show_generated("HSN B2B CSV"))
 
     def export_b2cl(self):
         """Generate B2CL large invoices CSV."""
-        gstin, valid = self._validate_gstin_selected()
-        if not valid:
-            return
-        try:
-            fy = int(self.year_combo.currentText())
-            mn = int(self.month_combo.currentText())
-            csv_path = generate_b2cl_csv(fy, mn, gstin, self.db, output_folder=self.base_folder)
-            QMessageBox.information(self, "Success", f"B2CL CSV saved at:\n{csv_path}")
-            self.debug_output.append(f"✅ Generated: {csv_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Generation failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        self._start_export("B2CL CSV", generate_b2cl_csv, self._show_generated("B2CL CSV"))
 
     def export_cdnr(self):
         """Generate credit/debit notes CSV."""
-        gstin, valid = self._validate_gstin_selected()
-        if not valid:
-            return
-        try:
-            fy = int(self.year_combo.currentText())
-            mn = int(self.month_combo.currentText())
-            csv_path = generate_cdnr_csv(fy, mn, gstin, self.db, output_folder=self.base_folder)
-            QMessageBox.information(self, "Success", f"CDNR CSV saved at:\n{csv_path}")
-            self.debug_output.append(f"✅ Generated: {csv_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Generation failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        self._start_export("CDNR CSV", generate_cdnr_csv, self._show_generated("CDNR CSV"))
 
     def export_gstr1_excel(self):
         """Generate complete GSTR-1 Excel workbook with all sheets."""
-        gstin, valid = self._validate_gstin_selected()
-        if not valid:
-            return
-        try:
-            fy = int(self.year_combo.currentText())
-            mn = int(self.month_combo.currentText())
-            excel_path = generate_gstr1_excel_workbook(fy, mn, gstin, self.db, output_folder=self.base_folder)
-            QMessageBox.information(self, "Success", f"Complete GSTR-1 Excel saved at:\n{excel_path}")
-            self.debug_output.append(f"✅ Generated: {excel_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Generation failed: {e}")
-            self.debug_output.append(f"❌ Error: {e}")
+        self._start_export("GSTR-1 EXCEL", generate_gstr1_excel_workbook, self._show_generated("Complete GSTR-1 Excel"))
     
 
     def update_table(self, data, headers):
@@ -761,17 +667,45 @@ class DashboardApp(QMainWindow):
 
 
     def closeEvent(self, event):
-        """Clean up resources on application exit."""
+        """
+        Clean up resources on application exit. A running import is cancelled
+        (rolled back) first; the window stays open, without blocking the GUI
+        thread, until the workers stop or CLOSE_TIMEOUT_MS passes.
+        """
+        if self._workers and not self._close_timed_out:
+            if not self._closing:
+                if self._running_imports() and QMessageBox.question(
+                        self, "Import Running",
+                        "An import is still running. Cancel it and quit?\n"
+                        "Nothing from it will be saved.") != QMessageBox.Yes:
+                    event.ignore()
+                    return
+                self._closing = True
+                self.cancel_imports()
+                self.centralWidget().setEnabled(False)
+                self._update_status("Closing: waiting for running work to stop...")
+                QTimer.singleShot(CLOSE_TIMEOUT_MS, self._close_after_timeout)
+            event.ignore()  # closed again once the last worker reports back
+            return
         try:
             self.save_config()
         except Exception:
             pass
+        # The workers have reported back (or timed out); their threads only have to return
+        self.import_pool.waitForDone(THREAD_EXIT_MS)
+        QThreadPool.globalInstance().waitForDone(THREAD_EXIT_MS)
         try:
             self.db.close()
         except Exception:
             pass
         super().closeEvent(event)
 
+    def _close_after_timeout(self):
+        if self._workers:
+            logger.warning(f"Closing with {len(self._workers)} workers still running")
+            self._close_timed_out = True
+            self.close()
+
 
 if __name__ == "__main__":
     logging.basicConfig(
@@ -783,5 +717,6 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     w = DashboardApp()
     w.show()
+    QTimer.singleShot(0, log_setup_status)
     sys.exit(app.exec())
 
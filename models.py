@@ -1,6 +1,7 @@
 
-from sqlalchemy import Column, Integer, String, Date, Float, DateTime
+from sqlalchemy import Column, Integer, String, Date, Float, DateTime, Boolean, Index, event
 from datetime import datetime
+from constants import b2b_mask, effective_gst_rates, financial_periods, state_codes
 from database import Base
 
 class SellerMapping(Base):
@@ -13,6 +14,14 @@ class SellerMapping(Base):
     supplier_name = Column(String)
     last_updated = Column(DateTime, default=datetime.now)
 
+class SchemaVersion(Base):
+    """One row per applied auto_migrate step; the highest version is the database's"""
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    description = Column(String)
+    applied_at = Column(DateTime, default=datetime.now)
+
 class MeeshoInvoice(Base):
     __tablename__ = "meesho_invoices"
 
@@ -23,10 +32,17 @@ class MeeshoInvoice(Base):
     product_description = Column(String)
     hsn_code = Column(String)
     invoice_no = Column(String, unique=True, index=True)
+    gstin = Column(String)  # Seller GSTIN, resolved from meesho_sales at import
     imported_at = Column(DateTime, default=datetime.now)
 
 class MeeshoSale(Base):
     __tablename__ = "meesho_sales"
+    __table_args__ = (
+        # GSTR-1 reports: one period of one supplier (legacy path) or one GSTIN.
+        # sub_order_num makes the GSTIN index covering for the docs-issued join.
+        Index("ix_meesho_sales_period_supplier", "financial_year", "month_number", "supplier_id"),
+        Index("ix_meesho_sales_gstin_period", "gstin", "financial_year", "month_number", "sub_order_num"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
 
@@ -47,9 +63,14 @@ class MeeshoSale(Base):
     financial_year = Column(Integer, index=True)
     month_number = Column(Integer, index=True)
     supplier_id = Column(Integer, index=True)
+    row_hash = Column(String)  # content hash of the source row (bulk_loader.row_hashes)
 
 class MeeshoReturn(Base):
     __tablename__ = "meesho_returns"
+    __table_args__ = (
+        Index("ix_meesho_returns_period_supplier", "financial_year", "month_number", "supplier_id"),
+        Index("ix_meesho_returns_gstin_period", "gstin", "financial_year", "month_number"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
 
@@ -72,6 +93,7 @@ class MeeshoReturn(Base):
     financial_year = Column(Integer, index=True)
     month_number = Column(Integer, index=True)
     supplier_id = Column(Integer, index=True)
+    row_hash = Column(String)  # content hash of the source row (bulk_loader.row_hashes)
 
 
 # Flipkart Marketplace Models
@@ -79,6 +101,8 @@ class MeeshoReturn(Base):
 class FlipkartOrder(Base):
     __tablename__ = "flipkart_orders"
     __table_args__ = (
+        # GSTR-1 reports: one GSTIN's sales in one period
+        Index("ix_flipkart_orders_gstin_event_period", "seller_gstin", "event_type", "financial_year", "month_number"),
     )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -116,11 +140,21 @@ class FlipkartOrder(Base):
     customer_billing_state = Column(String)
     customer_delivery_state = Column(String)
     is_shopsy = Column(String)  # True/False as string
+    # Derived at import from the columns above (see derived_columns)
+    financial_year = Column(Integer)  # end-year FY of order_date
+    month_number = Column(Integer)  # calendar month of order_date
+    is_b2b = Column(Boolean, default=False)  # buyer GSTIN present
+    effective_gst_rate = Column(Float)  # IGST rate, else CGST + SGST; NULL when neither is set
+    pos_state_code = Column(String)  # place of supply, e.g. "29-Karnataka"
+    row_hash = Column(String)  # content hash of the source row (bulk_loader.row_hashes)
     imported_at = Column(DateTime, default=datetime.now)
 
 
 class FlipkartReturn(Base):
     __tablename__ = "flipkart_returns"
+    __table_args__ = (
+        Index("ix_flipkart_returns_gstin_period", "seller_gstin", "financial_year", "month_number"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     marketplace = Column(String, default="Flipkart")
@@ -152,6 +186,13 @@ class FlipkartReturn(Base):
     sgst_amount = Column(Float)
     customer_delivery_state = Column(String)
     is_shopsy = Column(String)
+    # Derived at import from the columns above (see derived_columns)
+    financial_year = Column(Integer)  # end-year FY of order_date
+    month_number = Column(Integer)  # calendar month of order_date
+    is_b2b = Column(Boolean, default=False)  # buyer GSTIN present
+    effective_gst_rate = Column(Float)  # IGST rate, else CGST + SGST; NULL when neither is set
+    pos_state_code = Column(String)  # place of supply, e.g. "29-Karnataka"
+    row_hash = Column(String)  # content hash of the source row (bulk_loader.row_hashes)
     imported_at = Column(DateTime, default=datetime.now)
 
 
@@ -159,6 +200,13 @@ class FlipkartReturn(Base):
 
 class AmazonOrder(Base):
     __tablename__ = "amazon_orders"
+    __table_args__ = (
+        # Natural key - MTR imports rely on it for INSERT ... ON CONFLICT DO NOTHING
+        Index("uq_amazon_orders_order_shipment_item", "order_id", "shipment_item_id", unique=True),
+        # GSTR-1 reports: one GSTIN's B2B or B2C shipments in one period
+        Index("ix_amazon_orders_gstin_type_period", "seller_gstin", "transaction_type", "financial_year",
+              "month_number", "is_b2b"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     marketplace = Column(String, default="Amazon")  # Amazon
@@ -224,11 +272,24 @@ class AmazonOrder(Base):
     warehouse_id = Column(String)
     fulfillment_channel = Column(String)  # MFN, FBA
 
+    # Derived at import from the columns above (see derived_columns)
+    financial_year = Column(Integer)  # end-year FY of order_date
+    month_number = Column(Integer)  # calendar month of order_date
+    is_b2b = Column(Boolean, default=False)  # buyer GSTIN present
+    effective_gst_rate = Column(Float)  # IGST rate, else CGST + SGST; NULL when neither is set
+    pos_state_code = Column(String)  # place of supply, e.g. "29-Karnataka"
+    row_hash = Column(String)  # content hash of the source row (bulk_loader.row_hashes)
     imported_at = Column(DateTime, default=datetime.now)
 
 
 class AmazonReturn(Base):
     __tablename__ = "amazon_returns"
+    __table_args__ = (
+        Index("uq_amazon_returns_order_shipment_item", "order_id", "shipment_item_id", unique=True),
+        # transaction_type last: the B2B returns queries take every type
+        Index("ix_amazon_returns_gstin_period_type", "seller_gstin", "financial_year", "month_number",
+              "is_b2b", "transaction_type"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     marketplace = Column(String, default="Amazon")
@@ -263,4 +324,114 @@ class AmazonReturn(Base):
     customer_bill_to_gstid = Column(String, index=True)
     buyer_name = Column(String)
 
+    # Derived at import from the columns above (see derived_columns)
+    financial_year = Column(Integer)  # end-year FY of order_date
+    month_number = Column(Integer)  # calendar month of order_date
+    is_b2b = Column(Boolean, default=False)  # buyer GSTIN present
+    effective_gst_rate = Column(Float)  # IGST rate, else CGST + SGST; NULL when neither is set
+    pos_state_code = Column(String)  # place of supply, e.g. "29-Karnataka"
+    row_hash = Column(String)  # content hash of the source row (bulk_loader.row_hashes)
+    imported_at = Column(DateTime, default=datetime.now)
+
+
+class SalesLedger(Base):
+    """
+    One normalized row per taxable line of every marketplace table (see ledger.py).
+    Credit notes and cancellations carry negative amounts.
+    """
+    __tablename__ = "sales_ledger"
+    __table_args__ = (
+        # Each source row has at most one ledger row
+        Index("uq_sales_ledger_source", "source_table", "source_id", unique=True),
+        Index("ix_sales_ledger_gstin_period", "gstin", "financial_year", "month_number", "document_type"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source_table = Column(String, nullable=False)  # meesho_sales, flipkart_orders, amazon_returns, ...
+    source_id = Column(Integer, nullable=False)  # id of the row in source_table
+    marketplace = Column(String)  # Meesho, Flipkart, Shopsy, Amazon
+    gstin = Column(String)  # Seller GSTIN
+    financial_year = Column(Integer)
+    month_number = Column(Integer)
+    document_type = Column(String)  # invoice, credit_note, cancellation
+    is_b2b = Column(Boolean, default=False)
+    buyer_gstin = Column(String)
+    invoice_number = Column(String)
+    pos_state_code = Column(String)  # place of supply, e.g. "29-Karnataka"
+    gst_rate = Column(Float)
+    hsn_code = Column(String)
+    quantity = Column(Integer)
+    taxable_value = Column(Float)
+    igst_amount = Column(Float)
+    cgst_amount = Column(Float)
+    sgst_amount = Column(Float)
+    tax_amount = Column(Float)  # total tax (Meesho reports no IGST/CGST/SGST split)
+
+
+class ImportManifest(Base):
+    """One row per imported source file, keyed by its SHA-256 (identical re-uploads are skipped)"""
+    __tablename__ = "import_manifest"
+    __table_args__ = (
+        # The same bytes imported through a different importer are a different import
+        Index("uq_import_manifest_sha256_report_type", "sha256", "report_type", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sha256 = Column(String, nullable=False)
+    file_name = Column(String)
+    file_size = Column(Integer)
+    report_type = Column(String, nullable=False)  # meesho_gst, meesho_invoices, flipkart_sales, amazon_mtr, ...
+    marketplace = Column(String)  # Meesho, Flipkart, Amazon
+    gstin = Column(String, index=True)
+    financial_year = Column(Integer)  # Period, when the file states it (Meesho)
+    month_number = Column(Integer)
+    rows_imported = Column(Integer)
+    duration_seconds = Column(Float)
     imported_at = Column(DateTime, default=datetime.now)
+
+
+# Place-of-supply state and buyer GSTIN columns behind the derived columns
+DERIVED_SOURCES = {
+    "flipkart_orders": ("customer_delivery_state", None),  # Sales Reports are B2C only
+    "flipkart_returns": ("customer_delivery_state", None),
+    "amazon_orders": ("ship_to_state", "customer_bill_to_gstid"),
+    "amazon_returns": ("ship_to_state", "customer_bill_to_gstid"),
+}
+
+
+def derived_columns(table_name: str, columns: dict) -> dict:
+    """
+    ``financial_year``, ``month_number``, ``is_b2b``, ``effective_gst_rate``
+    and ``pos_state_code`` of ``table_name`` rows given as ``{column: array}``
+    (order_date, the rate columns and the source columns above).
+
+    Imports add them to their bulk rows, migration 5 backfills them and the
+    ORM sets them on flush, so reports can filter on a period and the B2B
+    flag instead of order_date ranges and buyer GSTIN checks.
+    """
+    state_column, gstin_column = DERIVED_SOURCES[table_name]
+    financial_year, month_number = financial_periods(columns["order_date"])
+    rates = effective_gst_rates(columns["igst_rate"], columns["cgst_rate"], columns["sgst_rate"])
+    is_b2b = b2b_mask(columns[gstin_column]) if gstin_column else [False] * len(financial_year)
+    return {
+        "financial_year": financial_year,
+        "month_number": month_number,
+        "is_b2b": [bool(flag) for flag in is_b2b],
+        "effective_gst_rate": [None if rate != rate else rate for rate in rates.tolist()],
+        "pos_state_code": state_codes(columns[state_column]),
+    }
+
+
+def _set_derived_columns(mapper, connection, target):
+    state_column, gstin_column = DERIVED_SOURCES[target.__tablename__]
+    sources = {
+        name: [getattr(target, name)]
+        for name in ("order_date", "igst_rate", "cgst_rate", "sgst_rate", state_column, gstin_column) if name
+    }
+    for name, values in derived_columns(target.__tablename__, sources).items():
+        setattr(target, name, values[0])
+
+
+for _model in (FlipkartOrder, FlipkartReturn, AmazonOrder, AmazonReturn):
+    event.listen(_model, "before_insert", _set_derived_columns)
+    event.listen(_model, "before_update", _set_derived_columns)
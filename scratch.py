@@ -0,0 +1,40 @@
+"""
+Per-operation scratch directories.
+
+Every operation that needs temporary files gets its own directory from
+``tempfile.mkdtemp`` and removes it when done, even on error, so concurrent
+imports and exports (threads, processes or several app instances) never
+share or delete each other's files.
+
+The root defaults to the system temp folder. Set ``GST_SCRATCH_DIR`` to put
+scratch files elsewhere, e.g. on a RAM-backed tmpfs such as ``/dev/shm``.
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+SCRATCH_ROOT_ENV = "GST_SCRATCH_DIR"
+
+
+def scratch_root() -> str:
+    """Folder that scratch directories are created in (created if missing)."""
+    root = os.environ.get(SCRATCH_ROOT_ENV) or tempfile.gettempdir()
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+@contextmanager
+def scratch_dir(prefix: str = "gst_", root: str = None):
+    """
+    Yield the path of a new, private directory and delete it afterwards.
+
+    Args:
+        prefix: Directory name prefix, to tell operations apart when debugging
+        root: Parent folder; defaults to :func:`scratch_root`
+    """
+    path = tempfile.mkdtemp(prefix=prefix, dir=root or scratch_root())
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,192 @@
+"""Tests for auto_migrate module."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event, inspect, text
+
+import auto_migrate
+from database import Base, make_engine
+
+
+def _engine(tmp_path, monkeypatch):
+    engine = make_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setattr(auto_migrate, "engine", engine)
+    return engine
+
+
+def _versions(engine):
+    with engine.connect() as conn:
+        return [v for (v,) in conn.execute(text("SELECT version FROM schema_version ORDER BY version"))]
+
+
+def test_new_database_is_stamped_current(tmp_path, monkeypatch):
+    engine = _engine(tmp_path, monkeypatch)
+    assert auto_migrate.auto_migrate() == ["✅ All tables created"]
+    assert _versions(engine) == [v for v, _, _ in auto_migrate.MIGRATIONS]
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    assert auto_migrate.auto_migrate() == ["✅ Database schema is up-to-date"]
+    assert statements == ["SELECT MAX(version) FROM schema_version"]
+    engine.dispose()
+
+
+def test_database_without_schema_version_runs_every_step(tmp_path, monkeypatch):
+    engine = _engine(tmp_path, monkeypatch)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE schema_version")
+        conn.exec_driver_sql("DROP TABLE import_manifest")
+        conn.exec_driver_sql("ALTER TABLE meesho_sales DROP COLUMN row_hash")
+        conn.exec_driver_sql("DROP INDEX ix_flipkart_orders_gstin_event_period")
+
+    messages = auto_migrate.auto_migrate()
+    assert "✅ Created table: import_manifest" in messages
+    assert "✅ Added column: meesho_sales.row_hash" in messages
+    assert "✅ Created index: ix_flipkart_orders_gstin_event_period" in messages
+    assert not [m for m in messages if m.startswith(("⚠️", "❌"))]
+    assert _versions(engine) == [v for v, _, _ in auto_migrate.MIGRATIONS]
+    assert "row_hash" in {c["name"] for c in inspect(engine).get_columns("meesho_sales")}
+    engine.dispose()
+
+
+def _indexes(engine):
+    inspector = inspect(engine)
+    return {
+        (table, idx["name"], tuple(idx["column_names"]))
+        for table in inspector.get_table_names() for idx in inspector.get_indexes(table)
+    }
+
+
+def test_unique_index_step_touches_only_its_own_indexes(tmp_path, monkeypatch):
+    # A database at version 2: no Amazon natural-key indexes yet, duplicates stored
+    engine = _engine(tmp_path, monkeypatch)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX uq_amazon_orders_order_shipment_item")
+        conn.exec_driver_sql("DROP INDEX ix_meesho_invoices_invoice_no")  # unique on the model, not migration 3's
+        for step_version, description, _ in auto_migrate.MIGRATIONS[:2]:
+            auto_migrate._record_version(conn, step_version, description)
+        conn.execute(text(
+            "INSERT INTO amazon_orders (order_id, shipment_item_id) VALUES ('A1', '1'), ('A1', '1'), ('A2', '2')"
+        ))
+        conn.execute(text("INSERT INTO meesho_invoices (invoice_no) VALUES ('M1'), ('M1')"))
+
+    messages = auto_migrate.auto_migrate()
+    assert "🧹 Removed 1 duplicate rows from amazon_orders" in messages
+    assert "✅ Created index: uq_amazon_orders_order_shipment_item" in messages
+    assert not [m for m in messages if "meesho_invoices" in m]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM meesho_invoices")).scalar() == 2
+    assert "ix_meesho_invoices_invoice_no" not in {idx["name"] for idx in inspect(engine).get_indexes("meesho_invoices")}
+    engine.dispose()
+
+
+def test_derived_columns_are_backfilled(tmp_path, monkeypatch):
+    from datetime import datetime
+    from models import DERIVED_SOURCES
+
+    fresh = make_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    Base.metadata.create_all(fresh)
+
+    # A database at version 4: no derived columns, order_date indexes
+    engine = _engine(tmp_path, monkeypatch)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table_name in DERIVED_SOURCES:
+            for index in Base.metadata.tables[table_name].indexes:
+                if "is_b2b" in index.columns or "financial_year" in index.columns:
+                    conn.exec_driver_sql(f"DROP INDEX {index.name}")
+            for column in auto_migrate.DERIVED_COLUMNS:
+                conn.exec_driver_sql(f"ALTER TABLE {table_name} DROP COLUMN {column}")
+        for step_version, description, _ in auto_migrate.MIGRATIONS[:4]:
+            auto_migrate._record_version(conn, step_version, description)
+        auto_migrate._add_report_indexes(conn, [])
+        conn.execute(text(
+            "INSERT INTO amazon_orders (order_id, shipment_item_id, transaction_type, order_date, igst_rate, "
+            "cgst_rate, sgst_rate, ship_to_state, customer_bill_to_gstid) VALUES "
+            "('A1', '1', 'Shipment', :apr, 18.0, 0.0, 0.0, 'KARNATAKA', '29AAAAA0000A1Z5'), "
+            "('A2', '2', 'Shipment', :mar, 0.0, 2.5, 2.5, ' kerala ', 'nan'), "
+            "('A3', '3', 'Shipment', NULL, NULL, NULL, NULL, NULL, NULL)"
+        ), {"apr": datetime(2025, 4, 1, 9, 30), "mar": datetime(2026, 3, 31, 23, 59)})
+        conn.execute(text(
+            "INSERT INTO flipkart_returns (order_item_id, order_date, igst_rate, customer_delivery_state) "
+            "VALUES ('F1', :jan, 5.0, 'Goa')"
+        ), {"jan": datetime(2026, 1, 15)})
+
+    messages = auto_migrate.auto_migrate()
+    assert messages[0] == "📋 Migration 5: Derived period, B2B, rate and place-of-supply columns"
+    assert "✅ Derived columns filled in for 3 amazon_orders rows" in messages
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT order_id, financial_year, month_number, is_b2b, effective_gst_rate, pos_state_code "
+            "FROM amazon_orders ORDER BY order_id"
+        )).all()
+        returns = conn.execute(text("SELECT financial_year, month_number, is_b2b, pos_state_code FROM flipkart_returns")).all()
+    assert [tuple(row) for row in rows] == [
+        ("A1", 2026, 4, 1, 18.0, "29-Karnataka"),
+        ("A2", 2026, 3, 0, 5.0, "32-Kerala"),
+        ("A3", None, None, 0, None, None),
+    ]
+    assert [tuple(row) for row in returns] == [(2026, 1, 0, "30-Goa")]
+    # Migration 6 then files them in the sales ledger
+    assert "✅ Sales ledger filled in with 4 rows" in messages
+    with engine.connect() as conn:
+        ledger = conn.execute(text(
+            "SELECT source_table, document_type, financial_year, month_number, gst_rate, pos_state_code, buyer_gstin "
+            "FROM sales_ledger ORDER BY source_table, source_id"
+        )).all()
+    assert [tuple(row) for row in ledger] == [
+        ("amazon_orders", "invoice", 2026, 4, 18.0, "29-Karnataka", "29AAAAA0000A1Z5"),
+        ("amazon_orders", "invoice", 2026, 3, 5.0, "32-Kerala", None),
+        ("amazon_orders", "invoice", None, None, None, None, None),
+        ("flipkart_returns", "credit_note", 2026, 1, 5.0, "30-Goa", None),
+    ]
+    # Same indexes as a new database (plus the seller_gstin ones of migration 2)
+    assert _indexes(fresh) <= _indexes(engine)
+    assert not {name for _, name, _ in _indexes(engine) if name.endswith("_date") or name.endswith("_date_type")}
+    fresh.dispose()
+    engine.dispose()
+
+
+def test_b2c_ledger_buyer_gstins_are_cleared(tmp_path, monkeypatch):
+    engine = _engine(tmp_path, monkeypatch)
+    auto_migrate.auto_migrate()
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM schema_version WHERE version = 7"))
+        conn.execute(text(
+            "INSERT INTO sales_ledger (source_table, source_id, document_type, is_b2b, buyer_gstin) VALUES "
+            "('amazon_orders', 1, 'invoice', 1, '29AAAAA0000A1Z5'), ('amazon_orders', 2, 'invoice', 0, 'nan'), "
+            "('amazon_orders', 3, 'invoice', 0, '')"
+        ))
+
+    assert auto_migrate.auto_migrate()[-1] == "✅ Cleared the buyer GSTIN of 2 B2C sales ledger rows"
+    with engine.connect() as conn:
+        gstins = conn.execute(text("SELECT buyer_gstin FROM sales_ledger ORDER BY source_id")).scalars().all()
+    assert gstins == ["29AAAAA0000A1Z5", None, None]
+    engine.dispose()
+
+
+def test_failed_step_is_retried(tmp_path, monkeypatch):
+    engine = _engine(tmp_path, monkeypatch)
+    auto_migrate.auto_migrate()
+
+    def broken(conn, messages):
+        conn.execute(text("CREATE INDEX ix_scratch ON seller_mapping (gstin)"))
+        raise RuntimeError("disk full")
+
+    version = auto_migrate.SCHEMA_VERSION + 1
+    monkeypatch.setattr(auto_migrate, "MIGRATIONS", auto_migrate.MIGRATIONS + [(version, "Broken", broken)])
+    monkeypatch.setattr(auto_migrate, "SCHEMA_VERSION", version)
+    messages = auto_migrate.auto_migrate()
+    assert messages[-1] == f"⚠️  Migration {version} failed (retried on next start): disk full"
+    assert _versions(engine)[-1] == version - 1
+
+    def fixed(conn, messages):
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_scratch ON seller_mapping (gstin)"))
+
+    monkeypatch.setattr(auto_migrate, "MIGRATIONS", auto_migrate.MIGRATIONS[:-1] + [(version, "Fixed", fixed)])
+    assert auto_migrate.auto_migrate() == [f"📋 Migration {version}: Fixed"]
+    assert _versions(engine)[-1] == version
+    engine.dispose()
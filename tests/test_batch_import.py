@@ -0,0 +1,61 @@
+"""Tests for batch_import module."""
+import sys
+import os
+import io
+import zipfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from batch_import import import_directory, run_batch, find_import_files
+from tests.test_import_logic import (
+    get_test_db, _meesho_frame, _write_amazon_mtr_zip, _write_flipkart_sales_report,
+)
+
+
+def _write_meesho_gst_zip(path):
+    buffer = io.BytesIO()
+    _meesho_frame().to_excel(buffer, index=False)
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("gst_12345_1_2026/tcs_sales.xlsx", buffer.getvalue())
+
+
+def test_run_batch_imports_month_folder(tmp_path, monkeypatch):
+    import import_logic
+    from models import MeeshoSale, AmazonOrder, FlipkartOrder
+
+    monkeypatch.setattr(import_logic, "_TEMP_GSTIN_FILE", str(tmp_path / "gstin.json"))
+    (tmp_path / "seller1").mkdir()
+    (tmp_path / "seller2").mkdir()
+    _write_meesho_gst_zip(tmp_path / "seller1" / "gst_12345_1_2026.zip")
+    _write_amazon_mtr_zip(tmp_path / "seller1" / "b2cReport.zip", [("404-1", 111, "Shipment")])
+    _write_flipkart_sales_report(tmp_path / "seller2" / "sales.xlsx", [(1001, "Sale", False)])
+    with zipfile.ZipFile(tmp_path / "notes.zip", "w") as zf:
+        zf.writestr("readme.txt", "not a report")
+
+    paths = find_import_files(str(tmp_path))
+    assert len(paths) == 4
+
+    db = get_test_db()
+    summaries = {os.path.basename(s["path"]): s for s in run_batch(paths, db, workers=2)}
+    assert summaries["gst_12345_1_2026.zip"]["kind"] == "meesho_gst"
+    assert summaries["gst_12345_1_2026.zip"]["status"] == "imported"
+    assert summaries["b2cReport.zip"]["kind"] == "amazon_mtr"
+    assert summaries["b2cReport.zip"]["status"] == "imported"
+    assert summaries["b2cReport.zip"]["parse_seconds"] == 0.0  # streamed by the writer, not parsed in the pool
+    assert summaries["notes.zip"]["status"] == "skipped"
+
+    # No Flipkart GST Report next to it, so there is no safe seller GSTIN
+    assert summaries["sales.xlsx"]["status"] == "failed"
+    assert "BLOCKED" in summaries["sales.xlsx"]["messages"][0]
+
+    assert db.query(MeeshoSale).count() == 3
+    assert db.query(AmazonOrder).count() == 1
+    assert db.query(FlipkartOrder).count() == 0
+
+    # Second run: both imported files are in the import manifest
+    messages = import_directory(str(tmp_path), db, workers=2)
+    assert messages[-1].startswith("\n📊 4 files: 0 imported, 1 failed, 3 skipped in ")
+
+    messages = import_directory(str(tmp_path), db, workers=2, force=True)
+    assert messages[-1].startswith("\n📊 4 files: 2 imported, 1 failed, 1 skipped in ")
+    assert db.query(MeeshoSale).count() == 3  # period replaced, not duplicated
+    db.close()
@@ -0,0 +1,29 @@
+"""Tests for the synthetic data generator and import benchmarks."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from batch_import import classify_file
+from bench_imports import ENTRY_POINTS, run_benchmarks
+from synthetic_data import GENERATORS, generate_month
+
+
+def test_generated_reports_are_recognised(tmp_path):
+    files = generate_month(str(tmp_path), 30, seed=1)
+    assert {kind: classify_file(path) for kind, (path, _) in files.items()} == {kind: kind for kind in GENERATORS}
+    assert files["meesho_gst"][1] == 36  # 30 sales + 6 returns
+
+    # Same seed, same bytes
+    again = generate_month(str(tmp_path / "again"), 30, ["amazon_mtr"], seed=1)
+    with open(files["amazon_mtr"][0], "rb") as a, open(again["amazon_mtr"][0], "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_run_benchmarks_times_every_entry_point():
+    results = list(run_benchmarks([40], repeat=1, memory=True))
+    assert [r["kind"] for r in results] == list(ENTRY_POINTS)
+    for result in results:
+        assert result["rows"] >= 40
+        assert result["seconds"] > 0 and result["rows_per_sec"] > 0
+        assert result["peak_mb"] > 0
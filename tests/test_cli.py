@@ -0,0 +1,85 @@
+"""Tests for cli module."""
+import sys
+import os
+import io
+import subprocess
+import zipfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from cli import run_imports, run_reports, period_folder
+from tests.test_import_logic import get_test_db, _meesho_frame
+
+GSTIN = "29ABCDE1234F1Z5"
+
+
+def _write_meesho_gst_zip(path):
+    buffer = io.BytesIO()
+    _meesho_frame().to_excel(buffer, index=False)
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("tcs_sales.xlsx", buffer.getvalue())
+
+
+def test_cli_does_not_import_qt():
+    root = os.path.join(os.path.dirname(__file__), '..')
+    code = "import sys, cli; print(any(name.startswith('PySide6') for name in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_import_folder_then_generate_reports(tmp_path):
+    month = tmp_path / "jan"
+    month.mkdir()
+    _write_meesho_gst_zip(month / "gst_12345_1_2026.zip")
+    (month / "notes.txt").write_text("not a report")
+    db = get_test_db()
+
+    events = run_imports([str(month)], db, workers=1)
+    statuses = {os.path.basename(e["path"]): e["status"] for e in events}
+    assert statuses == {"gst_12345_1_2026.zip": "imported"}
+    assert all(e["event"] == "import" and "write_seconds" in e for e in events)
+
+    out = tmp_path / "out"
+    events = list(run_reports(db, [GSTIN], [(2026, 1)], ["b2cs", "docs", "workbook"], str(out)))
+    assert [(e["report"], e["status"]) for e in events] == [("b2cs", "ok"), ("docs", "no_data"), ("workbook", "ok")]
+    assert all(e["seconds"] >= 0 for e in events)
+
+    folder = period_folder(str(out), GSTIN, 2026, 1)
+    assert sorted(os.listdir(folder)) == ["GSTR1_FY2026_January_2026.xlsx", "b2cs.csv"]
+    db.close()
+
+
+def test_report_periods_cross_financial_years():
+    import argparse
+    import pytest
+    from cli import _period, report_periods
+
+    assert _period("2027:1") == (2027, 1)
+    for text in ("2027", "2027:13", "FY27:1"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            _period(text)
+    assert report_periods([2026], [12, 3], [(2027, 1), (2026, 12)]) == [(2026, 12), (2026, 3), (2027, 1)]
+    assert report_periods(None, None, [(2027, 1)]) == [(2027, 1)]
+
+
+def test_docs_report_covers_its_period_only(tmp_path, monkeypatch):
+    import json
+    import csv
+    import import_logic
+    from tests.test_import_logic import _write_flipkart_sales_report
+
+    gstin_file = tmp_path / "gstin.json"
+    gstin_file.write_text(json.dumps({"last_flipkart_gstin": GSTIN}))
+    monkeypatch.setattr(import_logic, "_TEMP_GSTIN_FILE", str(gstin_file))
+    path = tmp_path / "sales.xlsx"
+    _write_flipkart_sales_report(path, [(1001, "Sale", False), (1002, "Sale", False)])  # January 2026
+    db = get_test_db()
+    import_logic.import_flipkart_sales(str(path), db)
+
+    out = tmp_path / "out"
+    events = list(run_reports(db, [GSTIN], [(2026, 1), (2026, 2)], ["docs"], str(out)))
+    assert [(e["month_number"], e["status"]) for e in events] == [(1, "ok"), (2, "no_data")]
+    with open(os.path.join(period_folder(str(out), GSTIN, 2026, 1), "docs.csv"), newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[1] == ["Invoices for outward supply", "FAMS1001S", "FAMS1002S", "2", "0"]
+    assert not os.path.exists(os.path.join(period_folder(str(out), GSTIN, 2026, 2), "docs.csv"))
+    db.close()
@@ -4,10 +4,12 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from datetime import datetime
+
+import numpy as np
 from constants import (
     get_state_code, generate_note_number,
     NoteType, TransactionType, B2CL_INVOICE_THRESHOLD,
-    STATE_CODE_MAPPING, normalize_rate, fy_month_to_date_range,
+    STATE_CODE_MAPPING, normalize_rate, normalize_rates, fy_month_to_date_range,
 )
 
 
@@ -93,6 +95,14 @@ def test_normalize_rate_edge_cases():
     assert normalize_rate("invalid") == 0.0
 
 
+def test_normalize_rates_matches_normalize_rate():
+    values = [None, 0, -0.0, 5, 0.05, "18", " 0.12 ", "invalid", 1.055, 0.185, 28, 1.0]
+    assert normalize_rates(values).tolist() == [normalize_rate(v) for v in values]
+    numeric = [0.05, 0.18, 12.0, 0.0, 2.675]
+    assert normalize_rates(numeric).tolist() == [normalize_rate(v) for v in numeric]
+    assert np.isnan(normalize_rates([float("nan"), "x"])[0])
+
+
 # --- fy_month_to_date_range tests ---
 
 def test_fy_month_to_date_range_jan():
@@ -121,3 +131,27 @@ def test_fy_month_to_date_range_dec():
     start, end = fy_month_to_date_range(2026, 12)
     assert start == datetime(2025, 12, 1)
     assert end == datetime(2026, 1, 1)
+
+
+def test_financial_periods_inverts_fy_month_to_date_range():
+    from datetime import date, datetime
+    from constants import financial_periods, fy_month_to_date_range
+
+    dates = [date(2025, 4, 1), datetime(2026, 3, 31, 23, 59), None, date(2025, 12, 31)]
+    years, months = financial_periods(dates)
+    assert (years, months) == ([2026, 2026, None, 2026], [4, 3, None, 12])
+    for day, fy, month in zip(dates, years, months):
+        if day is not None:
+            start, end = fy_month_to_date_range(fy, month)
+            assert start <= datetime(day.year, day.month, day.day) < end
+
+
+def test_effective_gst_rates_and_b2b_mask():
+    from constants import b2b_mask, effective_gst_rates, state_codes
+
+    rates = effective_gst_rates([18.0, 0.0, None, -5.0], [0.0, 2.5, 6.0, 0.0], [0.0, 2.5, None, 0.0])
+    assert rates[:2].tolist() == [18.0, 5.0]
+    assert np.isnan(rates[2]) and np.isnan(rates[3])
+    assert effective_gst_rates([-5.0], [0.0], [0.0], positive_igst=False).tolist() == [-5.0]
+    assert b2b_mask(["29AAAAA0000A1Z5", "", "nan", None]).tolist() == [True, False, False, False]
+    assert state_codes(["karnataka ", None, "", "Atlantis"]) == ["29-Karnataka", None, None, "Atlantis"]
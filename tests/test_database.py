@@ -0,0 +1,55 @@
+"""Tests for database module - storage profile."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from database import Base, make_engine
+import models  # noqa: F401 - register tables
+
+
+def _pragma(conn, name):
+    return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_connections_get_the_storage_pragmas(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    writer, reader = make_engine(url), make_engine(url, read_only=True)
+    with writer.connect() as conn:
+        assert _pragma(conn, "journal_mode") == "wal"
+        assert _pragma(conn, "synchronous") == 1  # NORMAL
+        assert _pragma(conn, "cache_size") == -65536
+        assert _pragma(conn, "temp_store") == 2  # MEMORY
+        assert _pragma(conn, "query_only") == 0
+    with reader.connect() as conn:
+        assert _pragma(conn, "query_only") == 1
+        assert _pragma(conn, "cache_size") == -65536
+        with pytest.raises(OperationalError, match="readonly"):
+            conn.execute(text("CREATE TABLE t (x)"))
+    writer.dispose()
+    reader.dispose()
+
+
+def test_reports_read_while_an_import_writes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    writer, reader = make_engine(url), make_engine(url, read_only=True)
+    Base.metadata.create_all(writer)
+    with writer.begin() as conn:
+        conn.execute(text("INSERT INTO meesho_sales (sub_order_num) VALUES ('1')"))
+
+    # A big import holds the exclusive lock once its page cache spills; with a
+    # rollback journal every reader would now get "database is locked"
+    importing = writer.raw_connection()
+    importing.execute("BEGIN EXCLUSIVE")
+    importing.executemany("INSERT INTO meesho_sales (sub_order_num) VALUES (?)", [(str(i),) for i in range(2, 500)])
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM meesho_sales")).scalar() == 1  # last commit
+    importing.commit()
+    importing.close()
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM meesho_sales")).scalar() == 499
+    writer.dispose()
+    reader.dispose()
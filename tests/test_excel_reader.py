@@ -0,0 +1,138 @@
+"""Tests for excel_reader module."""
+import sys
+import os
+import io
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+
+from excel_reader import read_sheet, iter_sheet_batches, sheet_row_counts
+
+
+def _workbook():
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        pd.DataFrame({
+            "Order ID": ["OD1", "OD2", None, "OD4"],
+            "Qty": [1, 2, None, 4],
+            "Rate": [0.05, 0.18, None, 0.12],
+            "Date": pd.to_datetime(["2026-01-01", "2026-01-02", None, "2026-01-04"]),
+            "Shopsy": [True, False, None, False],
+            "Notes": ["a", "NA", None, "#N/A"],
+        }).to_excel(writer, sheet_name="Sales Report", index=False)
+        pd.DataFrame([["Summary", None], [None, None], ["Rate", "Value"], [0.05, 10]]).to_excel(
+            writer, sheet_name="Summary", index=False, header=False)
+    return buffer.getvalue()
+
+
+def test_read_sheet_matches_read_excel():
+    data = _workbook()
+    for sheet, header in (("Sales Report", 0), ("Summary", 0), ("Summary", 2)):
+        expected = pd.read_excel(io.BytesIO(data), sheet_name=sheet, header=header)
+        pd.testing.assert_frame_equal(read_sheet(io.BytesIO(data), sheet_name=sheet, header=header), expected)
+
+
+def test_read_sheet_usecols():
+    data = _workbook()
+    expected = pd.read_excel(io.BytesIO(data), sheet_name="Sales Report")[["Order ID", "Rate"]]
+    got = read_sheet(io.BytesIO(data), sheet_name="Sales Report", usecols=["Order ID", "Rate", "Missing"])
+    pd.testing.assert_frame_equal(got, expected)
+
+    got = read_sheet(io.BytesIO(data), sheet_name=0, usecols=lambda name: name.startswith("Q"))
+    assert list(got.columns) == ["Qty"]
+    assert len(got) == 4  # blank middle row kept, as pandas does
+
+
+def test_iter_sheet_batches():
+    data = _workbook()
+    batches = list(iter_sheet_batches(io.BytesIO(data), "Sales Report", usecols=["Order ID"], batch_size=3))
+    assert [len(batch) for batch in batches] == [3, 1]
+    assert pd.concat(batches)["Order ID"].tolist()[-1] == "OD4"
+
+
+def test_sheet_row_counts_match_read_excel():
+    buffer = io.BytesIO(_workbook())
+    with pd.ExcelWriter(buffer, mode="a") as writer:
+        pd.DataFrame().to_excel(writer, sheet_name="Empty", index=False)
+        sheet = writer.book.create_sheet("Trailing blanks")
+        sheet.append(["GSTIN", "Rate"])
+        sheet.append(["07AAAAA0000A1Z5", 5])
+        sheet.append([None, None])
+        sheet.append(["", None])  # empty text cell reads as blank
+    data = buffer.getvalue()
+
+    counts = sheet_row_counts(io.BytesIO(data))
+    assert counts == {
+        sheet: len(pd.read_excel(io.BytesIO(data), sheet_name=sheet))
+        for sheet in pd.ExcelFile(io.BytesIO(data)).sheet_names
+    }
+    assert counts["Sales Report"] == 4  # blank middle row counted, as pandas does
+    assert counts["Trailing blanks"] == 1
+
+
+def test_open_workbook_reuses_parse_until_file_changes(tmp_path):
+    from excel_reader import open_workbook, close_workbook
+
+    path = tmp_path / "report.xlsx"
+    path.write_bytes(_workbook())
+
+    workbook = open_workbook(str(path))
+    assert workbook.sheet_names == ["Sales Report", "Summary"]
+    pd.testing.assert_frame_equal(
+        workbook.read("Sales Report", nrows=1),
+        pd.read_excel(path, sheet_name="Sales Report", nrows=1),
+    )
+    assert open_workbook(str(path)) is workbook
+
+    pd.DataFrame({"Order ID": ["OD9"]}).to_excel(path, sheet_name="Sales Report", index=False)
+    os.utime(path, ns=(0, 0))  # different mtime even on coarse filesystem clocks
+    reopened = open_workbook(str(path))
+    assert reopened is not workbook
+    assert reopened.read("Sales Report")["Order ID"].tolist() == ["OD9"]
+
+    close_workbook(str(path))
+    assert open_workbook(str(path)) is not reopened
+    close_workbook(str(path))
+
+
+def test_open_workbook_read_keeps_only_requested_columns(tmp_path):
+    from excel_reader import open_workbook, close_workbook
+
+    path = tmp_path / "report.xlsx"
+    path.write_bytes(_workbook())
+    workbook = open_workbook(str(path))
+    pd.testing.assert_frame_equal(
+        workbook.read("Sales Report", usecols=["Order ID"]),
+        pd.read_excel(path, sheet_name="Sales Report", usecols=["Order ID"]),
+    )
+    close_workbook(str(path))
+
+
+def test_open_workbook_streams_each_sheet_once(tmp_path):
+    from excel_reader import open_workbook, close_workbook
+
+    path = tmp_path / "report.xlsx"
+    path.write_bytes(_workbook())
+    workbook = open_workbook(str(path))
+    passes = []
+    sheet_rows = workbook._book.rows
+    workbook._book.rows = lambda name: passes.append(name) or sheet_rows(name)
+
+    header = workbook.read("Sales Report", nrows=1)  # validation
+    data = workbook.read("Sales Report", usecols=["Order ID"])  # import
+    assert passes == ["Sales Report"]
+    pd.testing.assert_frame_equal(header, pd.read_excel(path, sheet_name="Sales Report", nrows=1))
+    pd.testing.assert_frame_equal(data, pd.read_excel(path, sheet_name="Sales Report", usecols=["Order ID"]))
+    close_workbook(str(path))
+
+
+def test_closed_workbook_handle_still_reads(tmp_path):
+    from excel_reader import open_workbook, close_workbook
+
+    path = tmp_path / "report.xlsx"
+    path.write_bytes(_workbook())
+    workbook = open_workbook(str(path))
+    workbook.read("Sales Report", nrows=1)
+    close_workbook(str(path))  # e.g. evicted by another thread's upload
+    pd.testing.assert_frame_equal(workbook.read("Sales Report"), pd.read_excel(path, sheet_name="Sales Report"))
+    workbook.close()
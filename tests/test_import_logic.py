@@ -55,3 +55,492 @@ def test_validate_flipkart_sales_excel():
 def test_validate_amazon_zip():
     is_valid, msg = validate_amazon_zip("report.xlsx")
     assert not is_valid
+
+
+# --- bulk Meesho loader tests ---
+
+def get_test_db():
+    """Create an in-memory SQLite database for testing."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from database import Base, enable_savepoints
+    import models  # noqa: F401 - register tables
+    engine = create_engine("sqlite:///:memory:")
+    enable_savepoints(engine)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def _meesho_frame(rows=3):
+    import pandas as pd
+    return pd.DataFrame({
+        "identifier": ["abc"] * rows,
+        "sup_name": ["Test Seller"] * rows,
+        "gstin": ["29ABCDE1234F1Z5"] * rows,
+        "sub_order_num": [f"SO{i}_1" for i in range(rows)],
+        "order_date": ["2026-01-09", None, "2026-01-31"][:rows],
+        "hsn_code": [9020, None, 4016][:rows],
+        "quantity": [1, 2, 3][:rows],
+        "gst_rate": [5.0, 18.0, None][:rows],
+        "total_taxable_sale_value": [100.0, 200.5, 300.25][:rows],
+        "tax_amount": [5.0, 36.09, 0][:rows],
+        "total_invoice_value": [105.0, 236.59, 300.25][:rows],
+        "taxable_shipping": [10.0, 0.0, 5.5][:rows],
+        "end_customer_state_new": ["KARNATAKA", "DELHI", None][:rows],
+        "enrollment_no": [None, 12345.0, None][:rows],
+        "financial_year": [2026] * rows,
+        "month_number": [1] * rows,
+        "supplier_id": [12345] * rows,
+    })
+
+
+def test_import_sales_data_bulk_matches_row_path(tmp_path):
+    from import_logic import import_sales_data
+    from models import MeeshoSale
+
+    df = _meesho_frame()
+    path = tmp_path / "tcs_sales.xlsx"
+    df.to_excel(path, index=False)
+
+    db = get_test_db()
+    messages = import_sales_data(str(path), db)
+    assert any("rows/sec" in m for m in messages)
+
+    rows = db.query(MeeshoSale).order_by(MeeshoSale.sub_order_num).all()
+    assert len(rows) == 3
+    for rec, (_, src) in zip(rows, df.iterrows()):
+        assert rec.order_date == parse_date(src["order_date"])
+        assert rec.quantity == int(src["quantity"])
+        assert rec.total_taxable_sale_value == safe_float(src["total_taxable_sale_value"])
+        assert rec.enrollment_no == str(src["enrollment_no"])
+        assert rec.gstin == "29ABCDE1234F1Z5"
+        assert rec.supplier_id == 12345
+    assert [r.hsn_code for r in rows] == [9020, 0, 4016]
+    assert rows[2].gst_rate is None
+    assert rows[2].end_customer_state_new is None
+    db.close()
+
+
+def test_import_sales_data_replaces_period(tmp_path):
+    from import_logic import import_sales_data
+    from models import MeeshoSale
+
+    path = tmp_path / "tcs_sales.xlsx"
+    _meesho_frame().to_excel(path, index=False)
+
+    db = get_test_db()
+    import_sales_data(str(path), db)
+    import_sales_data(str(path), db)
+    assert db.query(MeeshoSale).count() == 3
+    db.close()
+
+
+def test_import_sales_data_rewrites_only_changed_rows(tmp_path):
+    from import_logic import import_sales_data
+    from models import MeeshoSale
+
+    path = tmp_path / "tcs_sales.xlsx"
+    _meesho_frame().to_excel(path, index=False)
+    db = get_test_db()
+    import_sales_data(str(path), db)
+    ids = {r.sub_order_num: r.id for r in db.query(MeeshoSale)}
+
+    # Reissued report: one row corrected, one dropped
+    df = _meesho_frame()
+    df.loc[0, "quantity"] = 5
+    df.drop(index=2).to_excel(path, index=False)
+    messages = import_sales_data(str(path), db)
+    assert "   FY 2026, Month 1, Supplier 12345: 1 unchanged rows kept, 2 outdated rows removed" in messages
+
+    rows = {r.sub_order_num: r for r in db.query(MeeshoSale)}
+    assert set(rows) == {"SO0_1", "SO1_1"}
+    assert rows["SO1_1"].id == ids["SO1_1"]  # untouched
+    assert rows["SO0_1"].quantity == 5
+    db.close()
+
+
+def test_import_returns_data_product_name(tmp_path):
+    from import_logic import import_returns_data
+    from models import MeeshoReturn
+
+    df = _meesho_frame()
+    df["Product Name"] = ["  Phone Case ", "", None]
+    df["product_name"] = ["x", " Fallback ", "y"]
+    path = tmp_path / "tcs_sales_return.xlsx"
+    df.to_excel(path, index=False)
+
+    db = get_test_db()
+    messages = import_returns_data(str(path), db)
+    assert any("rows/sec" in m for m in messages)
+
+    rows = db.query(MeeshoReturn).order_by(MeeshoReturn.sub_order_num).all()
+    # Blank Excel cells read back as NaN, which the per-row path kept as NULL
+    assert [r.product_name for r in rows] == ["Phone Case", None, None]
+    assert all(r.product_id is None for r in rows)
+    assert [r.hsn_code for r in rows] == [9020, 0, 4016]
+    db.close()
+
+
+def test_meesho_sales_and_returns_share_columns():
+    from import_logic import _MEESHO_LINE_SPEC
+    from models import MeeshoSale, MeeshoReturn
+
+    spec_cols = {db_col for db_col, _, _ in _MEESHO_LINE_SPEC}
+    assert spec_cols <= set(MeeshoSale.__table__.columns.keys())
+    assert spec_cols <= set(MeeshoReturn.__table__.columns.keys())
+
+
+def test_meesho_product_names_fallback():
+    import pandas as pd
+    from import_logic import _meesho_product_names
+
+    df = pd.DataFrame({"Product Name": [" A ", "", 0], "product_name": ["x", " B ", "C"]})
+    assert list(_meesho_product_names(df)) == ["A", "B", "C"]
+    assert list(_meesho_product_names(pd.DataFrame({"product_name": [" D"]}))) == ["D"]
+
+
+def test_date_column_detects_format_once_per_column():
+    from collections import Counter
+    from datetime import date, datetime
+    import pandas as pd
+    from bulk_loader import date_column, detect_date_format
+
+    # Day-first: "13/01/2026" rules out month-first for the whole column
+    df = pd.DataFrame({"d": ["01/02/2026", "13/01/2026", None, "", " 05/03/2026 ", "n/a"]})
+    assert detect_date_format(df["d"]) == "%d/%m/%Y"
+    unparseable = Counter()
+    assert list(date_column(df, "d", unparseable)) == [
+        date(2026, 2, 1), date(2026, 1, 13), None, None, date(2026, 3, 5), None]
+    assert unparseable == Counter({"d": 1})
+
+    # Excel date cells mixed with text
+    df = pd.DataFrame({"d": pd.Series([datetime(2026, 1, 5, 10, 0), "2026-01-06 09:00:00", None], dtype=object)})
+    assert list(date_column(df, "d")) == [date(2026, 1, 5), date(2026, 1, 6), None]
+
+
+# --- Flipkart Sales Report import tests ---
+
+def _write_flipkart_sales_report(path, rows):
+    import pandas as pd
+    df = pd.DataFrame([{
+        "Order ID": f"OD{item_id}",
+        "Order Item ID": item_id,
+        "Product Title/Description": '"""Gloves"""',
+        "FSN": "FSN1",
+        "SKU": "SKU1",
+        "HSN Code": 61161000,
+        "Event Type": event_type,
+        "Event Sub Type": event_type,
+        "Order Date": "2026-01-15 00:00:00",
+        "Item Quantity": 1.0,
+        "Taxable Value (Final Invoice Amount -Taxes)": 195.24,
+        "IGST Rate": 0.05,
+        "IGST Amount": 9.76,
+        "Buyer Invoice ID": f"FAMS{item_id}{event_type[0]}",
+        "Buyer Invoice Date": "2026-01-16 00:00:00.0",
+        "Customer's Delivery State": "Kerala",
+        "Is Shopsy Order?": shopsy,
+    } for item_id, event_type, shopsy in rows])
+    df.to_excel(path, sheet_name="Sales Report", index=False)
+
+
+def test_import_flipkart_sales_skips_existing_keys(tmp_path, monkeypatch):
+    import json
+    import import_logic
+    from models import FlipkartOrder, FlipkartReturn
+
+    gstin_file = tmp_path / "gstin.json"
+    gstin_file.write_text(json.dumps({"last_flipkart_gstin": "06GETPD0854L1Z2"}))
+    monkeypatch.setattr(import_logic, "_TEMP_GSTIN_FILE", str(gstin_file))
+
+    path = tmp_path / "sales.xlsx"
+    _write_flipkart_sales_report(path, [
+        (1001, "Sale", False), (1002, "Sale", True), (1001, "Return", False),
+    ])
+
+    db = get_test_db()
+    db.add(FlipkartOrder(order_item_id="1002", seller_gstin="06GETPD0854L1Z2"))
+    db.commit()
+
+    messages = import_logic.import_flipkart_sales(str(path), db)
+    assert "   📦 1 orders" in messages
+    assert "   🔄 1 returns/cancellations" in messages
+    # The stored 1002 row has no content hash yet, so it is refreshed from the file
+    assert "   ✏️ 1 rows updated (changed since last import)" in messages
+    assert db.query(FlipkartOrder).filter(FlipkartOrder.order_item_id == "1002").one().marketplace == "Shopsy"
+
+    order = db.query(FlipkartOrder).filter(FlipkartOrder.order_item_id == "1001").one()
+    assert order.marketplace == "Flipkart"
+    assert order.event_type == "Sale"
+    assert order.igst_rate == 5.0
+    assert order.buyer_invoice_id == "FAMS1001S"
+    assert db.query(FlipkartReturn).one().return_amount == 0.0
+
+    # Same file again: forced past the import manifest, so the row checks run
+    messages = import_logic.import_flipkart_sales(str(path), db, force=True)
+    assert "   ⏭️ 3 duplicates skipped" in messages
+    assert not any("updated" in m for m in messages)
+    assert db.query(FlipkartOrder).count() == 2
+    db.close()
+
+
+def test_import_flipkart_sales_updates_corrected_rows(tmp_path, monkeypatch):
+    import json
+    import pandas as pd
+    import import_logic
+    from models import FlipkartOrder
+
+    gstin_file = tmp_path / "gstin.json"
+    gstin_file.write_text(json.dumps({"last_flipkart_gstin": "06GETPD0854L1Z2"}))
+    monkeypatch.setattr(import_logic, "_TEMP_GSTIN_FILE", str(gstin_file))
+
+    path = tmp_path / "sales.xlsx"
+    _write_flipkart_sales_report(path, [(1001, "Sale", False), (1002, "Sale", False)])
+    db = get_test_db()
+    import_logic.import_flipkart_sales(str(path), db)
+    first_id = db.query(FlipkartOrder).filter(FlipkartOrder.order_item_id == "1001").one().id
+
+    # Reissued report: 1001 corrected, 1003 added
+    _write_flipkart_sales_report(path, [(1001, "Sale", False), (1002, "Sale", False), (1003, "Sale", False)])
+    df = pd.read_excel(path, sheet_name="Sales Report")
+    df.loc[0, "Item Quantity"] = 2.0
+    df.to_excel(path, sheet_name="Sales Report", index=False)
+
+    messages = import_logic.import_flipkart_sales(str(path), db)
+    assert "   📦 1 orders" in messages
+    assert "   ✏️ 1 rows updated (changed since last import)" in messages
+    assert "   ⏭️ 1 duplicates skipped" in messages
+    corrected = db.query(FlipkartOrder).filter(FlipkartOrder.order_item_id == "1001").one()
+    assert (corrected.id, corrected.quantity) == (first_id, 2)
+    assert db.query(FlipkartOrder).count() == 3
+    db.close()
+
+
+def test_import_flipkart_sales_leaves_other_sellers_rows(tmp_path, monkeypatch):
+    import json
+    import import_logic
+    from models import FlipkartOrder
+
+    gstin_file = tmp_path / "gstin.json"
+    monkeypatch.setattr(import_logic, "_TEMP_GSTIN_FILE", str(gstin_file))
+    path = tmp_path / "sales.xlsx"
+    _write_flipkart_sales_report(path, [(1001, "Sale", False), (1002, "Sale", False)])
+    db = get_test_db()
+    gstin_file.write_text(json.dumps({"last_flipkart_gstin": "06GETPD0854L1Z2"}))
+    import_logic.import_flipkart_sales(str(path), db)
+
+    # The same report imported again under another seller's GSTIN
+    gstin_file.write_text(json.dumps({"last_flipkart_gstin": "29ABCDE1234F1Z5"}))
+    messages = import_logic.import_flipkart_sales(str(path), db, force=True)
+    assert "   📦 0 orders" in messages
+    assert "   ⚠️ 2 rows skipped: their Order Item IDs are already imported for another GSTIN" in messages
+    assert not [m for m in messages if "rows updated" in m]
+    assert {o.seller_gstin for o in db.query(FlipkartOrder)} == {"06GETPD0854L1Z2"}
+    assert db.query(FlipkartOrder).count() == 2
+    db.close()
+
+
+def _write_amazon_mtr_zip(path, rows):
+    import zipfile
+    import pandas as pd
+    df = pd.DataFrame([{
+        "Seller Gstin": "06AAICA1234B1Z5",
+        "Invoice Number": f"IN-{shipment_item_id}",
+        "Invoice Date": "2026-01-05 10:00:00",
+        "Transaction Type": transaction_type,
+        "Order Id": order_id,
+        "Shipment Item Id": shipment_item_id,
+        "Quantity": 1,
+        "Hsn/sac": "61091000" if transaction_type != "Refund" else None,
+        "Invoice Amount": 525.0,
+        "Tax Exclusive Gross": 500.0,
+        "Igst Rate": 0.05,
+        "Igst Tax": 25.0,
+        "Ship To State": "KERALA",
+    } for order_id, shipment_item_id, transaction_type in rows])
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("mtr.csv", df.to_csv(index=False))
+
+
+def test_import_amazon_mtr_skips_existing_keys(tmp_path):
+    from import_logic import import_amazon_mtr
+    from models import AmazonOrder, AmazonReturn
+
+    path = tmp_path / "b2cReport.zip"
+    _write_amazon_mtr_zip(path, [
+        ("404-1", 111, "Shipment"),
+        ("404-1", 111, "Shipment"),  # repeated within the file
+        ("404-2", 222, "Shipment"),
+        ("404-2", 222, "Refund"),
+        ("404-3", 333, "Tax Adjustment"),
+    ])
+
+    db = get_test_db()
+    messages = import_amazon_mtr(str(path), db)
+    assert "   📦 2 shipments" in messages
+    assert "   🔄 1 returns/cancellations" in messages
+    assert "   ⏭️ 1 duplicates skipped" in messages
+
+    order = db.query(AmazonOrder).filter(AmazonOrder.order_id == "404-1").one()
+    assert order.shipment_item_id == "111"
+    assert order.hsn_sac == "61091000"  # not "61091000.0" despite the blank refund HSN
+    assert order.igst_rate == 5.0
+    assert order.taxable_value == order.tax_exclusive_gross == 500.0
+    assert db.query(AmazonReturn).one().return_amount == 525.0
+
+    messages = import_amazon_mtr(str(path), db, force=True)
+    assert "   📦 0 shipments" in messages
+    assert "   ⏭️ 4 duplicates skipped" in messages
+    assert db.query(AmazonOrder).count() == 2
+    db.close()
+
+
+def test_import_amazon_mtr_updates_corrected_rows(tmp_path):
+    from import_logic import import_amazon_mtr
+    from models import AmazonOrder
+
+    path = tmp_path / "b2cReport.zip"
+    _write_amazon_mtr_zip(path, [("404-1", 111, "Shipment"), ("404-2", 222, "Shipment")])
+    db = get_test_db()
+    import_amazon_mtr(str(path), db)
+
+    # Reissued report with a different Ship To State on 404-2; read one row per chunk
+    _write_amazon_mtr_zip(path, [("404-1", 111, "Shipment"), ("404-2", 222, "Shipment"), ("404-1", 111, "Shipment")])
+    import zipfile
+    with zipfile.ZipFile(path) as zf:
+        csv = zf.read("mtr.csv").decode()
+    lines = csv.splitlines()
+    lines[2] = lines[2].replace("KERALA", "GOA")
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("mtr.csv", "\n".join(lines) + "\n")
+
+    messages = import_amazon_mtr(str(path), db, chunksize=1)
+    assert "   📦 0 shipments" in messages
+    assert "   ✏️ 1 rows updated (changed since last import)" in messages
+    assert "   ⏭️ 2 duplicates skipped" in messages
+    assert db.query(AmazonOrder).filter(AmazonOrder.order_id == "404-2").one().ship_to_state == "GOA"
+    assert db.query(AmazonOrder).filter(AmazonOrder.order_id == "404-1").one().ship_to_state == "KERALA"
+    db.close()
+
+
+def test_import_amazon_mtr_reports_unparseable_dates(tmp_path):
+    import zipfile
+    from import_logic import import_amazon_mtr
+    from models import AmazonOrder
+
+    path = tmp_path / "b2cReport.zip"
+    _write_amazon_mtr_zip(path, [("404-1", 111, "Shipment"), ("404-2", 222, "Shipment")])
+    with zipfile.ZipFile(path) as zf:
+        csv = zf.read("mtr.csv").decode().replace("2026-01-05 10:00:00", "pending", 1)
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("mtr.csv", csv)
+
+    db = get_test_db()
+    messages = import_amazon_mtr(str(path), db)
+    assert "   ⚠️ 1 'Invoice Date' cells are not valid dates (left empty)" in messages
+    dates = {o.order_id: o.invoice_date for o in db.query(AmazonOrder)}
+    assert dates["404-1"] is None and dates["404-2"].date().isoformat() == "2026-01-05"
+    db.close()
+
+
+def test_import_invoice_data_resolves_gstin(tmp_path):
+    import io
+    import zipfile
+    import pandas as pd
+    from import_logic import import_invoice_data
+    from models import MeeshoInvoice, MeeshoSale
+
+    df = pd.DataFrame({
+        "Type": ["INVOICE", "INVOICE", "CREDIT NOTE", "INVOICE", "INVOICE"],
+        "Order Date": ["2026-01-31 17:51:38", "2026-01-30 09:00:00", "2026-01-29 10:00:00", "not a date", None],
+        "Suborder No.": ["SO1", "SO2", "SO1", "SO3", None],
+        "Product Description": [" Socks ", "Cap", "Socks", "Mug", "Blank"],
+        "HSN": [61151000, 65050090, 61151000, 69120010, 0],
+        "Invoice No.": ["INV1", "INV2", "CN1", "INV3", "INV4"],
+    })
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    path = tmp_path / "TAX_INVOICE.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("Tax_invoice_details.xlsx", buffer.getvalue())
+
+    db = get_test_db()
+    db.add(MeeshoSale(sub_order_num="SO1", gstin="06GETPD0854L1Z2"))
+    db.add(MeeshoInvoice(suborder_no="SO2", invoice_no="INV2"))
+    db.commit()
+
+    messages = import_invoice_data(str(path), db)
+    assert messages == [
+        "Invoice data imported: 2 new invoices",
+        "   1 duplicates skipped",
+        "   1 rows skipped due to errors (check logs)",
+    ]
+    invoice = db.query(MeeshoInvoice).filter(MeeshoInvoice.invoice_no == "INV1").one()
+    assert invoice.gstin == "06GETPD0854L1Z2"
+    assert invoice.product_description == "Socks"
+    assert invoice.hsn_code == "61151000"
+    assert invoice.order_date.hour == 17
+    assert db.query(MeeshoInvoice).filter(MeeshoInvoice.invoice_no == "CN1").one().gstin == "06GETPD0854L1Z2"
+    db.close()
+
+
+def test_import_amazon_mtr_chunked_matches_single_read(tmp_path):
+    from import_logic import import_amazon_mtr
+    from models import AmazonOrder
+
+    path = tmp_path / "b2cReport.zip"
+    _write_amazon_mtr_zip(path, [
+        ("404-1", 111, "Shipment"),
+        ("404-2", 222, "Shipment"),
+        ("404-1", 111, "Shipment"),  # duplicate lands in a later chunk
+        ("404-2", 222, "Cancel"),
+    ])
+
+    results = []
+    for chunksize in (1, 1000):
+        db = get_test_db()
+        messages = import_amazon_mtr(str(path), db, chunksize=chunksize)
+        rows = sorted((o.order_id, o.shipment_item_id, o.hsn_sac) for o in db.query(AmazonOrder))
+        results.append((messages, rows))
+        db.close()
+
+    assert results[0] == results[1]
+    assert "   ⏭️ 1 duplicates skipped" in results[0][0]
+
+
+def test_imports_store_derived_columns(tmp_path):
+    import zipfile
+    import pandas as pd
+    from import_logic import import_amazon_mtr
+    from models import AmazonOrder, AmazonReturn, FlipkartOrder
+
+    path = tmp_path / "b2cReport.zip"
+    _write_amazon_mtr_zip(path, [("404-1", 111, "Shipment"), ("404-2", 222, "Shipment"), ("404-2", 222, "Refund")])
+    with zipfile.ZipFile(path) as zf:
+        df = pd.read_csv(zf.open("mtr.csv"))
+    df["Order Date"] = ["2026-01-04 18:00:00", "2025-12-31 23:00:00", "2026-01-02 10:00:00"]
+    df["Customer Bill To Gstid"] = ["32AAAAA0000A1Z5", None, "nan"]
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("mtr.csv", df.to_csv(index=False))
+
+    db = get_test_db()
+    import_amazon_mtr(str(path), db)
+    orders = {o.order_id: o for o in db.query(AmazonOrder)}
+    assert (orders["404-1"].financial_year, orders["404-1"].month_number, orders["404-1"].is_b2b) == (2026, 1, True)
+    assert (orders["404-2"].financial_year, orders["404-2"].month_number, orders["404-2"].is_b2b) == (2026, 12, False)
+    assert orders["404-1"].effective_gst_rate == 5.0
+    assert orders["404-1"].pos_state_code == "32-Kerala"
+    refund = db.query(AmazonReturn).one()
+    assert (refund.month_number, refund.is_b2b) == (1, False)
+
+    # Rows written through the ORM get them on flush
+    order = FlipkartOrder(order_item_id="1", order_date=pd.Timestamp("2025-04-01").date(), cgst_rate=9.0, sgst_rate=9.0,
+                          customer_delivery_state="Goa")
+    db.add(order)
+    db.commit()
+    assert (order.financial_year, order.month_number, order.is_b2b) == (2026, 4, False)
+    assert (order.effective_gst_rate, order.pos_state_code) == (18.0, "30-Goa")
+    order.igst_rate = 12.0
+    db.commit()
+    assert order.effective_gst_rate == 12.0
+    db.close()
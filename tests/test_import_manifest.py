@@ -0,0 +1,94 @@
+"""Tests for import_manifest module."""
+import sys
+import os
+import io
+import zipfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from import_manifest import file_sha256
+from tests.test_import_logic import get_test_db, _meesho_frame
+
+
+def _write_meesho_gst_zip(path, rows=3):
+    buffer = io.BytesIO()
+    _meesho_frame(rows).to_excel(buffer, index=False)
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("tcs_sales.xlsx", buffer.getvalue())
+
+
+def test_file_sha256(tmp_path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"abc")
+    assert file_sha256(str(path)) == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+
+
+def test_identical_file_is_skipped_until_forced(tmp_path):
+    from import_logic import import_from_zip
+    from models import ImportManifest, MeeshoSale
+
+    path = tmp_path / "gst_12345_1_2026.zip"
+    _write_meesho_gst_zip(path)
+    db = get_test_db()
+
+    import_from_zip(str(path), db)
+    entry = db.query(ImportManifest).one()
+    assert (entry.report_type, entry.marketplace, entry.gstin) == ("meesho_gst", "Meesho", "29ABCDE1234F1Z5")
+    assert (entry.financial_year, entry.month_number, entry.rows_imported) == (2026, 1, 3)
+    assert entry.file_size == path.stat().st_size
+
+    messages = import_from_zip(str(path), db)
+    assert messages[0].startswith("⏭️ gst_12345_1_2026.zip was already imported")
+    assert db.query(MeeshoSale).count() == 3
+
+    messages = import_from_zip(str(path), db, force=True)
+    assert any("Sales data imported" in m for m in messages)
+    assert db.query(ImportManifest).count() == 1
+    db.close()
+
+
+def test_newer_file_for_period_forgets_older_one(tmp_path):
+    from import_logic import import_from_zip
+    from models import ImportManifest, MeeshoSale
+
+    first, corrected = tmp_path / "first.zip", tmp_path / "corrected.zip"
+    _write_meesho_gst_zip(first, rows=3)
+    _write_meesho_gst_zip(corrected, rows=2)
+    db = get_test_db()
+
+    import_from_zip(str(first), db)
+    import_from_zip(str(corrected), db)
+    assert db.query(ImportManifest).one().file_name == "corrected.zip"
+
+    # The period now holds the corrected data, so the first file imports again
+    messages = import_from_zip(str(first), db)
+    assert not messages[0].startswith("⏭️")
+    assert db.query(MeeshoSale).count() == 3
+    db.close()
+
+
+def test_failed_import_is_not_recorded(tmp_path, monkeypatch):
+    import import_logic
+    from models import ImportManifest, MeeshoSale
+
+    path = tmp_path / "gst_12345_1_2026.zip"
+    buffer = io.BytesIO()
+    _meesho_frame(2).to_excel(buffer, index=False)
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("tcs_sales.xlsx", buffer.getvalue())
+        zf.writestr("tcs_sales_return.xlsx", buffer.getvalue())
+    db = get_test_db()
+
+    def broken_returns(*args, **kwargs):
+        raise RuntimeError("disk I/O")  # no failure wording in any message
+
+    monkeypatch.setattr(import_logic, "import_returns_data", broken_returns)
+    messages = import_logic.import_from_zip(str(path), db)
+    assert "❌ Error importing Meesho GST Report: disk I/O" in messages
+    assert db.query(ImportManifest).count() == 0
+    assert db.query(MeeshoSale).count() == 0  # the sales sheet is rolled back with it
+
+    monkeypatch.undo()
+    messages = import_logic.import_from_zip(str(path), db)
+    assert not messages[0].startswith("⏭️")
+    assert db.query(ImportManifest).one().rows_imported == 4
+    db.close()
@@ -0,0 +1,98 @@
+"""Tests for import_progress module."""
+import sys
+import os
+import io
+import zipfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from import_progress import CancelToken, ImportCancelled, ProgressReporter, format_progress, CANCELLED_MESSAGE
+from tests.test_import_logic import get_test_db, _meesho_frame, _write_amazon_mtr_zip
+
+
+def _cancel_after(token, rows):
+    """Progress callback that cancels ``token`` once ``rows`` rows are reported."""
+    def callback(snapshot):
+        if snapshot["rows"] >= rows:
+            token.cancel()
+    return callback
+
+
+def test_reporter_rows_per_sec_and_eta():
+    snapshots = []
+    progress = ProgressReporter(snapshots.append, interval=0)
+    progress.start("Amazon MTR", 10)
+    progress.advance(4)
+
+    last = snapshots[-1]
+    assert (last["stage"], last["rows"], last["total"]) == ("Amazon MTR", 4, 10)
+    assert last["rows_per_sec"] > 0
+    assert last["eta_seconds"] == pytest.approx(6 / last["rows_per_sec"], rel=0.5)
+    assert format_progress(last).startswith("Amazon MTR: 4/10 rows (40%), ")
+
+    progress.start("streamed")
+    progress.advance(3)
+    assert progress.eta_seconds is None
+    assert format_progress(progress.snapshot()).startswith("streamed: 3 rows, ")
+
+
+def test_reporter_raises_once_cancelled():
+    token = CancelToken()
+    progress = ProgressReporter(token=token)
+    progress.start("rows", 5)
+    progress.advance(1)
+    token.cancel()
+    with pytest.raises(ImportCancelled):
+        progress.advance(1)
+
+
+def test_cancelled_amazon_mtr_import_saves_nothing(tmp_path):
+    from import_logic import import_amazon_mtr
+    from models import AmazonOrder, ImportManifest
+
+    path = tmp_path / "b2cReport.zip"
+    _write_amazon_mtr_zip(path, [(f"404-{i}", i, "Shipment") for i in range(5)])
+    db = get_test_db()
+
+    token = CancelToken()
+    progress = ProgressReporter(_cancel_after(token, 3), token, interval=0)
+    messages = import_amazon_mtr(str(path), db, chunksize=1, progress=progress)
+
+    # Three one-row chunks were written (each in a savepoint) before the cancel
+    assert messages == [CANCELLED_MESSAGE]
+    assert db.query(AmazonOrder).count() == 0
+    assert db.query(ImportManifest).count() == 0
+
+    messages = import_amazon_mtr(str(path), db, chunksize=1, progress=ProgressReporter())
+    assert "   📦 5 shipments" in messages
+    db.close()
+
+
+def test_cancelled_meesho_zip_rolls_back_both_sheets(tmp_path):
+    from import_logic import import_from_zip
+    from models import MeeshoSale, MeeshoReturn, SellerMapping
+
+    buffer = io.BytesIO()
+    _meesho_frame().to_excel(buffer, index=False)
+    path = tmp_path / "gst_12345_1_2026.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("tcs_sales.xlsx", buffer.getvalue())
+        zf.writestr("tcs_sales_return.xlsx", buffer.getvalue())
+    db = get_test_db()
+
+    token = CancelToken()
+    stages = []
+
+    def callback(snapshot):
+        stages.append(snapshot["stage"])
+        if snapshot["stage"].startswith("Meesho returns") and snapshot["rows"]:
+            token.cancel()
+
+    messages = import_from_zip(str(path), db, progress=ProgressReporter(callback, token, interval=0))
+    assert messages[-1] == CANCELLED_MESSAGE
+    assert any(stage.startswith("Meesho sales") for stage in stages)
+    assert db.query(MeeshoSale).count() == 0
+    assert db.query(MeeshoReturn).count() == 0
+    assert db.query(SellerMapping).count() == 0
+    db.close()
@@ -0,0 +1,143 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from tests.test_import_logic import get_test_db, _meesho_frame, _write_amazon_mtr_zip, _write_flipkart_sales_report
+
+
+def _ledger(db, source_table):
+    from models import SalesLedger
+    return db.query(SalesLedger).filter(SalesLedger.source_table == source_table).order_by(SalesLedger.source_id).all()
+
+
+def test_meesho_import_writes_ledger_and_replaces_period(tmp_path):
+    from import_logic import import_returns_data, import_sales_data
+
+    db = get_test_db()
+    import_sales_data(str(tmp_path / "tcs_sales.xlsx"), db, df=_meesho_frame())
+    import_returns_data(str(tmp_path / "tcs_sales_return.xlsx"), db, df=_meesho_frame(2))
+    sales = _ledger(db, "meesho_sales")
+    assert [(r.marketplace, r.document_type, r.gstin, r.financial_year, r.month_number) for r in sales] == [
+        ("Meesho", "invoice", "29ABCDE1234F1Z5", 2026, 1)] * 3
+    assert [r.pos_state_code for r in sales] == ["29-Karnataka", "07-Delhi", None]
+    assert [r.hsn_code for r in sales] == ["9020", None, "4016"]
+    assert [(r.taxable_value, r.tax_amount, r.gst_rate) for r in sales] == [
+        (100.0, 5.0, 5.0), (200.5, 36.09, 18.0), (300.25, 0.0, None)]
+    returns = _ledger(db, "meesho_returns")
+    assert [(r.document_type, r.taxable_value, r.tax_amount) for r in returns] == [
+        ("credit_note", -100.0, -5.0), ("credit_note", -200.5, -36.09)]
+
+    # A re-import of the period with one line left drops the other two
+    import_sales_data(str(tmp_path / "tcs_sales.xlsx"), db, df=_meesho_frame(1))
+    assert [r.taxable_value for r in _ledger(db, "meesho_sales")] == [100.0]
+    db.close()
+
+
+def test_marketplace_imports_write_ledger(tmp_path, monkeypatch):
+    import import_logic
+    from models import AmazonOrder
+
+    monkeypatch.setattr(import_logic, "_TEMP_GSTIN_FILE", str(tmp_path / "gstin.json"))
+    import_logic._remember_flipkart_gstin("06ABCDE1234F1Z6")
+    flipkart = tmp_path / "sales.xlsx"
+    _write_flipkart_sales_report(flipkart, [("1", "Sale", "False"), ("2", "Sale", "True"), ("3", "Return", "False")])
+    amazon = tmp_path / "b2cReport.zip"
+    _write_amazon_mtr_zip(amazon, [("404-1", 111, "Shipment"), ("404-2", 222, "Refund"), ("404-3", 333, "Cancel")])
+
+    db = get_test_db()
+    import_logic.import_flipkart_sales(str(flipkart), db)
+    import_logic.import_amazon_mtr(str(amazon), db)
+
+    orders = _ledger(db, "flipkart_orders")
+    assert [r.marketplace for r in orders] == ["Flipkart", "Shopsy"]
+    assert [(r.gstin, r.financial_year, r.month_number, r.pos_state_code, r.gst_rate, r.hsn_code) for r in orders] == [
+        ("06ABCDE1234F1Z6", 2026, 1, "32-Kerala", 5.0, "61161000")] * 2
+    assert [(r.taxable_value, r.igst_amount, r.tax_amount, r.invoice_number) for r in orders] == [
+        (195.24, 9.76, 9.76, "FAMS1S"), (195.24, 9.76, 9.76, "FAMS2S")]
+    [flipkart_return] = _ledger(db, "flipkart_returns")
+    assert (flipkart_return.document_type, flipkart_return.taxable_value) == ("credit_note", -195.24)
+
+    assert [(r.document_type, r.taxable_value, r.igst_amount) for r in _ledger(db, "amazon_orders")] == [
+        ("invoice", 500.0, 25.0)]
+    assert [(r.document_type, r.taxable_value, r.igst_amount) for r in _ledger(db, "amazon_returns")] == [
+        ("credit_note", -500.0, -25.0), ("cancellation", -500.0, -25.0)]
+
+    # A corrected row that moves to another period is refiled, not duplicated
+    import zipfile
+    import pandas as pd
+    with zipfile.ZipFile(amazon) as zf:
+        df = pd.read_csv(zf.open("mtr.csv"))
+    df["Order Date"] = "2026-02-03 10:00:00"
+    df["Ship To State"] = "GOA"
+    with zipfile.ZipFile(amazon, "w") as zf:
+        zf.writestr("mtr.csv", df.to_csv(index=False))
+    import_logic.import_amazon_mtr(str(amazon), db)
+    assert db.query(AmazonOrder).one().month_number == 2
+    assert [(r.month_number, r.pos_state_code) for r in _ledger(db, "amazon_orders")] == [(2, "30-Goa")]
+    db.close()
+
+
+def test_ledger_buyer_gstin_is_null_for_b2c(tmp_path):
+    import zipfile
+    import pandas as pd
+    import import_logic
+
+    amazon = tmp_path / "b2bReport.zip"
+    _write_amazon_mtr_zip(amazon, [("404-1", 111, "Shipment"), ("404-2", 222, "Shipment"), ("404-3", 333, "Shipment")])
+    with zipfile.ZipFile(amazon) as zf:
+        df = pd.read_csv(zf.open("mtr.csv"))
+    df["Customer Bill To Gstid"] = ["32BBBBB1234B1Z5", None, ""]  # B2B, then B2C read back as 'nan' and ''
+    with zipfile.ZipFile(amazon, "w") as zf:
+        zf.writestr("mtr.csv", df.to_csv(index=False))
+
+    db = get_test_db()
+    import_logic.import_amazon_mtr(str(amazon), db)
+    assert [(r.is_b2b, r.buyer_gstin) for r in _ledger(db, "amazon_orders")] == [
+        (True, "32BBBBB1234B1Z5"), (False, None), (False, None)]
+    db.close()
+
+
+def test_rebuild_ledger_matches_imports(tmp_path):
+    from import_logic import import_amazon_mtr, import_sales_data
+    from ledger import rebuild_ledger
+    from models import SalesLedger
+
+    amazon = tmp_path / "b2cReport.zip"
+    _write_amazon_mtr_zip(amazon, [("404-1", 111, "Shipment"), ("404-2", 222, "Refund")])
+    db = get_test_db()
+    import_sales_data(str(tmp_path / "tcs_sales.xlsx"), db, df=_meesho_frame())
+    import_amazon_mtr(str(amazon), db)
+
+    def rows():
+        return sorted((r.source_table, r.source_id, r.document_type, r.taxable_value, r.pos_state_code)
+                      for r in db.query(SalesLedger))
+
+    imported = rows()
+    assert rebuild_ledger(db, batch_size=2) == len(imported) == 5
+    assert rows() == imported
+    db.close()
+
+
+def test_ledger_summary_csv(tmp_path):
+    import pandas as pd
+    from import_logic import import_returns_data, import_sales_data
+    from ledger import generate_ledger_summary_csv, ledger_totals
+
+    db = get_test_db()
+    import_sales_data(str(tmp_path / "tcs_sales.xlsx"), db, df=_meesho_frame())
+    import_returns_data(str(tmp_path / "tcs_sales_return.xlsx"), db, df=_meesho_frame(1))
+    totals = ledger_totals(db, "29ABCDE1234F1Z5", 2026, 1)
+    assert [(t["document_type"], t["pos_state_code"], t["lines"], t["taxable_value"]) for t in totals] == [
+        ("credit_note", "29-Karnataka", 1, -100.0),
+        ("invoice", None, 1, 300.25),
+        ("invoice", "07-Delhi", 1, 200.5),
+        ("invoice", "29-Karnataka", 1, 100.0),
+    ]
+    assert ledger_totals(db, "29ABCDE1234F1Z5", 2026, 2) == []
+
+    message = generate_ledger_summary_csv(2026, 1, "29ABCDE1234F1Z5", db, output_folder=str(tmp_path))
+    assert message.endswith("with 4 rows.")
+    summary = pd.read_csv(tmp_path / "ledger_summary.csv")
+    assert summary["Taxable Value"].sum() == 500.75
+    assert set(summary["Supply Type"]) == {"B2C"}
+    db.close()
@@ -0,0 +1,36 @@
+"""Tests for logic module."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from logic import approximate_gst_rate, approximate_gst_rates
+
+
+def test_approximate_gst_rates_matches_approximate_gst_rate():
+    raw = [0.0, 4.99, 5.0, 8.5, 8.51, 12.0, 15.0, 15.01, 18.0, 40.0, -3.0]
+    assert approximate_gst_rates(raw).tolist() == [approximate_gst_rate(r) for r in raw]
+    assert approximate_gst_rates([float("nan")]).tolist() == [5.0]
+
+
+def test_approximate_gst_rates_full_slab_table():
+    from logic import GST_SLAB_TABLE
+
+    raw = [0.0, 0.12, 0.2, 2.9, 4.9, 17.8, 27.5, 40.0]
+    snapped = approximate_gst_rates(raw, slabs=GST_SLAB_TABLE).tolist()
+    assert snapped == [0.0, 0.1, 0.25, 3.0, 5.0, 18.0, 28.0, 28.0]
+    assert snapped == [approximate_gst_rate(r, slabs=GST_SLAB_TABLE) for r in raw]
+
+
+def test_flipkart_hsn_data_keeps_nil_and_28_percent_rates(tmp_path):
+    import pandas as pd
+    from logic import read_flipkart_gst_hsn_data
+
+    path = tmp_path / "gst.xlsx"
+    pd.DataFrame({
+        "HSN Number": ["1001", "8703", "6109"],
+        "Total Taxable Value Rs.": [100.0, 100.0, 100.0],
+        "IGST Amount Rs.": [0.0, 28.0, 5.0],
+        "CGST Amount Rs.": [0.0, 0.0, 0.0],
+        "SGST Amount Rs.": [0.0, 0.0, 0.0],
+    }).to_excel(path, sheet_name="Section 12 in GSTR-1", index=False)
+    assert sorted(read_flipkart_gst_hsn_data(str(path))) == [("1001", 0.0), ("6109", 5.0), ("8703", 28.0)]
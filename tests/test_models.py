@@ -136,3 +136,72 @@ def test_gstin_based_filtering():
     assert len(results) == 1
     assert results[0].gstin == "29AAAA0000A1Z1"
     db.close()
+
+
+REPORT_TABLES = {
+    "meesho_sales", "meesho_returns", "meesho_invoices", "flipkart_orders",
+    "flipkart_returns", "amazon_orders", "amazon_returns", "sales_ledger",
+}
+
+
+def test_report_queries_do_not_scan_tables(tmp_path, monkeypatch):
+    """EXPLAIN QUERY PLAN every SELECT the GSTR-1 reports run: none may be a full table scan."""
+    import logic
+    from sqlalchemy import event
+    from cli import REPORTS, run_reports
+
+    monkeypatch.setattr(logic, "get_flipkart_gst_excel_path", lambda config_path=None: None)
+    db, engine = get_test_db()
+    db.add(SellerMapping(supplier_id=12345, gstin="29ABCDE1234F1Z5"))
+    db.commit()
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    list(run_reports(db, ["29ABCDE1234F1Z5"], [(2026, 1)], list(REPORTS), str(tmp_path)))
+    for report in REPORTS.values():  # legacy supplier_id path
+        try:
+            report(2026, 1, 12345, db, output_folder=str(tmp_path))
+        except LookupError:  # docs: no invoices in the empty database
+            pass
+    event.remove(engine, "before_cursor_execute", capture)
+
+    searched, scans = set(), []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters):
+                detail = row[-1]
+                if detail.startswith("SCAN "):
+                    scans.append(f"{detail}: {' '.join(statement.split())[:200]}")
+                elif detail.startswith("SEARCH "):
+                    searched.add(detail.split()[1])
+    db.close()
+    assert not scans, "\n".join(scans)
+    assert searched >= REPORT_TABLES
+
+
+def test_auto_migrate_adds_report_indexes(tmp_path, monkeypatch):
+    import auto_migrate
+    from database import enable_savepoints
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    enable_savepoints(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_flipkart_orders_gstin_event_period")
+        conn.exec_driver_sql("DROP INDEX ix_amazon_returns_gstin_period_type")
+    monkeypatch.setattr(auto_migrate, "engine", engine)
+
+    messages = auto_migrate.auto_migrate()
+    assert "✅ Created index: ix_flipkart_orders_gstin_event_period" in messages
+    assert "✅ Created index: ix_amazon_returns_gstin_period_type" in messages
+    columns = {idx["name"]: idx["column_names"] for idx in inspect(engine).get_indexes("amazon_returns")}
+    assert columns["ix_amazon_returns_gstin_period_type"] == [
+        "seller_gstin", "financial_year", "month_number", "is_b2b", "transaction_type"]
+    assert "ix_amazon_returns_gstin_date_type" not in columns  # created by migration 4, replaced by 5
+    assert auto_migrate.auto_migrate() == ["✅ Database schema is up-to-date"]
+    engine.dispose()
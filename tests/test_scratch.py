@@ -0,0 +1,40 @@
+"""Tests for scratch module."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from scratch import SCRATCH_ROOT_ENV, scratch_dir, scratch_root
+from tests.test_import_logic import get_test_db
+
+
+def test_scratch_dirs_are_private_and_removed(tmp_path, monkeypatch):
+    monkeypatch.setenv(SCRATCH_ROOT_ENV, str(tmp_path / "ram"))
+    assert scratch_root() == str(tmp_path / "ram")
+
+    with scratch_dir("a_") as first, scratch_dir("a_") as second:
+        assert first != second
+        assert os.path.dirname(first) == str(tmp_path / "ram")
+        open(os.path.join(first, "x.csv"), "w").close()
+
+    with pytest.raises(ValueError):
+        with scratch_dir() as failed:
+            raise ValueError()
+
+    assert not os.path.exists(first)
+    assert not os.path.exists(second)
+    assert not os.path.exists(failed)
+
+
+def test_gstr1_workbook_leaves_no_scratch_files(tmp_path, monkeypatch):
+    from logic import generate_gstr1_excel_workbook
+
+    root = tmp_path / "scratch"
+    monkeypatch.setenv(SCRATCH_ROOT_ENV, str(root))
+    db = get_test_db()
+
+    result = generate_gstr1_excel_workbook(2026, 1, "29ABCDE1234F1Z5", db, output_folder=str(tmp_path))
+    assert result.startswith("✅ GSTR-1 Excel Workbook created")
+    assert os.listdir(root) == []
+    db.close()
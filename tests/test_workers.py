@@ -0,0 +1,68 @@
+"""Tests for workers module."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from import_progress import CANCELLED_MESSAGE
+from workers import DbWorker
+
+
+def _run(job):
+    """Run a worker on this thread and collect what it emits."""
+    worker = DbWorker("TEST", job)
+    emitted = []
+    worker.signals.progress.connect(lambda wid, snapshot: emitted.append(("progress", wid, snapshot["rows"])))
+    worker.signals.finished.connect(lambda wid, result: emitted.append(("finished", wid, result)))
+    worker.signals.error.connect(lambda wid, error: emitted.append(("error", wid, error)))
+    worker.run()
+    return worker, emitted
+
+
+def test_worker_reports_progress_and_result():
+    def job(db, progress):
+        progress.start("rows", 2)
+        progress.advance(2)
+        return "done"
+
+    worker, emitted = _run(job)
+    assert emitted[-1] == ("finished", worker.id, "done")
+    assert ("progress", worker.id, 2) in emitted
+
+
+def test_worker_reports_errors():
+    def job(db, progress):
+        raise ValueError("no data")
+
+    worker, emitted = _run(job)
+    assert emitted == [("error", worker.id, "no data")]
+
+
+def test_cancelled_worker_stops_at_next_batch():
+    from import_progress import ImportCancelled
+
+    def job(db, progress):
+        progress.start("rows", 10)
+        progress.token.cancel()  # what DbWorker.cancel() does from the GUI thread
+        try:
+            progress.advance(1)
+        except ImportCancelled:
+            return "stopped"
+        return "not stopped"
+
+    worker, emitted = _run(job)
+    assert emitted[-1] == ("finished", worker.id, "stopped")
+    assert worker.token.cancelled
+
+
+def test_worker_reports_uncaught_cancel_as_finished():
+    def job(db, progress):
+        progress.start("rows", 10)
+        progress.token.cancel()
+        progress.advance(1)
+
+    worker, emitted = _run(job)
+    assert emitted[-1] == ("finished", worker.id, [CANCELLED_MESSAGE])
@@ -0,0 +1,42 @@
+"""Tests for zip_reader module."""
+import sys
+import os
+import zipfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from zip_reader import find_member, read_member, open_member, load_member
+
+
+def _make_zip(path):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("reports/", "")
+        zf.writestr("reports/MTR_B2C.csv", "Order Id,Quantity\n404-1,2\n")
+        zf.writestr("tcs_sales.xlsx", b"not really excel")
+    return path
+
+
+def test_find_member_matches_base_name(tmp_path):
+    with zipfile.ZipFile(_make_zip(tmp_path / "a.zip")) as zf:
+        assert find_member(zf, lambda f: f.endswith(".csv")) == "reports/MTR_B2C.csv"
+        assert find_member(zf, lambda f: f.startswith("reports")) is None
+        assert find_member(zf, lambda f: f.endswith(".pdf")) is None
+
+
+def test_read_member_is_named_buffer(tmp_path):
+    with zipfile.ZipFile(_make_zip(tmp_path / "a.zip")) as zf:
+        buffer = read_member(zf, "tcs_sales.xlsx")
+    assert buffer.name == "tcs_sales.xlsx"
+    assert buffer.read() == b"not really excel"
+
+
+def test_open_member_streams_without_extracting(tmp_path):
+    import pandas as pd
+    path = _make_zip(tmp_path / "a.zip")
+    with open_member(str(path), lambda f: f.endswith(".csv")) as stream:
+        df = pd.read_csv(stream)
+    assert df["Order Id"].tolist() == ["404-1"]
+    assert os.listdir(tmp_path) == ["a.zip"]
+
+    with open_member(str(path), lambda f: f.endswith(".json")) as stream:
+        assert stream is None
+    assert load_member(str(path), lambda f: f.endswith(".json")) is None
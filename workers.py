@@ -0,0 +1,72 @@
+"""
+Background workers for the Qt GUI.
+
+Imports and report generation run on QThreadPool threads so the window
+stays responsive. Each :class:`DbWorker` opens its own session (a session
+must not be shared between threads) - a writer ``SessionLocal()`` for
+imports, a query-only ``ReadSessionLocal()`` for reports - and reports back
+through Qt signals, which are delivered to slots on the GUI thread.
+"""
+import itertools
+import logging
+import traceback
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from database import SessionLocal
+from import_progress import CANCELLED_MESSAGE, CancelToken, ImportCancelled, ProgressReporter
+
+logger = logging.getLogger(__name__)
+
+_worker_ids = itertools.count(1)
+
+
+class WorkerSignals(QObject):
+    """
+    Signals of a :class:`DbWorker` (a QRunnable is not a QObject). Each
+    carries the worker's ``id`` so one slot can serve every worker.
+    """
+    progress = Signal(int, object)  # ProgressReporter.snapshot() dict
+    finished = Signal(int, object)  # the job's return value
+    error = Signal(int, str)
+
+
+class DbWorker(QRunnable):
+    """
+    Run ``job(db, progress)`` on a pool thread with its own session from
+    ``sessions`` (the writer ``SessionLocal`` unless the job only reads).
+
+    ``progress`` is a ProgressReporter that emits ``signals.progress`` and,
+    once :meth:`cancel` is called, stops the import at its next batch. An
+    exception rolls the session back and is reported through ``signals.error``.
+    """
+
+    def __init__(self, title: str, job, sessions=SessionLocal):
+        super().__init__()
+        self.id = next(_worker_ids)
+        self.title = title
+        self.job = job
+        self.sessions = sessions
+        self.signals = WorkerSignals()
+        self.token = CancelToken()
+
+    def cancel(self):
+        self.token.cancel()
+
+    def run(self):
+        db = self.sessions()
+        try:
+            progress = ProgressReporter(lambda snapshot: self.signals.progress.emit(self.id, snapshot), self.token)
+            result = self.job(db, progress)
+        except ImportCancelled:
+            # Importers catch it themselves; a job that does not still reports back
+            db.rollback()
+            self.signals.finished.emit(self.id, [CANCELLED_MESSAGE])
+        except Exception as e:
+            db.rollback()
+            logger.error(f"{self.title} failed:\n{traceback.format_exc()}")
+            self.signals.error.emit(self.id, str(e))
+        else:
+            self.signals.finished.emit(self.id, result)
+        finally:
+            db.close()
@@ -0,0 +1,60 @@
+"""
+Read files straight out of marketplace ZIP downloads.
+
+Members are streamed from ``zipfile.ZipFile.open()`` (or buffered in memory
+when the parser needs random access, as Excel readers do) instead of being
+extracted to a shared temp folder and read back from disk. Nothing is
+written, so there is nothing to clean up and concurrent imports cannot
+clobber each other's files.
+"""
+import io
+import os
+import zipfile
+from contextlib import contextmanager
+
+
+def find_member(zip_ref: zipfile.ZipFile, predicate) -> str | None:
+    """
+    Name of the first file member whose base name satisfies ``predicate``.
+
+    Directory entries are skipped. The predicate sees only the file name
+    (``"tcs_sales.xlsx"``), not the folder path inside the archive.
+    """
+    for info in zip_ref.infolist():
+        if not info.is_dir() and predicate(os.path.basename(info.filename)):
+            return info.filename
+    return None
+
+
+def read_member(zip_ref: zipfile.ZipFile, name: str) -> io.BytesIO:
+    """
+    In-memory, seekable copy of a member for parsers that need random access (xlsx).
+    The buffer's ``name`` is the member's file name, for status messages.
+    """
+    buffer = io.BytesIO(zip_ref.read(name))
+    buffer.name = os.path.basename(name)
+    return buffer
+
+
+@contextmanager
+def open_member(zip_path: str, predicate):
+    """
+    Stream the first member of ``zip_path`` matching ``predicate``.
+
+    Yields a binary file object (suitable for ``pd.read_csv``), or None when
+    the archive has no matching member.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        name = find_member(zip_ref, predicate)
+        if name is None:
+            yield None
+            return
+        with zip_ref.open(name) as stream:
+            yield stream
+
+
+def load_member(zip_path: str, predicate) -> io.BytesIO | None:
+    """:func:`read_member` for the first member matching ``predicate``, or None."""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        name = find_member(zip_ref, predicate)
+        return read_member(zip_ref, name) if name is not None else None